@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark the explicit stack property builder against the recursive builder it replaced.
+
+Three synthetic "schema" sections are built (only the properties, so the comparison is not
+diluted by the $defs or serialization):
+    - deep: a single chain of nested objects, as generated from YANG-like models.
+    - wide: a single object with many js_kind properties.
+    - tree: nested objects with a fan-out at every level, mixing arrays and js_kinds.
+
+Usage:
+    python -m benchmarks.bench_deep [--depth 5000] [--width 20000] [--repeat 5]
+"""
+
+import timeit
+from argparse import ArgumentParser
+from collections.abc import Callable
+from typing import Any
+
+from jsnac.core.build import SchemaBuilder, _BuildContext  # noqa: PLC2701
+
+KINDS = ("ipv4_cidr", "vlan", "string", "mac", "integer")
+
+
+# Returns a chain of depth nested objects, ending in a js_kind.
+def deep(depth: int) -> dict:  # noqa: D103
+    node: dict = {"js_kind": {"name": "ipv4"}}
+    for level in range(depth):
+        node = {"type": "object", "properties": {f"level{level}": node}}
+    return {"root": node}
+
+
+# Returns a single object with width js_kind properties.
+def wide(width: int) -> dict:  # noqa: D103
+    properties = {f"prop{i}": {"js_kind": {"name": KINDS[i % len(KINDS)]}} for i in range(width)}
+    return {"root": {"type": "object", "properties": properties}}
+
+
+# Returns objects nested depth levels deep with fanout children each, and an array at every leaf.
+def tree(depth: int, fanout: int) -> dict:  # noqa: D103
+    if depth == 0:
+        return {"type": "array", "items": {"js_kind": {"name": "ipv6_cidr"}}}
+    properties = {f"child{i}": tree(depth - 1, fanout) for i in range(fanout)}
+    properties["id"] = {"js_kind": {"name": "uint32"}}
+    return {"type": "object", "properties": properties}
+
+
+# The recursive property builder as it was before the explicit stack, for comparison.
+def recursive(builder: SchemaBuilder, title: str, data: Any, ctx: _BuildContext) -> Any:  # noqa: ANN401, D103
+    builder.log.debug("Building properties for: \n%s ", data)
+    if isinstance(data, dict):
+        if "js_kind" in data:
+            return builder._build_kinds(title, data["js_kind"], ctx)  # noqa: SLF001
+        properties = {}
+        if "properties" in data:
+            properties["type"] = "object"
+            properties["additionalProperties"] = data.get("additional_properties", False)
+        if "items" in data:
+            properties["type"] = "array"
+        properties.update({k: recursive(builder, k, v, ctx) for k, v in data.items()})
+        return properties
+    if isinstance(data, list):
+        return [recursive(builder, title, item, ctx) for item in data]
+    return data
+
+
+def _best(func: Callable[[], Any], repeat: int) -> str:
+    try:
+        return f"{min(timeit.repeat(func, number=1, repeat=repeat)):.4f}"
+    except RecursionError:
+        return "RecursionError"
+
+
+def main() -> None:  # noqa: D103
+    parser = ArgumentParser(description="Benchmark the property builder on deep and wide definitions")
+    parser.add_argument("--depth", type=int, default=5000, help="Depth of the deep definition (default: 5000)")
+    parser.add_argument("--width", type=int, default=20000, help="Width of the wide definition (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repeats, the best is reported (default: 5)")
+    args = parser.parse_args()
+    builder = SchemaBuilder()
+    cases = {
+        f"deep ({args.depth})": deep(args.depth),
+        f"deep ({args.depth // 50})": deep(args.depth // 50),
+        f"wide ({args.width})": wide(args.width),
+        "tree (6x6)": tree(6, 6),
+    }
+    print("Building the properties of each definition (seconds)")
+    print(f"{'definition':<16} {'recursive':>14} {'stack':>14}")
+    for name, schema in cases.items():
+        recursive_time = _best(lambda: recursive(builder, "Default", schema, _BuildContext(debug=False)), args.repeat)  # noqa: B023
+        stack_time = _best(
+            lambda: builder._build_properties("Default", schema, _BuildContext(debug=False)),  # noqa: B023, SLF001
+            args.repeat,
+        )
+        print(f"{name:<16} {recursive_time:>14} {stack_time:>14}")
+
+
+if __name__ == "__main__":
+    main()
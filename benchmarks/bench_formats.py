@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the native kind checkers against the regex patterns they replace.
+
+Two comparisons are made:
+    - Each native checker against a compiled re.search of the kind's pattern, for the raw cost per value.
+    - The Validator with and without the native checkers, validating an interface table with
+      ipv4_cidr, ipv6_cidr, mac and vlan values. This is the cost that matters in practice, as it
+      includes the JSON Schema $ref/type/pattern evaluation that the native checkers skip.
+
+Usage:
+    python -m benchmarks.bench_formats [--count 10000] [--repeat 5]
+"""
+
+import random
+import re
+import timeit
+from argparse import ArgumentParser
+from collections.abc import Callable
+from typing import Any
+
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.formats import KIND_CHECKERS
+from jsnac.core.kinds import BUILTIN_KINDS
+from jsnac.core.validate import Validator
+
+rng = random.Random(0)  # noqa: S311
+
+GENERATORS: dict[str, Callable[[], Any]] = {
+    "ipv4": lambda: ".".join(str(rng.randint(0, 255)) for _ in range(4)),
+    "ipv4_cidr": lambda: "{}/{}".format(".".join(str(rng.randint(0, 255)) for _ in range(4)), rng.randint(0, 32)),
+    "ipv4_prefix": lambda: f"/{rng.randint(0, 32)}",
+    "ipv6": lambda: f"2001:db8:{rng.randint(0, 0xFFFF):x}::{rng.randint(0, 0xFFFF):x}",
+    "ipv6_cidr": lambda: f"2001:db8:{rng.randint(0, 0xFFFF):x}::/{rng.choice((32, 48, 64))}",
+    "ipv6_prefix": lambda: f"/{rng.choice((32, 48, 64, 128))}",
+    "mac": lambda: ":".join(f"{rng.randint(0, 255):02x}" for _ in range(6)),
+    "mac_dot": lambda: ".".join(f"{rng.randint(0, 0xFFFF):04x}" for _ in range(3)),
+}
+
+DEFINITION = """
+schema:
+  interfaces:
+    items:
+      properties:
+        ipv4:
+          js_kind: { name: "ipv4_cidr" }
+        ipv6:
+          js_kind: { name: "ipv6_cidr" }
+        mac:
+          js_kind: { name: "mac" }
+        vlan:
+          js_kind: { name: "vlan" }
+"""
+
+
+def _best(func: Callable[[], Any], repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench_checkers(count: int, repeat: int) -> None:  # noqa: D103
+    print(f"Per value cost over {count} values (microseconds)")
+    print(f"{'kind':<12} {'regex':>8} {'native':>8}")
+    for kind, generate in GENERATORS.items():
+        values = [generate() for _ in range(count)]
+        pattern = re.compile(BUILTIN_KINDS[kind]["pattern"])
+        check = KIND_CHECKERS[kind]
+        regex_time = _best(lambda: [pattern.search(v) for v in values], repeat)  # noqa: B023
+        native_time = _best(lambda: [check(v) for v in values], repeat)  # noqa: B023
+        print(f"{kind:<12} {regex_time / count * 1e6:>8.3f} {native_time / count * 1e6:>8.3f}")
+
+
+def bench_validator(count: int, repeat: int) -> None:  # noqa: D103
+    jsnac = SchemaBuilder()
+    jsnac.add_yaml(DEFINITION)
+    schema = jsnac.build_schema_dict()
+    document = {
+        "interfaces": [
+            {
+                "ipv4": GENERATORS["ipv4_cidr"](),
+                "ipv6": GENERATORS["ipv6_cidr"](),
+                "mac": GENERATORS["mac"](),
+                "vlan": rng.randint(1, 4094),
+            }
+            for _ in range(count)
+        ]
+    }
+    print(f"\nValidating an interface table with {count} entries (seconds)")
+    for native in (False, True):
+        validator = Validator(schema, native=native)
+        seconds = _best(lambda: validator.validate(document), repeat)  # noqa: B023
+        print(f"{'fast path' if native else 'generic':<12} {seconds:>8.4f}")
+
+
+def main() -> None:  # noqa: D103
+    parser = ArgumentParser(description="Benchmark the native kind checkers")
+    parser.add_argument("--count", type=int, default=10000, help="Number of values per kind (default: 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repeats, the best is reported (default: 5)")
+    args = parser.parse_args()
+    bench_checkers(args.count, args.repeat)
+    bench_validator(args.count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for schema builds and validation, compared against stored baselines.
+
+Every synthetic definition in benchmarks.generators is run through each stage of a build:
+    - add_yaml / add_json: parsing the definition into a SchemaBuilder.
+    - build: building the schema dictionary (build_schema_dict).
+    - serialize: serializing the schema with each available serializer.
+    - validate: validating the definition's document against the schema (needs jsonschema).
+    - cli: the whole "jsnac -f" command in a new interpreter, start-up included.
+
+The best time of --repeat runs is reported for each case. With --save the results become the new
+baseline, otherwise they are compared with the stored baseline and the suite exits with status 1
+if any case is slower than the baseline by more than --threshold (and by at least --min-delta
+seconds, so sub-millisecond cases do not fail on timer noise). Baselines are only comparable on the
+same machine and Python version, so save one before upgrading and compare after.
+
+Usage:
+    python -m benchmarks.bench_suite [--scale 1.0] [--repeat 5] [--only build] [--save] [--threshold 1.25]
+"""
+
+import json
+import platform
+import subprocess  # noqa: S404
+import sys
+import tempfile
+import timeit
+from argparse import ArgumentParser
+from collections.abc import Callable
+from contextlib import suppress
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from benchmarks.generators import GENERATORS
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.serialize import get_serializer
+from jsnac.core.validate import Validator
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def _best(func: Callable[[], Any], repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def _serializers() -> dict[str, Callable]:
+    serializers = {"json": get_serializer("json")}
+    # orjson is an optional dependency
+    with suppress(ImportError):
+        serializers["orjson"] = get_serializer("orjson")
+    return serializers
+
+
+def _validator(schema: dict) -> Validator | None:
+    try:
+        return Validator(schema)
+    except ImportError:
+        # jsonschema is an optional dependency
+        return None
+
+
+def _cases(name: str, definition: dict, document: dict, workdir: Path) -> dict[str, Callable[[], Any]]:
+    # Returns each benchmarked stage of one definition, with any set up done up front
+    yaml_text = _dump_yaml(definition)
+    json_text = json.dumps(definition)
+    builder = SchemaBuilder()
+    builder.add_json(json_text)
+    schema = builder.build_schema_dict()
+    cases: dict[str, Callable[[], Any]] = {
+        "add_yaml": lambda: SchemaBuilder().add_yaml(yaml_text),
+        "add_json": lambda: SchemaBuilder().add_json(json_text),
+        "build": builder.build_schema_dict,
+    }
+    for serializer_name, serializer in _serializers().items():
+        cases[f"serialize_{serializer_name}"] = partial(serializer, schema, indent=None)
+    validator = _validator(schema)
+    if validator is not None:
+        cases["validate"] = lambda: validator.validate(document)
+    source = workdir / f"{name}.yml"
+    source.write_text(yaml_text, encoding="utf-8")
+    command = [sys.executable, "-m", "jsnac.utils.jsnac_cli", "-f", str(source), "-o", str(workdir / "out.json")]
+    cases["cli"] = lambda: subprocess.run([*command, "--no-cache"], check=True, capture_output=True)  # noqa: S603
+    return cases
+
+
+def _dump_yaml(data: dict) -> str:
+    # PyYAML's representer is recursive, so the deep definition needs a higher recursion limit
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 20000))
+    try:
+        dumper = yaml.CSafeDumper if yaml.__with_libyaml__ else yaml.SafeDumper
+        return yaml.dump(data, Dumper=dumper, sort_keys=False)
+    finally:
+        sys.setrecursionlimit(limit)
+
+
+def run(scale: float, repeat: int, only: str | None = None) -> dict[str, float]:
+    """
+    Runs every benchmark case, returning the best time of each in seconds.
+
+    Args:
+        scale (float): Multiplier applied to the size of every generated definition.
+        repeat (int): Number of runs of each case, the best is kept.
+        only (str | None): Only run the cases whose name contains this string.
+
+    Returns:
+        dict[str, float]: The best time of each case, keyed by "<definition>.<stage>".
+
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, (generate, count) in GENERATORS.items():
+            definition, document = generate(max(1, int(count * scale)))
+            for stage, func in _cases(name, definition, document, Path(workdir)).items():
+                case = f"{name}.{stage}"
+                if only and only not in case:
+                    continue
+                results[case] = _best(func, repeat)
+                print(f"{case:<32} {results[case]:>10.4f}", flush=True)
+    return results
+
+
+def _environment(scale: float) -> dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "scale": scale}
+
+
+def compare(results: dict[str, float], baseline: dict[str, Any], threshold: float, min_delta: float) -> list[str]:
+    """
+    Compares results with a baseline, returning the cases that regressed.
+
+    Args:
+        results (dict[str, float]): The best time of each case.
+        baseline (dict[str, Any]): The stored baseline, with "environment" and "results" keys.
+        threshold (float): Ratio to the baseline time above which a case has regressed.
+        min_delta (float): Minimum slowdown in seconds for a case to have regressed.
+
+    Returns:
+        list[str]: The names of the cases that regressed.
+
+    """
+    regressed = []
+    print(f"\n{'case':<32} {'baseline':>10} {'current':>10} {'ratio':>8}")
+    for case, seconds in results.items():
+        previous = baseline["results"].get(case)
+        if previous is None:
+            print(f"{case:<32} {'-':>10} {seconds:>10.4f} {'new':>8}")
+            continue
+        ratio = seconds / previous if previous else float("inf")
+        slower = ratio > threshold and seconds - previous >= min_delta
+        if slower:
+            regressed.append(case)
+        print(f"{case:<32} {previous:>10.4f} {seconds:>10.4f} {ratio:>7.2f}x{' REGRESSED' if slower else ''}")
+    return regressed
+
+
+def main() -> None:  # noqa: D103
+    parser = ArgumentParser(description="Benchmark schema builds and validation against a stored baseline")
+    parser.add_argument("--scale", type=float, default=1.0, help="Size multiplier for every definition (default: 1.0)")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repeats, the best is reported (default: 5)")
+    parser.add_argument("--only", type=str, help="Only run the cases whose name contains this string")
+    parser.add_argument("--baseline", type=Path, default=BASELINE, help=f"Baseline file (default: {BASELINE.name})")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Ratio to the baseline above which a case has regressed (default: 1.25)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.001,
+        help="Minimum slowdown in seconds for a case to have regressed (default: 0.001)",
+    )
+    args = parser.parse_args()
+    environment = _environment(args.scale)
+    print(f"{'case':<32} {'seconds':>10}")
+    results = run(args.scale, args.repeat, args.only)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    if args.save:
+        # Cases left out with --only keep their previous baseline, if it was recorded in the same environment
+        if baseline is not None and baseline["environment"] == environment:
+            results = {**baseline["results"], **results}
+        rounded = {case: round(seconds, 6) for case, seconds in results.items()}
+        args.baseline.write_text(json.dumps({"environment": environment, "results": rounded}, indent=4) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}, run with --save to create one")
+        return
+    if baseline["environment"] != environment:
+        print(f"\nWarning: the baseline was recorded on {baseline['environment']}, timings may not be comparable")
+    regressed = compare(results, baseline, args.threshold, args.min_delta)
+    if regressed:
+        print(f"\n{len(regressed)} case(s) regressed by more than {args.threshold:.2f}x: {', '.join(regressed)}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Synthetic JSNAC definitions for the benchmarks.
+
+Each generator returns a definition (as parsed from YAML/JSON) exercising one dimension of the
+builder, sized by a single count so the suite can be scaled up or down:
+    - wide: a single object with count js_kind properties.
+    - deep: a chain of count nested objects.
+    - js_kinds: an interface table per device, referencing every built-in kind count times in total.
+    - user_kinds: count custom pattern kinds, each referenced by a property.
+    - choices: 20 choice properties with count choices each.
+
+Each definition comes with a document that is valid against its schema, for validation benchmarks.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+# Built-in kinds referenced by the generated properties, with a valid value for each
+KIND_VALUES: dict[str, Any] = {
+    "ipv4": "10.0.0.1",
+    "ipv4_cidr": "10.0.0.1/24",
+    "ipv6": "2001:db8::1",
+    "ipv6_cidr": "2001:db8::/64",
+    "mac": "00:11:22:33:44:55",
+    "vlan": 100,
+    "mtu": 9000,
+    "uint32": 65000,
+    "string": "value",
+    "integer": 1,
+}
+KINDS = tuple(KIND_VALUES)
+
+
+def _property(i: int) -> tuple[dict, Any]:
+    kind = KINDS[i % len(KINDS)]
+    return {"js_kind": {"name": kind}}, KIND_VALUES[kind]
+
+
+def wide(count: int) -> tuple[dict, dict]:  # noqa: D103
+    properties, document = {}, {}
+    for i in range(count):
+        properties[f"prop{i}"], document[f"prop{i}"] = _property(i)
+    return {"schema": {"root": {"properties": properties}}}, {"root": document}
+
+
+def deep(count: int) -> tuple[dict, dict]:  # noqa: D103
+    node: dict = {"js_kind": {"name": "ipv4"}}
+    value: Any = KIND_VALUES["ipv4"]
+    for level in range(count - 1, -1, -1):
+        node = {"properties": {f"level{level}": node}}
+        value = {f"level{level}": value}
+    return {"schema": {"root": node}}, {"root": value}
+
+
+def js_kinds(count: int) -> tuple[dict, dict]:  # noqa: D103
+    # Devices of 50 interfaces, each interface referencing len(KINDS) kinds
+    per_device = 50 * len(KINDS)
+    properties, document = {}, {}
+    for device in range(max(1, count // per_device)):
+        interface = {f"field{i}": _property(i)[0] for i in range(len(KINDS))}
+        properties[f"device{device}"] = {
+            "properties": {f"if{i}": {"properties": dict(interface)} for i in range(50)},
+        }
+        values = {f"field{i}": _property(i)[1] for i in range(len(KINDS))}
+        document[f"device{device}"] = {f"if{i}": dict(values) for i in range(50)}
+    return {"schema": {"devices": {"properties": properties}}}, {"devices": document}
+
+
+def user_kinds(count: int) -> tuple[dict, dict]:  # noqa: D103
+    kinds = {
+        f"kind{i}": {"type": "pattern", "regex": f"^k{i}-[a-z0-9-]{{1,32}}$", "title": f"Kind {i}"}
+        for i in range(count)
+    }
+    properties = {f"prop{i}": {"js_kind": {"name": f"kind{i}"}} for i in range(count)}
+    document = {f"prop{i}": f"k{i}-value" for i in range(count)}
+    return {"js_kinds": kinds, "schema": {"root": {"properties": properties}}}, {"root": document}
+
+
+def choices(count: int) -> tuple[dict, dict]:  # noqa: D103
+    options = [f"option-{i}" for i in range(count)]
+    properties = {f"choice{i}": {"js_kind": {"name": "choice", "choices": list(options)}} for i in range(20)}
+    document = {f"choice{i}": options[-1] for i in range(20)}
+    return {"schema": {"root": {"properties": properties}}}, {"root": document}
+
+
+# Each generator with its default count, multiplied by the suite's --scale
+GENERATORS: dict[str, tuple[Callable[[int], tuple[dict, dict]], int]] = {
+    "wide": (wide, 5000),
+    "deep": (deep, 100),
+    "js_kinds": (js_kinds, 10000),
+    "user_kinds": (user_kinds, 1000),
+    "choices": (choices, 5000),
+}
@@ -1,6 +1,23 @@
-from .core.build import SchemaBuilder
+from typing import TYPE_CHECKING, Any
 
 __version__ = "0.3.0"
 __all__ = [
     "SchemaBuilder",
 ]
+
+if TYPE_CHECKING:
+    from .core.build import SchemaBuilder
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    # The builder is only imported when first used (PEP 562), so importing jsnac (e.g. for __version__) stays cheap
+    if name == "SchemaBuilder":
+        from .core.build import SchemaBuilder  # noqa: PLC0415
+
+        return SchemaBuilder
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+JSNAC Asyncio API
+
+This module builds and validates schemas from asyncio code (e.g. a web service) without blocking
+the event loop. File I/O, parsing, building and validation all run in an executor: the event loop's
+default thread pool unless another executor is given. The number of jobs in flight is bounded by a
+semaphore, so a request for hundreds of schemas does not flood the executor or hold hundreds of
+rendered schemas in memory at once.
+
+SchemaBuilder and Validator are thread safe, so a single instance can be shared by every task.
+Builds from files only pass picklable arguments to the executor, so a ProcessPoolExecutor can be
+used instead of threads for builds to run in parallel rather than taking turns holding the GIL.
+For a single builder, see SchemaBuilder.aadd_file and SchemaBuilder.abuild.
+
+Functions:
+    arender_schema(input_path, json_input=False, cache=None, options=None, executor=None) -> tuple[str, bool]:
+        Async version of jsnac.core.batch.render_schema.
+    abuild_many(inputs, json_input=False, cache=None, options=None, limit=None, executor=None) -> list:
+        Renders the schemas of many definition files concurrently, in the same order as the inputs.
+    avalidate_files(validator, paths, limit=None, executor=None) -> list[ValidationResult]:
+        Validates many YAML/JSON files concurrently, in the same order as the paths.
+"""
+
+import asyncio
+import os
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from typing import Any, TypeVar
+
+from jsnac.core.batch import BuildOptions, render_schema
+from jsnac.core.cache import SchemaCache
+from jsnac.core.validate import ValidationResult, Validator
+
+T = TypeVar("T")
+
+
+def _bounded(limit: int | None, executor: Executor | None) -> Callable[[Callable[[], T]], Awaitable[T]]:
+    # Returns a function running a job in the executor, with at most limit jobs in flight at once
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(limit or os.cpu_count() or 1)
+
+    async def run(job: Callable[[], T]) -> T:
+        async with semaphore:
+            return await loop.run_in_executor(executor, job)
+
+    return run
+
+
+async def arender_schema(
+    input_path: Path | list[Path],
+    json_input: bool = False,  # noqa: FBT001, FBT002
+    cache: SchemaCache | None = None,
+    options: BuildOptions | None = None,
+    *,
+    executor: Executor | None = None,
+) -> tuple[str, bool]:
+    """
+    Async version of jsnac.core.batch.render_schema.
+
+    Args:
+        input_path (Path | list[Path]): The definition file to build, or the definition files to merge.
+        json_input (bool): Treat the input as JSON. Otherwise only .json files are parsed as JSON.
+        cache (SchemaCache | None): Cache to look the schema up in and store it to.
+        options (BuildOptions | None): Options controlling how the schema is built.
+        executor (Executor | None): The executor to run in, defaults to the event loop's default executor.
+
+    Returns:
+        tuple[str, bool]: The rendered schema and whether it was served from the cache.
+
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(render_schema, input_path, json_input, cache, options))
+
+
+async def abuild_many(  # noqa: PLR0913
+    inputs: Iterable[Path | list[Path]],
+    json_input: bool = False,  # noqa: FBT001, FBT002
+    cache: SchemaCache | None = None,
+    options: BuildOptions | None = None,
+    *,
+    limit: int | None = None,
+    executor: Executor | None = None,
+    return_exceptions: bool = False,
+) -> list[Any]:
+    """
+    Renders the schemas of many definition files concurrently, in the same order as the inputs.
+
+    Args:
+        inputs (Iterable[Path | list[Path]]): The definition files to build (or lists of files to merge).
+        json_input (bool): Treat every input as JSON. Otherwise only .json files are parsed as JSON.
+        cache (SchemaCache | None): Cache to skip the build for unchanged definition files.
+        options (BuildOptions | None): Options controlling how each schema is built.
+        limit (int | None): Maximum number of builds in flight at once, defaults to the number of CPUs.
+        executor (Executor | None): The executor to run in, defaults to the event loop's default executor.
+        return_exceptions (bool): Return the exception of a failed build in place of its schema,
+                                  instead of raising the first one (as with asyncio.gather).
+
+    Returns:
+        list[str | BaseException]: The rendered schema (or exception) of each input.
+
+    """
+    run = _bounded(limit, executor)
+    jobs = [partial(render_schema, i, json_input, cache, options) for i in inputs]
+    results = await asyncio.gather(*(run(job) for job in jobs), return_exceptions=return_exceptions)
+    return [r if isinstance(r, BaseException) else r[0] for r in results]
+
+
+async def avalidate_files(
+    validator: Validator,
+    paths: Iterable[str | Path],
+    *,
+    limit: int | None = None,
+    executor: Executor | None = None,
+) -> list[ValidationResult]:
+    """
+    Validates many YAML/JSON files concurrently, in the same order as the paths.
+
+    Files that cannot be read or parsed are reported in their result rather than raised, as with
+    Validator.validate_file. A thread pool is required, as the validator is not sent to other processes.
+
+    Args:
+        validator (Validator): The compiled schema to validate against.
+        paths (Iterable[str | Path]): The files to validate.
+        limit (int | None): Maximum number of files in flight at once, defaults to the number of CPUs.
+        executor (Executor | None): The executor to run in, defaults to the event loop's default executor.
+
+    Returns:
+        list[ValidationResult]: The outcome of validating each file.
+
+    """
+    run = _bounded(limit, executor)
+    return list(await asyncio.gather(*(run(partial(validator.validate_file, p)) for p in paths)))
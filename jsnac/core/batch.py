@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+JSNAC Batch Builder
+
+This module builds JSON schemas for many JSNAC definition files at once. Inputs can be given as
+files, directories or glob patterns (optionally listed in a manifest file), and the schemas are
+built across a pool of worker processes so the interpreter and PyYAML start-up cost is only paid
+once per worker rather than once per file.
+
+Classes:
+    BuildOptions:
+        Options controlling how each definition file is built.
+    BuildResult:
+        The outcome of building a single definition file (timings and any error).
+
+Functions:
+    collect_inputs(patterns: list[str], manifest: str | None = None) -> list[Path]:
+        Expands files, directories, glob patterns and manifest entries into a list of input files.
+    output_path_for(input_path: Path, output_dir: Path | None = None, base: Path | None = None) -> Path:
+        Returns the path a schema should be written to for a given input file.
+    common_base(inputs: list[Path]) -> Path | None:
+        Returns the deepest directory containing all of the given input files.
+    render_schema(input_path: Path | list[Path], json_input=False, cache=None, options=None, builder=None) -> tuple:
+        Returns the rendered schema for a definition file (or merged files), using the cache if one is given.
+    stream_schema(input_path: Path | list[Path], output_path: Path, json_input=False, options=None, builder=None):
+        Builds the schema for a definition file (or merged files), streaming it to the output file.
+    build_file(input_path: Path, output_path: Path, json_input: bool = False, cache=None, options=None, builder=None):
+        Builds and writes the schema for a single definition file.
+    build_many(jobs: list[tuple[Path, Path]], workers: int | None = None, json_input=False, cache=None, options=None):
+        Builds and writes the schemas for many definition files using a process pool.
+"""
+
+import concurrent.futures
+import glob
+import os
+import time
+from dataclasses import dataclass, fields
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.cache import SchemaCache
+from jsnac.core.kinds import KindRegistry
+from jsnac.core.load import choices_files
+from jsnac.core.trace import TraceEvent, Tracer
+
+# File suffixes picked up when a directory is passed as an input
+DEFINITION_SUFFIXES = (".yml", ".yaml", ".json")
+# Suffix used for generated schemas, these are never treated as inputs
+SCHEMA_SUFFIX = ".schema.json"
+
+
+@dataclass(frozen=True)
+class BuildOptions:
+    """
+    Options controlling how each definition file is built.
+
+    Every option is included in the build cache key, so changing one rebuilds the schemas. The options
+    are picklable, so a KindRegistry is loaded once and shared with every worker process.
+
+    Attributes:
+        prune_defs (bool): Only emit the $defs entries referenced by each schema.
+        indent (int | None): Number of spaces to indent each schema by, None for compact output.
+        sort_keys (bool): Sort the keys of every object in each schema.
+        serializer (str): Name of the serializer to write each schema with (json, orjson or auto).
+        yaml_loader (str): Name of the YAML loader to parse each definition with (auto, c or python).
+        kinds (KindRegistry | None): Custom kinds shared by every definition.
+        dedupe (bool): Share the object and array subschemas repeated within each schema through $defs.
+        stream (bool): Stream each schema to its output file as it is built (see SchemaBuilder.write_schema),
+                       so large schemas are never held in memory. Streamed schemas are always written
+                       with the standard library json formatting, and skip the build cache.
+
+    Methods:
+        builder(incremental: bool = False, tracer: Tracer | None = None) -> SchemaBuilder:
+            Returns a new SchemaBuilder configured with these options.
+        cache_options() -> dict[str, Any]:
+            Returns the options as a JSON serializable dictionary, for build cache keys.
+
+    """
+
+    prune_defs: bool = False
+    indent: int | None = 4
+    sort_keys: bool = False
+    serializer: str = "json"
+    yaml_loader: str = "auto"
+    kinds: KindRegistry | None = None
+    dedupe: bool = False
+    stream: bool = False
+
+    def builder(self, *, incremental: bool = False, tracer: Tracer | None = None) -> SchemaBuilder:
+        """
+        Returns a new SchemaBuilder configured with these options.
+
+        Args:
+            incremental (bool): Reuse unchanged subschemas between builds, see SchemaBuilder.
+            tracer (Tracer | None): Called with the timing of each build phase, see jsnac.core.trace.
+
+        Returns:
+            SchemaBuilder: The schema builder.
+
+        """
+        return SchemaBuilder(
+            prune_defs=self.prune_defs,
+            serializer=self.serializer,
+            incremental=incremental,
+            tracer=tracer,
+            yaml_loader=self.yaml_loader,
+            kinds=self.kinds,
+            dedupe=self.dedupe,
+        )
+
+    def cache_options(self) -> dict[str, Any]:
+        """
+        Returns the options as a JSON serializable dictionary, for build cache keys.
+
+        The kinds are represented by their fingerprint, so a changed kinds library rebuilds every schema.
+
+        Returns:
+            dict[str, Any]: The options.
+
+        """
+        options = {f.name: getattr(self, f.name) for f in fields(self)}
+        if self.kinds is not None:
+            options["kinds"] = self.kinds.fingerprint
+        return options
+
+
+@dataclass(frozen=True)
+class BuildResult:
+    """
+    The outcome of building a single JSNAC definition file.
+
+    Attributes:
+        input_path (Path): The definition file that was built.
+        output_path (Path): The file the schema was (or would have been) written to.
+        seconds (float): Wall time taken to read, build and write the schema.
+        error (str | None): The error message if the build failed, otherwise None.
+        cached (bool): True if the schema was served from the build cache.
+
+    """
+
+    input_path: Path
+    output_path: Path
+    seconds: float
+    error: str | None = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """True if the schema was built and written successfully."""
+        return self.error is None
+
+
+def _is_definition(path: Path) -> bool:
+    return path.suffix in DEFINITION_SUFFIXES and not path.name.endswith(SCHEMA_SUFFIX)
+
+
+def _expand(pattern: str, root: Path | None = None) -> list[Path]:
+    path = Path(pattern)
+    if root is not None and not path.is_absolute():
+        path = root / path
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*") if p.is_file() and _is_definition(p))
+    if glob.has_magic(str(path)):
+        matches = glob.glob(str(path), recursive=True)  # noqa: PTH207
+        return sorted(Path(p) for p in matches if _is_definition(Path(p)))
+    # Plain file paths are passed through as is, missing files are reported by the build
+    return [path]
+
+
+def collect_inputs(patterns: list[str], manifest: str | None = None) -> list[Path]:
+    """
+    Expands files, directories, glob patterns and manifest entries into a list of input files.
+
+    Directories are searched recursively for definition files (.yml, .yaml and .json), skipping
+    any previously generated *.schema.json files. Manifest files contain one file, directory or
+    glob pattern per line, relative to the manifest itself. Blank lines and lines starting with
+    '#' are ignored.
+
+    Args:
+        patterns (list[str]): Files, directories or glob patterns to build.
+        manifest (str | None): Path to a manifest file listing additional inputs.
+
+    Returns:
+        list[Path]: The de-duplicated list of input files, in the order they were found.
+
+    """
+    inputs: list[Path] = []
+    for pattern in patterns:
+        inputs.extend(_expand(pattern))
+    if manifest:
+        manifest_file = Path(manifest)
+        with manifest_file.open(encoding="utf-8") as f:
+            for line in f:
+                entry = line.strip()
+                if entry and not entry.startswith("#"):
+                    inputs.extend(_expand(entry, manifest_file.parent))
+    return list(dict.fromkeys(inputs))
+
+
+def output_path_for(input_path: Path, output_dir: Path | None = None, base: Path | None = None) -> Path:
+    """
+    Returns the path a schema should be written to for a given input file.
+
+    The schema is named after the input file with a .schema.json suffix. If no output directory
+    is given the schema is written next to the input file, otherwise the directory layout of the
+    inputs (relative to base) is mirrored under the output directory. Inputs only differing by their
+    suffix (e.g. foo.yml and foo.json) therefore share an output path, which build_many rejects.
+
+    Args:
+        input_path (Path): The definition file being built.
+        output_dir (Path | None): Directory to mirror the outputs under.
+        base (Path | None): Common parent of all inputs, used to mirror the directory layout.
+
+    Returns:
+        Path: The path to write the schema to.
+
+    """
+    name = input_path.with_suffix("").name + SCHEMA_SUFFIX
+    if output_dir is None:
+        return input_path.with_name(name)
+    if base is not None and input_path.resolve().is_relative_to(base):
+        return output_dir / input_path.resolve().relative_to(base).with_name(name)
+    return output_dir / name
+
+
+def common_base(inputs: list[Path]) -> Path | None:
+    """
+    Returns the deepest directory containing all of the given input files.
+
+    Args:
+        inputs (list[Path]): The input files.
+
+    Returns:
+        Path | None: The common parent directory, or None if there is none (e.g. mixed drives).
+
+    """
+    if not inputs:
+        return None
+    try:
+        return Path(os.path.commonpath([p.resolve().parent for p in inputs]))
+    except ValueError:
+        return None
+
+
+def render_schema(
+    input_path: Path | list[Path],
+    json_input: bool = False,  # noqa: FBT001, FBT002
+    cache: SchemaCache | None = None,
+    options: BuildOptions | None = None,
+    *,
+    builder: SchemaBuilder | None = None,
+) -> tuple[str, bool]:
+    """
+    Returns the rendered schema for a definition file, using the cache if one is given.
+
+    Several definition files can be given, which are merged in order into a single definition (see
+    jsnac.core.load.merge_definitions), e.g. a shared js_kinds library followed by a schema.
+    Definitions using a choices_file are parsed before the cache is checked, so the contents of the
+    choices files can be added to the cache key.
+
+    Args:
+        input_path (Path | list[Path]): The definition file to build, or the definition files to merge.
+        json_input (bool): Treat the input as JSON. Otherwise only .json files are parsed as JSON.
+        cache (SchemaCache | None): Cache to look the schema up in and store it to.
+        options (BuildOptions | None): Options controlling how the schema is built.
+        builder (SchemaBuilder | None): Builder to reuse (e.g. an incremental one kept between
+                                        rebuilds of the same file), created from the options if None.
+
+    Returns:
+        tuple[str, bool]: The rendered schema and whether it was served from the cache.
+
+    """
+    options = options or BuildOptions()
+    jsnac = builder or options.builder()
+    paths, data, is_json = _read_inputs(jsnac, input_path, json_input)
+    key = None
+    added = False
+    if cache is not None:
+        key_data: list[bytes] | None = data
+        # Choices files can change without the definition changing, so the files a definition actually uses
+        # (only known once it is parsed) are part of the key too. Most definitions do not mention any.
+        if any(b"choices_file" in d for d in data):
+            _add_inputs(jsnac, paths, data, is_json)
+            added = True
+            key_data = _with_choices_files(data, choices_files(jsnac.data))
+        if key_data is not None:
+            key = _cache_key(cache, key_data, is_json, options)
+            schema = cache.get(key)
+            if schema is not None:
+                return schema, True
+    if not added:
+        _add_inputs(jsnac, paths, data, is_json)
+    schema = jsnac.build_schema(indent=options.indent, sort_keys=options.sort_keys)
+    if cache is not None and key is not None:
+        cache.put(key, schema)
+    return schema, False
+
+
+def stream_schema(
+    input_path: Path | list[Path],
+    output_path: Path,
+    json_input: bool = False,  # noqa: FBT001, FBT002
+    options: BuildOptions | None = None,
+    *,
+    builder: SchemaBuilder | None = None,
+) -> None:
+    """
+    Builds the schema for a definition file (or merged files), streaming it to the output file.
+
+    The schema is built as it is written (see SchemaBuilder.write_schema), so peak memory does not
+    grow with the size of the schema. It is written to a temporary file next to the output first,
+    which then replaces the output, so a failed build never leaves a partly written schema behind.
+
+    Args:
+        input_path (Path | list[Path]): The definition file to build, or the definition files to merge.
+        output_path (Path): The file to write the schema to.
+        json_input (bool): Treat the input as JSON. Otherwise only .json files are parsed as JSON.
+        options (BuildOptions | None): Options controlling how the schema is built.
+        builder (SchemaBuilder | None): Builder to reuse, created from the options if None.
+
+    """
+    options = options or BuildOptions()
+    jsnac = builder or options.builder()
+    paths, data, is_json = _read_inputs(jsnac, input_path, json_input)
+    _add_inputs(jsnac, paths, data, is_json)
+    # Drop the raw input as soon as it is parsed, it is not needed while the schema is written
+    del data
+    tmp = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            jsnac.write_schema(f, indent=options.indent, sort_keys=options.sort_keys)
+        tmp.replace(output_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _read_inputs(
+    jsnac: SchemaBuilder,
+    input_path: Path | list[Path],
+    json_input: bool,  # noqa: FBT001
+) -> tuple[list[Path], list[bytes], list[bool]]:
+    # Returns each definition file, its raw contents, and whether it is parsed as JSON
+    paths = [input_path] if isinstance(input_path, Path) else list(input_path)
+    is_json = [json_input or p.suffix == ".json" for p in paths]
+    tic = time.perf_counter()
+    data = [p.read_bytes() for p in paths]
+    if jsnac.tracer:
+        jsnac.tracer(TraceEvent("read", time.perf_counter() - tic, {"bytes": sum(len(d) for d in data)}))
+    return paths, data, is_json
+
+
+def _add_inputs(jsnac: SchemaBuilder, paths: list[Path], data: list[bytes], is_json: list[bool]) -> None:
+    # Both parsers accept the raw bytes, which saves decoding a full copy of the file first
+    for i, (path, file_data, file_is_json) in enumerate(zip(paths, data, is_json, strict=True)):
+        if file_is_json:
+            jsnac.add_json(file_data, merge=i > 0, base_dir=path.parent)
+        else:
+            jsnac.add_yaml(file_data, merge=i > 0, base_dir=path.parent)
+
+
+def _with_choices_files(data: list[bytes], files: list[str]) -> list[bytes] | None:
+    # The definition files followed by each choices file's path and contents, None if one cannot be read
+    try:
+        return [*data, *(f.encode() + b"\0" + Path(f).read_bytes() for f in files)]
+    except OSError:
+        # The build reports the missing file, and a schema with an error in it is not worth caching
+        return None
+
+
+def _cache_key(cache: SchemaCache, data: list[bytes], is_json: list[bool], options: BuildOptions) -> str:
+    # The cache key of a definition file, or of several files (definitions and choices files) together
+    if len(data) == 1:
+        return cache.key(data[0], {"json": is_json[0], **options.cache_options()})
+    # Prefix each file with its length, so moving content between files changes the key
+    combined = b"".join(len(d).to_bytes(8, "big") + d for d in data)
+    return cache.key(combined, {"json": is_json, **options.cache_options()})
+
+
+def build_file(  # noqa: PLR0913
+    input_path: Path,
+    output_path: Path,
+    json_input: bool = False,  # noqa: FBT001, FBT002
+    cache: SchemaCache | None = None,
+    options: BuildOptions | None = None,
+    *,
+    builder: SchemaBuilder | None = None,
+) -> BuildResult:
+    """
+    Builds and writes the schema for a single definition file.
+
+    Errors are captured in the returned result rather than raised, so a single bad file does not
+    abort the rest of a batch. With the stream option set, the schema is streamed to the output
+    file (see stream_schema) and the cache is not used.
+
+    Args:
+        input_path (Path): The definition file to build.
+        output_path (Path): The file to write the schema to.
+        json_input (bool): Treat every input as JSON. Otherwise only .json files are parsed as JSON.
+        cache (SchemaCache | None): Cache to skip the build for unchanged definition files.
+        options (BuildOptions | None): Options controlling how the schema is built.
+        builder (SchemaBuilder | None): Builder to reuse, see render_schema.
+
+    Returns:
+        BuildResult: The outcome of the build.
+
+    """
+    tic = time.perf_counter()
+    try:
+        cached = _write_schema(input_path, output_path, json_input, cache, options, builder)
+    except Exception as e:  # noqa: BLE001
+        return BuildResult(input_path, output_path, time.perf_counter() - tic, f"{type(e).__name__}: {e}")
+    return BuildResult(input_path, output_path, time.perf_counter() - tic, cached=cached)
+
+
+def _write_schema(  # noqa: PLR0913, PLR0917
+    input_path: Path,
+    output_path: Path,
+    json_input: bool,  # noqa: FBT001
+    cache: SchemaCache | None,
+    options: BuildOptions | None,
+    builder: SchemaBuilder | None,
+) -> bool:
+    # Builds and writes the schema for build_file, returning whether it was served from the cache
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if options is not None and options.stream:
+        stream_schema(input_path, output_path, json_input, options, builder=builder)
+        return False
+    schema, cached = render_schema(input_path, json_input, cache, options, builder=builder)
+    output_path.write_text(schema, encoding="utf-8")
+    return cached
+
+
+def _check_outputs(jobs: list[tuple[Path, Path]]) -> None:
+    # Definitions only differing by suffix (e.g. foo.yml and foo.json) share a schema name, and would
+    # silently overwrite each other's schema (or race on it across workers)
+    owners: dict[Path, Path] = {}
+    for input_path, output_path in jobs:
+        owner = owners.setdefault(output_path.resolve(), input_path)
+        if owner != input_path:
+            msg = f"Inputs {owner} and {input_path} would both be written to {output_path}, rename one of them"
+            raise ValueError(msg)
+
+
+def build_many(
+    jobs: list[tuple[Path, Path]],
+    workers: int | None = None,
+    json_input: bool = False,  # noqa: FBT001, FBT002
+    cache: SchemaCache | None = None,
+    options: BuildOptions | None = None,
+) -> list[BuildResult]:
+    """
+    Builds and writes the schemas for many definition files using a process pool.
+
+    Args:
+        jobs (list[tuple[Path, Path]]): (input_path, output_path) pairs to build.
+        workers (int | None): Number of worker processes. Defaults to the number of CPUs.
+                              A value of 1 builds everything in the current process.
+        json_input (bool): Treat every input as JSON.
+        cache (SchemaCache | None): Cache to skip the build for unchanged definition files.
+        options (BuildOptions | None): Options controlling how each schema is built.
+
+    Returns:
+        list[BuildResult]: One result per job, in the same order as the jobs.
+
+    Raises:
+        ValueError: If several jobs would write to the same output path.
+
+    """  # noqa: DOC502
+    _check_outputs(jobs)
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+    if workers == 1:
+        return [build_file(i, o, json_input, cache, options) for i, o in jobs]
+    inputs, outputs = zip(*jobs, strict=True)
+    # Hand the workers a few files at a time to keep the inter-process overhead down
+    chunksize = max(1, len(jobs) // (workers * 4))
+    # concurrent.futures only imports multiprocessing once ProcessPoolExecutor is used, keeping single builds fast
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        build = partial(build_file, json_input=json_input, cache=cache, options=options)
+        results = list(executor.map(build, inputs, outputs, chunksize=chunksize))
+    # Each worker only knows about its own writes, so re-check the cache size once they are all done
+    if cache is not None:
+        cache.evict()
+    return results
@@ -1,10 +1,120 @@
 #!/usr/bin/env python3
 
+import hashlib
 import json
 import logging
-from typing import Any, ClassVar
+import marshal
+import os
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import IO, Any
 
-import yaml
+from jsnac.core.dedupe import dedupe_subschemas
+from jsnac.core.kinds import BUILTIN_KIND_NAMES, KindRegistry, builtin_definitions, custom_definition
+from jsnac.core.load import (
+    check_yaml_loader,
+    get_yaml_loader,
+    load_choices,
+    merge_definitions,
+    resolve_choices_files,
+    stringify_keys,
+)
+from jsnac.core.serialize import Serializer, get_serializer
+from jsnac.core.trace import TraceEvent, Tracer
+
+# Marks the stack entry that records a subschema once all of its children have been built
+_MEMO_DONE: list = []
+# Marks the end of an object or array's items when streaming a schema
+_END = object()
+# Number of characters write_schema buffers before each write to the file object
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Added once, rather than per SchemaBuilder, so creating many builders does not pile up handlers
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+# A remembered subschema and the names of the $defs entries it references
+MemoEntry = tuple[dict, frozenset[str]]
+
+
+def _count_nodes(properties: Any) -> tuple[int, int]:  # noqa: ANN401
+    # Returns the number of objects and arrays, and the number of $ref keywords, in the built properties
+    nodes = refs = 0
+    stack = [properties]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            nodes += 1
+            refs += "$ref" in node
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            nodes += 1
+            stack.extend(node)
+    return nodes, refs
+
+
+def _size(data: str | bytes | IO) -> dict[str, int]:
+    # The size of the parsed input for trace events, unknown for streams
+    if isinstance(data, str):
+        return {"characters": len(data)}
+    if isinstance(data, bytes):
+        return {"bytes": len(data)}
+    return {}
+
+
+@dataclass(frozen=True, slots=True)
+class _Pending:
+    """An input object or array that is only built when a streamed schema reaches it."""
+
+    title: str
+    node: dict | list
+
+
+def _file_signature(path: str) -> tuple[int, int] | None:
+    # The modification time and size of a file, to tell whether it changed between builds
+    try:
+        stat = os.stat(path)  # noqa: PTH116
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _json_key(key: Any) -> str:  # noqa: ANN401
+    # Non-string keys (e.g. YAML integers) are converted the same way json.dumps converts them
+    return json.dumps(key if isinstance(key, str) else json.dumps(key))
+
+
+@dataclass
+class _BuildContext:
+    """
+    The state of a single build, so concurrent builds (even of the same SchemaBuilder) never share it.
+
+    Attributes:
+        debug (bool): Whether debug logging is enabled, checked once per build rather than once per node.
+        incremental (bool): Whether the subschemas built are remembered for the next build.
+        memo (dict[bytes, MemoEntry]): Subschemas remembered by the previous incremental build.
+        user_kinds (frozenset[str]): Names of the valid custom kinds (from the registry and the definition).
+        refs (set[str]): Names of the $defs entries referenced by the subschema being built.
+        next_memo (dict[bytes, MemoEntry]): Subschemas built by this build, to remember for the next one.
+        reused (int): Number of subschemas reused from the previous build.
+        choices (dict[str, list]): The choices loaded from each choices_file, so each file is loaded once per build.
+        choice_files (dict[str, tuple[int, int] | None]): The signature of each choices_file when it was loaded.
+
+    """
+
+    debug: bool
+    incremental: bool = False
+    memo: dict[bytes, MemoEntry] = field(default_factory=dict)
+    user_kinds: frozenset[str] = frozenset()
+    refs: set[str] = field(default_factory=set)
+    next_memo: dict[bytes, MemoEntry] = field(default_factory=dict)
+    reused: int = 0
+    choices: dict[str, list] = field(default_factory=dict)
+    choice_files: dict[str, tuple[int, int] | None] = field(default_factory=dict)
 
 
 class SchemaBuilder:
@@ -12,101 +122,372 @@ class SchemaBuilder:
     SchemaBuilder is a class designed to build JSON schemas from JSON or YAML data.
     It supports predefined types and allows for user-defined kinds.
 
-    Variables:
-        user_defined_kinds (dict): A class variable to store user-defined kinds.
+    Thread safety:
+        A SchemaBuilder holds no class level state, and everything a build works on is kept in a
+        context local to that build. Separate builders can be used from any number of threads
+        at once, and so can a single builder: each build works on the data that was added when it
+        started, so data added (or merged) by another thread during a build is only used by later
+        builds. Incremental builders share remembered subschemas between builds, which is why the
+        returned schemas must be treated as read-only. The options set when the builder was created
+        (prune_defs, serializer, etc.) should not be changed while it is in use.
 
     Methods:
-        __init__():
-            Initializes the instance of the class, setting up a logger.
-        _view_user_defined_kinds() -> dict:
-            Class method to view any user-defined kinds.
-        _add_user_defined_kinds(kinds: dict) -> None:
-            Class method to add a user-defined kind.
-        add_json(json_data: str) -> None:
+        __init__(prune_defs=False, serializer="json", incremental=False, tracer=None, yaml_loader="auto", kinds=None,
+                 dedupe=False):
+            Initializes the instance of the class, setting up a logger and the build options.
+        _trace(phase: str, tic: float, **detail: Any) -> None:
+            Reports a build phase to the tracer. Only called when a tracer is set.
+        add_json(json_data: str | bytes | IO, merge: bool = False, base_dir: str | Path | None = None) -> None:
             Parses the provided JSON data and stores it in the instance.
-        add_yaml(yaml_data: str) -> None:
-            Parses the provided YAML data, converts it to JSON format, and stores it in the instance.
-        build_schema() -> str:
+        add_yaml(yaml_data: str | bytes | IO, merge: bool = False, base_dir: str | Path | None = None) -> None:
+            Parses the provided YAML data (one or more documents) and stores it in the instance.
+        add_file(path: str | Path, json_input: bool | None = None, merge: bool = False) -> None:
+            Parses a YAML or JSON definition file, streaming it from disk, and stores it in the instance.
+        aadd_file(path: str | Path, json_input: bool | None = None, merge: bool = False, executor=None) -> None:
+            Async version of add_file, reading and parsing the file in an executor.
+        _resolve(documents: list, raw: str | bytes | IO, base_dir: str | Path | None) -> list:
+            Makes the relative choices_file paths of parsed documents relative to base_dir.
+        _store(documents: list, merge: bool) -> None:
+            Stores parsed definition documents, merging them together and into any existing data.
+        build_schema(indent: int | None = 4, sort_keys: bool = False) -> str:
             The main function of this class, returns a JSON schema based on the data added to the schema builder.
-        _build_definitions(data: dict) -> dict:
+        build_schema_dict() -> dict:
+            Returns the JSON schema as a dictionary, without serializing it.
+        abuild(indent: int | None = 4, sort_keys: bool = False, executor=None) -> str:
+            Async version of build_schema, building and serializing the schema in an executor.
+        iter_schema(indent: int | None = 4, sort_keys: bool = False) -> Iterator[str]:
+            Returns an iterator of the JSON schema in chunks, building each part of it as it is serialized.
+        write_schema(f: IO[str], indent: int | None = 4, sort_keys: bool = False, chunk_size=STREAM_CHUNK_SIZE) -> int:
+            Streams the JSON schema to a file object, without holding the whole schema in memory.
+        _data() -> Any:
+            Returns the data added to the schema builder, raising a ValueError if there is none.
+        _schema(data: dict, definitions: dict, properties: Any) -> dict:
+            Returns the schema document for the built definitions and properties.
+        _build_definitions(data: dict, ctx: _BuildContext) -> dict:
             Builds a dictionary of definitions based on predefined types and any additional js_kinds provided.
-        _build_properties(title: str, data: dict) -> dict:
+        _build_properties(title: str, data: dict, ctx: _BuildContext) -> dict:
             Builds properties for the schema based on the provided data.
-        _build_kinds(title: str, data: dict) -> dict:
+        _build_object(data: dict, stack: list[tuple], ctx: _BuildContext) -> dict:
+            Builds an object or array schema, pushing its nested objects and arrays onto the stack.
+        _remember(ctx: _BuildContext, outer_refs: set[str], key: bytes, properties: dict) -> None:
+            Records a subschema for incremental builds, once all of its children have been built.
+        _fingerprint(data: dict) -> bytes | None:
+            Returns a hash of a subschema's input, used to remember it between incremental builds.
+        _build_kinds(title: str, data: dict, ctx: _BuildContext) -> dict:
             Builds js_kinds for the schema based on the provided data.
+        _build_choice(kind: dict, data: dict, ctx: _BuildContext) -> None:
+            Adds the choices of a choice js_kind to its schema, from its choices or choices_file.
+        _referenced_kinds(data: Any, ctx: _BuildContext) -> set[str]:
+            Returns the names of the $defs entries the "schema" section references, without building it.
+        _expand(pending: _Pending, ctx: _BuildContext) -> tuple[Any, bool]:
+            Builds a single level of a streamed schema's properties.
+        _stream(schema: dict, ctx: _BuildContext, indent: int | None, sort_keys: bool) -> Iterator[str]:
+            Serializes a schema whose properties are built as they are reached.
 
     """
 
-    user_defined_kinds: ClassVar[dict] = {}
-
-    def __init__(self) -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        prune_defs: bool = False,
+        serializer: Serializer | str = "json",
+        incremental: bool = False,
+        tracer: Tracer | None = None,
+        yaml_loader: str | type = "auto",
+        kinds: KindRegistry | None = None,
+        dedupe: bool = False,
+    ) -> None:
         """
         Initializes the instance of the class.
 
         This constructor sets up a logger for the class instance using the module's
-        name. It also adds a NullHandler to the logger to prevent any logging
-        errors if no other handlers are configured.
+        name (which has a NullHandler, to prevent any logging errors if no other
+        handlers are configured).
+
+        Args:
+            prune_defs (bool): Only emit the $defs entries that are referenced by the
+                               "schema" section, instead of every predefined and custom kind.
+            serializer (Serializer | str): The function used by build_schema to serialize the
+                                           schema, or the name of a built-in one ("json", "orjson"
+                                           or "auto"). See jsnac.core.serialize.
+            incremental (bool): Remember every object and array subschema built, keyed by a hash of
+                                its input, and reuse it on the next build if that part of the
+                                definition is unchanged. Useful when the same builder is used to
+                                rebuild a large definition after small edits.
+            tracer (Tracer | None): Called with a TraceEvent timing each phase of a build (parse,
+                                    definitions, properties, serialize). See jsnac.core.trace.
+            yaml_loader (str | type): The PyYAML loader class used by add_yaml, or the name of one
+                                      ("auto", "c" or "python"). "auto" uses the libyaml based
+                                      CSafeLoader when available. See jsnac.core.load.
+            kinds (KindRegistry | None): Custom kinds shared by every build, e.g. an organisation
+                                         wide kinds library loaded once with KindRegistry.from_file.
+                                         The "js_kinds" section of a definition takes precedence.
+            dedupe (bool): Hoist object and array subschemas repeated across the schema into shared
+                           $defs entries, replaced by a $ref. See jsnac.core.dedupe.
 
         Attributes:
             log (logging.Logger): Logger instance for the class.
+            prune_defs (bool): Whether unreferenced $defs entries are removed from the schema.
+            serializer (Serializer): The function used to serialize the schema.
+            incremental (bool): Whether subschemas are reused between builds.
+            tracer (Tracer | None): The tracer build phases are reported to, if any.
+            yaml_loader (type): The PyYAML loader class used to parse YAML data (PyYAML is only
+                                imported when this is first used).
+            kinds (KindRegistry | None): The shared custom kinds, if any.
+            dedupe (bool): Whether repeated subschemas are shared through $defs.
 
         """
         self.log = logging.getLogger(__name__)
-        self.log.addHandler(logging.NullHandler())
+        self.prune_defs = prune_defs
+        self.serializer = get_serializer(serializer) if isinstance(serializer, str) else serializer
+        self.incremental = incremental
+        self.tracer = tracer
+        # Only the name is checked here, PyYAML is imported the first time YAML is parsed
+        self._yaml_loader = check_yaml_loader(yaml_loader) if isinstance(yaml_loader, str) else yaml_loader
+        self.kinds = kinds
+        self.dedupe = dedupe
+        # Guards the data and the remembered subschemas, which are shared between builds
+        self._lock = threading.Lock()
+        # Subschemas from the previous incremental build, keyed by a hash of their input, and the
+        # custom kinds and choices files they were built with
+        self._memo: dict[bytes, MemoEntry] = {}
+        self._memo_kinds: frozenset[str] = frozenset()
+        self._memo_files: dict[str, tuple[int, int] | None] = {}
+
+    @property
+    def yaml_loader(self) -> type:
+        """The PyYAML loader class used to parse YAML data, resolved (importing PyYAML) on first use."""
+        if isinstance(self._yaml_loader, str):
+            self._yaml_loader = get_yaml_loader(self._yaml_loader)
+        return self._yaml_loader
+
+    def _trace(self, phase: str, tic: float, **detail: Any) -> None:  # noqa: ANN401
+        """
+        Reports a build phase to the tracer. Only called when a tracer is set.
 
-    @classmethod
-    def _view_user_defined_kinds(cls) -> dict:
-        return cls.user_defined_kinds
+        Args:
+            phase (str): The build phase.
+            tic (float): The time.perf_counter() value when the phase started.
+            **detail (Any): Phase specific counters.
 
-    @classmethod
-    def _add_user_defined_kinds(cls, kinds: dict) -> None:
-        cls.user_defined_kinds.update(kinds)
+        """
+        if self.tracer is not None:
+            self.tracer(TraceEvent(phase, time.perf_counter() - tic, detail))
 
     # Take in JSON data and confirm it is valid JSON
-    def add_json(self, json_data: str) -> None:
+    def add_json(self, json_data: str | bytes | IO, *, merge: bool = False, base_dir: str | Path | None = None) -> None:
         """
         Parses the provided JSON data, and stores it in the instance.
 
         Args:
-            json_data (str): A string containing JSON data.
+            json_data (str | bytes | IO): A string, UTF-8 encoded bytes or a file object containing JSON data.
+            merge (bool): Merge the data into the data already added (see add_yaml), instead of replacing it.
+            base_dir (str | Path | None): Directory relative choices_file paths are relative to (see add_yaml).
 
         Raises:
             ValueError: If the provided JSON data is invalid.
 
         """
+        tic = time.perf_counter() if self.tracer else 0.0
+        # json.load reads the whole file anyway, reading it here lets _resolve check the raw data
+        json_data = json_data if isinstance(json_data, str | bytes) else json_data.read()
         try:
             load_json_data = json.loads(json_data)
-            self.log.debug("JSON content: \n%s", load_json_data)
-            self.data = load_json_data
-        except json.JSONDecodeError as e:
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
             msg = "Invalid JSON data: %s", e
             self.log.exception(msg)
             raise ValueError(msg) from e
+        self._store(self._resolve([load_json_data], json_data, base_dir), merge)
+        if self.tracer:
+            self._trace("parse", tic, format="json", **_size(json_data))
 
-    def add_yaml(self, yaml_data: str) -> None:
+    def add_yaml(self, yaml_data: str | bytes | IO, *, merge: bool = False, base_dir: str | Path | None = None) -> None:
         """
-        Parses the provided YAML data, converts it to JSON format, and stores it in the instance.
+        Parses the provided YAML data and stores it in the instance.
+
+        Bytes and binary file objects are passed to the loader as is (the encoding is detected
+        from the data), so there is no need to decode a definition into a string first.
+
+        Mapping keys that are not strings (e.g. a VLAN ID used as a property name) are converted to
+        strings, as they would be by JSON (see jsnac.core.load.stringify_keys).
+
+        The data may contain several YAML documents (separated by "---"), which are deep merged in
+        order, later documents taking precedence (see jsnac.core.load.merge_definitions). With
+        merge set, the result is also merged into the data already added, so a shared js_kinds
+        library can be added once and combined with a schema fragment without re-parsing it.
+
+        Relative choices_file paths are made relative to base_dir (e.g. the directory of the file the
+        data was read from) as the data is added, so they do not depend on the working directory of
+        the build. Without a base_dir they stay relative to the working directory.
 
         Args:
-            yaml_data (str): A string containing YAML formatted data.
+            yaml_data (str | bytes | IO): A string, bytes or a file object containing YAML formatted data.
+            merge (bool): Merge the data into the data already added, instead of replacing it.
+            base_dir (str | Path | None): Directory relative choices_file paths in the data are relative to.
 
         Raises:
-            ValueError: If the provided YAML data is invalid.
+            ValueError: If the provided YAML data is invalid, or documents that are not mappings are merged.
 
         """
+        import yaml  # noqa: PLC0415
+
+        tic = time.perf_counter() if self.tracer else 0.0
         try:
-            load_yaml_data = yaml.safe_load(yaml_data)
-            self.log.debug("YAML content: \n%s", load_yaml_data)
+            load_yaml_data = list(yaml.load_all(yaml_data, Loader=self.yaml_loader))
         except yaml.YAMLError as e:
             msg = "Invalid YAML data: %s", e
             self.log.exception(msg)
             raise ValueError(msg) from e
-        json_dump = json.dumps(load_yaml_data, indent=4)
-        json_data = json.loads(json_dump)
-        self.log.debug("JSON content: \n%s", json_dump)
-        self.data = json_data
+        self._store(self._resolve(stringify_keys(load_yaml_data), yaml_data, base_dir), merge)
+        if self.tracer:
+            self._trace("parse", tic, format="yaml", **_size(yaml_data))
+
+    def add_file(self, path: str | Path, json_input: bool | None = None, *, merge: bool = False) -> None:  # noqa: FBT001
+        """
+        Parses a YAML or JSON definition file, streaming it from disk, and stores it in the instance.
+
+        The file is opened in binary mode and handed to the parser directly, so a large YAML
+        definition is parsed as it is read rather than first being held in memory as a whole
+        string. As with add_yaml and add_json, a ValueError is raised if the data is invalid.
+        Relative choices_file paths in the file are relative to the file's directory.
+
+        Args:
+            path (str | Path): The definition file.
+            json_input (bool | None): Parse the file as JSON. If None, only .json files are parsed as JSON.
+            merge (bool): Merge the file into the data already added, instead of replacing it.
+
+        """
+        path = Path(path)
+        is_json = path.suffix == ".json" if json_input is None else json_input
+        with path.open("rb") as f:
+            if is_json:
+                self.add_json(f, merge=merge, base_dir=path.parent)
+            else:
+                self.add_yaml(f, merge=merge, base_dir=path.parent)
+
+    async def aadd_file(
+        self,
+        path: str | Path,
+        json_input: bool | None = None,  # noqa: FBT001
+        *,
+        merge: bool = False,
+        executor: Executor | None = None,
+    ) -> None:
+        """
+        Async version of add_file, reading and parsing the file in an executor.
+
+        The event loop is not blocked by the file I/O or the parse. See jsnac.core.aio for building
+        many schemas concurrently.
+
+        Args:
+            path (str | Path): The definition file.
+            json_input (bool | None): Parse the file as JSON. If None, only .json files are parsed as JSON.
+            merge (bool): Merge the file into the data already added, instead of replacing it.
+            executor (Executor | None): The executor to run in, defaults to the event loop's default executor.
+                                        A thread pool is required, as the builder is not sent to other processes.
 
-    def build_schema(self) -> str:
+        """
+        import asyncio  # noqa: PLC0415
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, partial(self.add_file, path, json_input, merge=merge))
+
+    @staticmethod
+    def _resolve(documents: list, raw: str | bytes | IO, base_dir: str | Path | None) -> list:
+        """
+        Makes the relative choices_file paths of parsed documents relative to base_dir.
+
+        Most definitions have no choices_file, so the documents are only walked if the raw data
+        mentions one (or cannot be checked, e.g. a YAML file object that was parsed as it was read).
+
+        Args:
+            documents (list): The parsed documents.
+            raw (str | bytes | IO): The data the documents were parsed from.
+            base_dir (str | Path | None): Directory relative choices_file paths are relative to, None to leave them.
+
+        Returns:
+            list: The same documents.
+
+        """
+        if base_dir is None:
+            return documents
+        if isinstance(raw, str) and "choices_file" not in raw:
+            return documents
+        if isinstance(raw, bytes) and b"choices_file" not in raw:
+            return documents
+        for document in documents:
+            resolve_choices_files(document, base_dir)
+        return documents
+
+    def _store(self, documents: list, merge: bool) -> None:  # noqa: FBT001
+        """
+        Stores parsed definition documents, merging them together and into any existing data.
+        A ValueError is raised by merge_definitions if documents that are not mappings are merged.
+
+        Args:
+            documents (list): The parsed documents, in order. Empty documents are skipped when there
+                              is more than one.
+            merge (bool): Merge the documents into the data already added, instead of replacing it.
+
+        """
+        if len(documents) > 1:
+            documents = [d for d in documents if d is not None]
+        with self._lock:
+            previous = getattr(self, "data", None)
+            if merge and previous is not None:
+                documents.insert(0, previous)
+            if not documents:
+                # An empty stream, the same as a single empty document
+                documents = [None]
+            data = documents[0]
+            for document in documents[1:]:
+                data = merge_definitions(data, document)
+            self.data = data
+
+    def build_schema(self, *, indent: int | None = 4, sort_keys: bool = False) -> str:
+        """
+        Builds a JSON schema based on the data added to the schema builder and serializes
+        it with the builder's serializer. See build_schema_dict for how the schema is built.
+
+        Args:
+            indent (int | None): Number of spaces to indent the JSON output by. If None, the
+                                 schema is written in its most compact form (no whitespace).
+            sort_keys (bool): Sort the keys of every object, for deterministic diffs.
+
+        Returns:
+            str: A JSON string representing the constructed schema.
+
+        """
+        schema = self.build_schema_dict()
+        tic = time.perf_counter() if self.tracer else 0.0
+        output = self.serializer(schema, indent=indent, sort_keys=sort_keys)
+        if self.tracer:
+            self._trace("serialize", tic, characters=len(output))
+        return output
+
+    async def abuild(self, *, indent: int | None = 4, sort_keys: bool = False, executor: Executor | None = None) -> str:
+        """
+        Async version of build_schema, building and serializing the schema in an executor.
+
+        Builds are thread safe (see the class docstring), so any number of builds of the same or
+        different builders can be awaited at once without blocking the event loop.
+
+        Args:
+            indent (int | None): Number of spaces to indent the JSON output by, None for compact output.
+            sort_keys (bool): Sort the keys of every object, for deterministic diffs.
+            executor (Executor | None): The executor to run in, defaults to the event loop's default executor.
+                                        A thread pool is required, as the builder is not sent to other processes.
+
+        Returns:
+            str: A JSON string representing the constructed schema.
+
+        """
+        import asyncio  # noqa: PLC0415
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(self.build_schema, indent=indent, sort_keys=sort_keys))
+
+    def build_schema_dict(self) -> dict:
         """
         Builds a JSON schema based on the data added to the schema builder.
         This method constructs a JSON schema using the data previously added via
@@ -114,7 +495,8 @@ class SchemaBuilder:
         but can be configured to use other drafts if needed.
 
         Returns:
-            str: A JSON string representing the constructed schema.
+            dict: The constructed schema, ready to be passed to a validator or merged into
+                  another document without a serialize/parse round trip.
 
         Raises:
             ValueError: If no data has been added to the schema inferer.
@@ -126,260 +508,385 @@ class SchemaBuilder:
               of the provided data.
             - The schemas for individual and nested properties are constructed
               based on the "schema" section of the provided data.
+            - If prune_defs is set, only the definitions referenced by the "schema"
+              section are included in "$defs".
+            - If incremental is set, unchanged object and array subschemas are shared with
+              the schema returned by the previous build, so returned schemas should be
+              treated as read-only.
+            - If dedupe is set, repeated object and array subschemas are moved to "$defs"
+              (after the kinds) and referenced with "$ref".
+
+        """  # noqa: DOC502
+        data = self._data()
+        ctx = _BuildContext(debug=self.log.isEnabledFor(logging.DEBUG), incremental=self.incremental)
+        # Definitions must be built first as they collect the user-defined kinds used by the properties
+        tic = time.perf_counter() if self.tracer else 0.0
+        definitions = self._build_definitions(data.get("js_kinds", {}), ctx)
+        if self.tracer:
+            self._trace("definitions", tic, definitions=len(definitions))
+            tic = time.perf_counter()
+        if self.incremental:
+            with self._lock:
+                # Remembered subschemas may reference (or have rejected) a custom kind, or hold the choices of a
+                # choices file, skip them if the kinds or any of the files changed
+                files = self._memo_files
+                if ctx.user_kinds == self._memo_kinds and all(_file_signature(p) == s for p, s in files.items()):
+                    ctx.memo = self._memo
+        properties = self._build_properties("Default", data.get("schema", {}), ctx)
+        if self.incremental:
+            # Only keep the subschemas used by this build, so memory use follows the size of the definition
+            with self._lock:
+                self._memo = ctx.next_memo
+                self._memo_kinds = ctx.user_kinds
+                # Reused subschemas were built with the files of earlier builds, which are still checked
+                self._memo_files = {**self._memo_files, **ctx.choice_files} if ctx.memo else ctx.choice_files
+        if self.prune_defs:
+            definitions = {kind: definition for kind, definition in definitions.items() if kind in ctx.refs}
+        if self.tracer:
+            seconds = time.perf_counter() - tic
+            # Only counted when tracing, so untraced builds do not pay for the extra walk
+            nodes, refs = _count_nodes(properties)
+            detail = {"nodes": nodes, "refs": refs, "defs": len(definitions), "reused": ctx.reused}
+            self.tracer(TraceEvent("properties", seconds, detail))
+        if self.dedupe:
+            tic = time.perf_counter() if self.tracer else 0.0
+            properties, shared = dedupe_subschemas(properties, reserved=definitions)
+            definitions = {**definitions, **shared}
+            if self.tracer:
+                self._trace("dedupe", tic, shared=len(shared))
+        return self._schema(data, definitions, properties)
+
+    def iter_schema(self, *, indent: int | None = 4, sort_keys: bool = False) -> Iterator[str]:
+        """
+        Returns an iterator of the JSON schema in chunks, building each part of it as it is serialized.
+
+        The output is the same as build_schema with the standard library json serializer, but the
+        whole schema is never held in memory: each object and array of the "schema" section is
+        built when the serializer reaches it and dropped once written, so peak memory follows the
+        depth (and width) of the definition rather than the size of the schema. The $defs section
+        is built up front, and with prune_defs the "schema" section is scanned once beforehand to
+        find the referenced kinds. Streamed builds are never incremental, and report a single
+        serialize phase (covering the properties) to the tracer once the iterator is exhausted.
+        With dedupe, the repeated subschemas are only known once every property is built, so the
+        schema is built in full first (as by build_schema_dict) and only its serialization is streamed.
+
+        Args:
+            indent (int | None): Number of spaces to indent the JSON output by, None for compact output.
+            sort_keys (bool): Sort the keys of every object, for deterministic diffs.
+
+        Returns:
+            Iterator[str]: The serialized schema in chunks, to be joined or written in order.
+
+        Raises:
+            ValueError: If no data has been added to the schema builder.
+
+        """  # noqa: DOC502
+        data = self._data()
+        ctx = _BuildContext(debug=self.log.isEnabledFor(logging.DEBUG))
+        if self.dedupe:
+            return self._stream(self.build_schema_dict(), ctx, indent, sort_keys)
+        tic = time.perf_counter() if self.tracer else 0.0
+        definitions = self._build_definitions(data.get("js_kinds", {}), ctx)
+        if self.prune_defs:
+            refs = self._referenced_kinds(data.get("schema", {}), ctx)
+            definitions = {kind: definition for kind, definition in definitions.items() if kind in refs}
+        if self.tracer:
+            self._trace("definitions", tic, definitions=len(definitions))
+        properties = data.get("schema", {})
+        if isinstance(properties, (dict, list)):
+            properties = _Pending("Default", properties)
+        return self._stream(self._schema(data, definitions, properties), ctx, indent, sort_keys)
+
+    def write_schema(
+        self,
+        f: IO[str],
+        *,
+        indent: int | None = 4,
+        sort_keys: bool = False,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> int:
+        """
+        Streams the JSON schema to a file object, without holding the whole schema in memory.
+
+        The chunks of iter_schema are buffered and written roughly chunk_size characters at a time.
+
+        Args:
+            f (IO[str]): A text file object (or anything with a write method) to write the schema to.
+            indent (int | None): Number of spaces to indent the JSON output by, None for compact output.
+            sort_keys (bool): Sort the keys of every object, for deterministic diffs.
+            chunk_size (int): Number of characters to buffer before each write.
+
+        Returns:
+            int: The number of characters written.
+
+        Raises:
+            ValueError: If no data has been added to the schema builder.
+
+        """  # noqa: DOC502
+        written = buffered = 0
+        buffer: list[str] = []
+        for chunk in self.iter_schema(indent=indent, sort_keys=sort_keys):
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= chunk_size:
+                f.write("".join(buffer))
+                written += buffered
+                buffer.clear()
+                buffered = 0
+        f.write("".join(buffer))
+        return written + buffered
+
+    def _data(self) -> Any:  # noqa: ANN401
+        """
+        Returns the data added to the schema builder.
+
+        Returns:
+            Any: The data added with add_json, add_yaml or add_file.
+
+        Raises:
+            ValueError: If no data has been added to the schema builder.
 
         """
-        # Check if the data has been added
         if not hasattr(self, "data"):
             msg = "No data has been added to the schema builder. Use add_json or add_yaml to add data."
             self.log.error(msg)
             raise ValueError(msg)
-        data = self.data
+        return self.data
+
+    @staticmethod
+    def _schema(data: dict, definitions: dict, properties: Any) -> dict:  # noqa: ANN401
+        """
+        Returns the schema document for the built definitions and properties.
+
+        Args:
+            data (dict): The data added to the schema builder, for its header.
+            definitions (dict): The $defs section.
+            properties (Any): The built "schema" section (or a _Pending one, when streaming).
+
+        Returns:
+            dict: The schema.
 
-        self.log.debug("Building schema for: \n%s ", data)
+        """
         # Using draft-07 until vscode $dynamicRef support is added (https://github.com/microsoft/vscode/issues/155379)
         # Feel free to replace this with http://json-schema.org/draft/2020-12/schema if not using vscode.
-        schema = {
+        return {
             "$schema": data.get("header", {}).get("schema", "http://json-schema.org/draft-07/schema#"),
             "title": data.get("header", {}).get("title", "JSNAC created Schema"),
             "$id": data.get("header", {}).get("id", "jsnac.schema.json"),
             "description": data.get("header", {}).get("description", "https://github.com/commitconfirmed/jsnac"),
-            "$defs": self._build_definitions(data.get("js_kinds", {})),
+            "$defs": definitions,
             "type": data.get("type", "object"),
             "additionalProperties": data.get("additionalProperties", False),
-            "properties": self._build_properties("Default", data.get("schema", {})),
+            "properties": properties,
         }
-        return json.dumps(schema, indent=4)
 
-    def _build_definitions(self, data: dict) -> dict:
+    def _build_definitions(self, data: dict, ctx: _BuildContext) -> dict:
         """
         Build a dictionary of definitions based on predefined types and additional js_kinds provided in the input data.
 
+        The kinds of the builder's KindRegistry (if any) are added after the predefined types, followed
+        by the js_kinds of the input data. The names of the valid custom kinds are stored in the build
+        context, for the properties of the same build to reference.
+
         Args:
             data (dict): A dictionary containing additional js_kinds to be added to the definitions.
+            ctx (_BuildContext): The state of the current build.
 
         Returns:
             dict: A dictionary containing definitions for our predefined types such as 'ipv4', 'ipv6', etc.
-                  Additional js_kinds from the input data are also included.
+                  Additional js_kinds from the registry and the input data are also included.
 
         Raises:
             None
 
         """
-        self.log.debug("Building definitions for: \n%s ", data)
-        definitions: dict[str, dict[str, Any]] = {
-            # JSNAC defined data types, may eventually move these to a separate file
-            "ipv4": {
-                "type": "string",
-                "pattern": "^((25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])\\.){3,3}(25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])$",  # noqa: E501
-                "title": "IPv4 Address",
-                "description": "IPv4 address (String) \n Format: xxx.xxx.xxx.xxx",
-            },
-            # Decided to just go simple for now, may add more complex validation in the future from
-            # https://stackoverflow.com/questions/53497/regular-expression-that-matches-valid-ipv6-addresses
-            "ipv6": {
-                "type": "string",
-                "pattern": "^(([a-fA-F0-9]{1,4}|):){1,7}([a-fA-F0-9]{1,4}|:)$",
-                "title": "IPv6 Address",
-                "description": "Short IPv6 address (String) \nAccepts both full and short form addresses, link-local addresses, and IPv4-mapped addresses",  # noqa: E501
-            },
-            "ipv4_cidr": {
-                "type": "string",
-                "pattern": "^((25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])\\.){3,3}(25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])/(1[0-9]|[0-9]|2[0-9]|3[0-2])$",  # noqa: E501
-                "title": "IPv4 CIDR",
-                "description": "IPv4 CIDR (String) \nFormat: xxx.xxx.xxx.xxx/xx",
-            },
-            "ipv6_cidr": {
-                "type": "string",
-                "pattern": "^(([a-fA-F0-9]{1,4}|):){1,7}([a-fA-F0-9]{1,4}|:)/(32|36|40|44|48|52|56|60|64|128)$",
-                "description": "Full IPv6 CIDR (String) \nFormat: xxxx:xxxx:xxxx:xxxx:xxxx:xxxx:xxxx:xxxx/xxx",
-            },
-            "ipv4_prefix": {
-                "type": "string",
-                "pattern": "^/(1[0-9]|[0-9]|2[0-9]|3[0-2])$",
-                "description": "IPv4 Prefix (String) \nFormat: /xx between 0 and 32",
-            },
-            "ipv6_prefix": {
-                "type": "string",
-                "pattern": "^/(32|36|40|44|48|52|56|60|64|128)$",
-                "description": "IPv6 prefix (String) \nFormat: /xx between 32 and 64 in increments of 4. also /128",
-            },
-            "domain": {
-                "type": "string",
-                "pattern": "^([a-zA-Z0-9-]{1,63}\\.)+[a-zA-Z]{2,63}$",
-                "description": "Domain name (String) \nFormat: example.com",
-            },
-            "email": {
-                "type": "string",
-                "pattern": "^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}$",
-                "description": "Email address (String) \nFormat: user@domain.com",
-            },
-            "http_url": {
-                "type": "string",
-                "pattern": "^(https?://)?([\\da-z.-]+)\\.([a-z.]{2,6})([/\\w .-]*)*\\??([^#\\s]*)?(#.*)?$",
-                "description": "HTTP(s) URL (String) \nFormat: http://example.com",
-            },
-            "uint16": {
-                "type": "integer",
-                "minimum": 0,
-                "maximum": 65535,
-                "description": "16-bit Unsigned Integer \nRange: 0 to 65535",
-            },
-            "uint32": {
-                "type": "integer",
-                "minimum": 0,
-                "maximum": 4294967295,
-                "description": "32-bit Unsigned Integer \nRange: 0 to 4294967295",
-            },
-            "uint64": {
-                "type": "integer",
-                "minimum": 0,
-                "maximum": 18446744073709551615,
-                "description": "64-bit Unsigned Integer \nRange: 0 to 18446744073709551615",
-            },
-            "mtu": {
-                "type": "integer",
-                "minimum": 68,
-                "maximum": 9192,
-                "description": "Maximum Transmission Unit (MTU) \nRange: 68 to 9192",
-            },
-            "mac": {
-                "type": "string",
-                "pattern": "^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$",
-                "description": "MAC Address (String) \nFormat: xx:xx:xx:xx:xx:xx",
-            },
-            "mac_dot": {
-                "type": "string",
-                "pattern": "^([0-9A-Fa-f]{4}[.]){2}([0-9A-Fa-f]{4})$",
-                "description": "MAC Address with dots (String) \nFormat: xxxx.xxxx.xxxx",
-            },
-            "vlan": {
-                "type": "integer",
-                "minimum": 1,
-                "maximum": 4094,
-                "description": "VLAN ID (Integer) \nRange: 1 to 4094",
-            },
-            "docker_image": {
-                "type": "string",
-                "pattern": "^[a-z0-9]+(?:[._-][a-z0-9]+)*$",
-                "description": "Docker Image Name (String) \nFormat: alpine:latest",
-            },
-        }
+        definitions = builtin_definitions()
+        user_kinds: set[str] = set()
+        # The registry's kinds are already built (and any errors logged) when it was created
+        if self.kinds is not None:
+            definitions.update(self.kinds.definitions())
+            user_kinds.update(self.kinds.names)
         # Check passed data for additional js_kinds and add them to the definitions
         for kind, kind_data in data.items():
-            self.log.debug("Building custom js_kind (%s): \n%s ", kind, kind_data)
-            definitions[kind] = {}
-            definitions[kind]["title"] = kind_data.get("title", f"{kind}")
-            definitions[kind]["description"] = kind_data.get("description", f"Custom Kind: {kind}")
-            # Only support a custom kind of pattern for now, will add more in the future
-            match kind_data.get("type"):
-                case "pattern":
-                    definitions[kind]["type"] = "string"
-                    if "regex" in kind_data:
-                        definitions[kind]["pattern"] = kind_data["regex"]
-                        self._add_user_defined_kinds({kind: True})
-                    else:
-                        self.log.error("regex key is required for js_kind (%s) with type pattern", kind)
-                        definitions[kind]["type"] = "null"
-                        definitions[kind]["title"] = "Error"
-                        definitions[kind]["description"] = "No regex key provided"
-                case _:
-                    self.log.error(
-                        "Invalid type (%s) for js_kind (%s), defaulting to string", kind_data.get("type"), kind
-                    )
-                    definitions[kind]["type"] = "string"
-                    definitions[kind]["title"] = "Error"
-                    definitions[kind]["description"] = f"Invalid type ({kind_data.get('type')}), defaulted to string"
-        self.log.debug("Returned Definitions: \n%s ", data)
+            if ctx.debug:
+                self.log.debug("Building custom js_kind (%s): %s", kind, kind_data)
+            definitions[kind], error = custom_definition(kind, kind_data)
+            if error is None:
+                user_kinds.add(kind)
+            else:
+                self.log.error(error)
+                user_kinds.discard(kind)
+        ctx.user_kinds = frozenset(user_kinds)
         return definitions
 
-    def _build_properties(self, title: str, data: dict) -> dict:
+    def _build_properties(self, title: str, data: dict, ctx: _BuildContext) -> dict:
         """
-        Recursively builds properties for a given title and data dictionary.
+        Builds properties for a given title and data dictionary.
 
         Args:
             title (str): The title for the properties being built.
             data (dict): The data dictionary containing properties to be processed.
+            ctx (_BuildContext): The state of the current build.
 
         Returns:
             dict: A dictionary representing the built properties.
 
         The function processes the input data dictionary to build properties based on its structure.
         If the data contains a "js_kind" key, it delegates to the _build_kinds method.
-        If the data contains nested dictionaries or lists, it recursively processes them.
+        If the data contains nested dictionaries or lists, each of them is processed in turn.
         We also type to "object" or "array" based on the presence of "properties" or "items" keys.
 
+        The tree is walked with an explicit stack rather than recursion, so arbitrarily deep
+        definitions do not hit Python's recursion limit. Each output container is created as a copy
+        of its input (keeping the key order), and the nested containers are replaced with their
+        built versions as they are popped off the stack.
+
+        """
+        root = [data]
+        # Each entry is (parent container, key or index in the parent, title, input node)
+        stack: list[tuple] = [(root, 0, title, data)]
+        while stack:
+            frame = stack.pop()
+            if frame[0] is _MEMO_DONE:
+                self._remember(ctx, *frame[1:])
+                continue
+            parent, slot, title, node = frame
+            if ctx.debug:
+                self.log.debug("Building properties for (%s)", title)
+            if isinstance(node, list):
+                # Copy the list so scalars are kept as is, and push the nested containers in reverse so they
+                # are built in order
+                items = parent[slot] = list(node)
+                stack.extend(
+                    (items, i, title, node[i])
+                    for i in range(len(node) - 1, -1, -1)
+                    if isinstance(node[i], (dict, list))
+                )
+            elif isinstance(node, dict):
+                if "js_kind" in node:
+                    parent[slot] = self._build_kinds(title, node["js_kind"], ctx)
+                else:
+                    parent[slot] = self._build_object(node, stack, ctx)
+        return root[0]
+
+    def _build_object(self, data: dict, stack: list[tuple], ctx: _BuildContext) -> dict:
+        """
+        Builds an object or array schema, pushing its nested objects and arrays onto the stack.
+
+        Args:
+            data (dict): The data dictionary containing properties to be processed.
+            stack (list[tuple]): The _build_properties stack to push the nested containers onto.
+            ctx (_BuildContext): The state of the current build.
+
+        Returns:
+            dict: The object or array schema, whose nested containers are filled in from the stack.
+
+        """
+        key = self._fingerprint(data) if ctx.incremental and ("properties" in data or "items" in data) else None
+        if key is not None:
+            entry = ctx.next_memo.get(key) or ctx.memo.get(key)
+            if entry is not None:
+                ctx.next_memo[key] = entry
+                ctx.refs.update(entry[1])
+                ctx.reused += 1
+                return entry[0]
+        properties: dict = {}
+        # Add the type depending if our YAML has a properties or items key
+        if "properties" in data:
+            properties["type"] = "object"
+            # Check for additional properties, otherwise set to false
+            properties["additionalProperties"] = data.get("additional_properties", False)
+        if "items" in data:
+            properties["type"] = "array"
+        # Copying every key keeps the input's key order, nested containers are then replaced in place
+        properties.update(data)
+        if key is not None:
+            # Popped once every child has been built (see _remember), collecting this subschema's references alone
+            stack.append((_MEMO_DONE, ctx.refs, key, properties))
+            ctx.refs = set()
+        # Leaf js_kinds are built straight away, only nested objects and arrays go on the stack
+        children = []
+        for k, v in data.items():
+            if isinstance(v, dict) and "js_kind" in v:
+                if ctx.debug:
+                    self.log.debug("Building properties for (%s)", k)
+                properties[k] = self._build_kinds(k, v["js_kind"], ctx)
+            elif isinstance(v, (dict, list)):
+                children.append((properties, k, k, v))
+        stack.extend(reversed(children))
+        return properties
+
+    def _remember(self, ctx: _BuildContext, outer_refs: set[str], key: bytes, properties: dict) -> None:  # noqa: PLR6301
+        """
+        Records a subschema for incremental builds, once all of its children have been built.
+
+        Args:
+            ctx (_BuildContext): The state of the current build.
+            outer_refs (set[str]): The references of the enclosing subschema, restored afterwards.
+            key (bytes): The fingerprint of the subschema's input.
+            properties (dict): The built subschema.
+
+        """
+        entry = (properties, frozenset(ctx.refs))
+        ctx.refs = outer_refs
+        ctx.next_memo[key] = entry
+        ctx.refs.update(entry[1])
+
+    @staticmethod
+    def _fingerprint(data: dict) -> bytes | None:
+        """
+        Returns a hash of a subschema's input, used to remember it between incremental builds.
+
+        The hash covers every nested key, value and type in order (an object's output does not
+        depend on its title), so only the branches of the definition that changed since the last
+        build are processed again.
+
+        Args:
+            data (dict): The data dictionary of the subschema.
+
+        Returns:
+            bytes | None: The hash, or None if the input is too deeply nested to serialize.
+
         """
-        self.log.debug("Building properties for: \n%s ", data)
-        # Check if there is a nested dictionary, if so we will check all keys and valid and then depending
-        # on the key we will recursively call this function again or build our js_kinds
-        if isinstance(data, dict):
-            if "js_kind" in data:
-                return self._build_kinds(title, data["js_kind"])
-            # Else
-            properties = {}
-            # Add the type depending if our YAML has a properties or items key
-            if "properties" in data:
-                properties["type"] = "object"
-                # Check for additional properties, otherwise set to false
-                properties["additionalProperties"] = data.get("additional_properties", False)
-            if "items" in data:
-                properties["type"] = "array"
-            properties.update({k: self._build_properties(k, v) for k, v in data.items()})
-            return properties
-        if isinstance(data, list):
-            return [self._build_properties(title, item) for item in data]
-        return data
-
-    def _build_kinds(self, title: str, data: dict) -> dict:  # noqa: PLR0912
+        try:
+            # Format version 0 has no interning or back references, so equal inputs always give equal bytes
+            serialized = marshal.dumps(data, 0)
+        except ValueError:
+            # YAML timestamps and other types marshal does not support, or very deeply nested inputs
+            try:
+                serialized = repr(data).encode()
+            except RecursionError:
+                return None
+        return hashlib.blake2b(serialized, digest_size=16).digest()
+
+    def _build_kinds(self, title: str, data: dict, ctx: _BuildContext) -> dict:
         """
         Builds js_kinds for a given title and data dictionary.
 
         Args:
             title (str): The title for the js_kinds being built.
             data (dict): The data dictionary containing js_kinds to be processed.
+            ctx (_BuildContext): The state of the current build.
 
         Returns:
             dict: A dictionary representing the built js_kinds.
 
         """
-        self.log.debug("Building js_kinds for Object (%s): \n%s ", title, data)
+        if ctx.debug:
+            self.log.debug("Building js_kinds for Object (%s): %s", title, data)
         kind: dict = {}
         # Add the title passed in from the parent object
         kind["title"] = title
-        valid_js_kinds = [
-            "ipv4",
-            "ipv6",
-            "ipv4_cidr",
-            "ipv6_cidr",
-            "ipv4_prefix",
-            "ipv6_prefix",
-            "domain",
-            "email",
-            "http_url",
-            "uint16",
-            "uint32",
-            "uint64",
-            "mtu",
-            "mac",
-            "mac_dot",
-            "vlan",
-            "docker_image",
-        ]
         # Check if the kind is a valid predefined kind
-        if data.get("name") in valid_js_kinds:
+        if data.get("name") in BUILTIN_KIND_NAMES:
             kind["$ref"] = "#/$defs/{}".format(data["name"])
+            ctx.refs.add(data["name"])
         # If not, check the kind type and build the schema based on some extra custom logic
         else:
             match data.get("name"):
-                # For the choice kind, read the choices object
+                # For the choice kind, read the choices object (or file)
                 case "choice":
-                    if "choices" in data:
-                        kind["enum"] = data["choices"]
-                        kind.get("description", f"Choice of the below:\n{data['choices']}")
-                    else:
-                        self.log.error("Choice js_kind requires a choices object")
-                        kind["description"] = "Choice js_kind requires a choices object"
-                        kind["type"] = "null"
+                    self._build_choice(kind, data, ctx)
                 # Default types
                 case "string":
                     kind["type"] = "string"
@@ -397,11 +904,174 @@ class SchemaBuilder:
                     kind["type"] = "null"
                     kind["description"] = kind.get("description", "Null")
                 case _:
-                    # Check if the kind is user-defined from the user_defined_kinds class variable
-                    if data.get("name") in self._view_user_defined_kinds():
+                    # Check if the kind is one of the user-defined kinds of this build
+                    if data.get("name") in ctx.user_kinds:
                         kind["$ref"] = "#/$defs/{}".format(data["name"])
+                        ctx.refs.add(data["name"])
                     else:
                         self.log.error("Invalid js_kind (%s) detected, defaulting to Null", data)
                         kind["description"] = f"Invalid js_kind ({data}), defaulting to Null"
                         kind["type"] = "null"
         return kind
+
+    def _build_choice(self, kind: dict, data: dict, ctx: _BuildContext) -> None:
+        """
+        Adds the choices of a choice js_kind to its schema, from its choices or choices_file.
+
+        A choices file is loaded once per build however many kinds reference it, and every kind
+        shares the same list. See jsnac.core.load.load_choices for the supported file formats.
+
+        Args:
+            kind (dict): The schema of the js_kind being built.
+            data (dict): The js_kind, with a choices list or a choices_file path.
+            ctx (_BuildContext): The state of the current build.
+
+        """
+        if "choices" in data:
+            kind["enum"] = data["choices"]
+            return
+        if "choices_file" not in data:
+            self.log.error("Choice js_kind requires a choices object")
+            kind["description"] = "Choice js_kind requires a choices object"
+            kind["type"] = "null"
+            return
+        path = str(data["choices_file"])
+        choices = ctx.choices.get(path)
+        if choices is None:
+            ctx.choice_files[path] = _file_signature(path)
+            try:
+                choices = ctx.choices[path] = load_choices(path, self._yaml_loader)
+            except ValueError as e:
+                self.log.error("Choice js_kind could not load its choices_file: %s", e)  # noqa: TRY400
+                kind["description"] = f"Choice js_kind could not load its choices_file: {e}"
+                kind["type"] = "null"
+                return
+        kind["enum"] = choices
+
+    @staticmethod
+    def _referenced_kinds(data: Any, ctx: _BuildContext) -> set[str]:  # noqa: ANN401
+        """
+        Returns the names of the $defs entries the "schema" section references, without building it.
+
+        Used to prune the $defs of a streamed schema, which are written before the properties.
+        The walk follows _build_properties, so the result matches the references it collects.
+
+        Args:
+            data (Any): The "schema" section of the data.
+            ctx (_BuildContext): The state of the current build, with the valid custom kinds.
+
+        Returns:
+            set[str]: The names of the referenced built-in and custom kinds.
+
+        """
+        refs: set[str] = set()
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, dict):
+                if "js_kind" not in node:
+                    stack.extend(node.values())
+                    continue
+                name = node["js_kind"].get("name")
+                if name in BUILTIN_KIND_NAMES or name in ctx.user_kinds:
+                    refs.add(name)
+        return refs
+
+    def _expand(self, pending: _Pending, ctx: _BuildContext) -> tuple[Any, bool]:
+        """
+        Builds a single level of a streamed schema's properties.
+
+        Args:
+            pending (_Pending): The input object or array to build.
+            ctx (_BuildContext): The state of the current build.
+
+        Returns:
+            tuple[Any, bool]: The built object or array, with its nested objects and arrays left as
+                              _Pending, and whether it has any (False for a fully built js_kind).
+
+        """
+        title, node = pending.title, pending.node
+        if ctx.debug:
+            self.log.debug("Building properties for (%s)", title)
+        if isinstance(node, list):
+            return [_Pending(title, item) if isinstance(item, (dict, list)) else item for item in node], True
+        if "js_kind" in node:
+            return self._build_kinds(title, node["js_kind"], ctx), False
+        children: list[tuple] = []
+        properties = self._build_object(node, children, ctx)
+        for _, key, child_title, child in children:
+            properties[key] = _Pending(child_title, child)
+        return properties, True
+
+    def _stream(self, schema: dict, ctx: _BuildContext, indent: int | None, sort_keys: bool) -> Iterator[str]:  # noqa: FBT001, PLR0912
+        """
+        Serializes a schema whose properties are built as they are reached.
+
+        The output matches json.dumps (see jsnac.core.serialize.json_serializer). Objects and arrays are
+        walked with an explicit stack, as in _build_properties, so deep definitions do not hit Python's
+        recursion limit. Fully built values (e.g. js_kinds and the $defs entries) are serialized in
+        one piece by json.dumps, and re-indented to their depth.
+
+        Args:
+            schema (dict): The schema, whose properties may contain _Pending objects and arrays.
+            ctx (_BuildContext): The state of the current build.
+            indent (int | None): Number of spaces to indent the JSON output by, None for compact output.
+            sort_keys (bool): Sort the keys of every object.
+
+        Yields:
+            str: The serialized schema in chunks.
+
+        """
+        tic = time.perf_counter() if self.tracer else 0.0
+        key_separator = ": " if indent is not None else ":"
+        # A single encoder, as json.dumps creates a new one for every call with custom options
+        dumps = json.JSONEncoder(indent=indent, sort_keys=sort_keys, separators=(",", key_separator)).encode
+        characters = 0
+        # Each entry is [items iterator, closing bracket, whether no item has been written yet]
+        stack: list[list] = []
+        value: Any = schema
+        prefix = ""
+        while True:
+            if isinstance(value, _Pending):
+                value, nested = self._expand(value, ctx)
+            else:
+                nested = value is schema
+            if nested and value:
+                if isinstance(value, dict):
+                    items = iter(sorted(value.items()) if sort_keys else value.items())
+                    stack.append([items, "}", True])
+                    chunk = prefix + "{"
+                else:
+                    stack.append([iter(value), "]", True])
+                    chunk = prefix + "["
+            else:
+                chunk = dumps(value)
+                if indent is not None and stack:
+                    chunk = chunk.replace("\n", "\n" + " " * (indent * len(stack)))
+                chunk = prefix + chunk
+            characters += len(chunk)
+            yield chunk
+            # Close every finished object and array, until the next item to write is found
+            while stack:
+                frame = stack[-1]
+                item: Any = next(frame[0], _END)
+                newline = "\n" + " " * (indent * len(stack)) if indent is not None else ""
+                if item is not _END:
+                    break
+                stack.pop()
+                closing = (newline[: -indent or None] if indent else newline) + frame[1]
+                characters += len(closing)
+                yield closing
+            else:
+                break
+            prefix = newline if frame[2] else "," + newline
+            frame[2] = False
+            if frame[1] == "}":
+                prefix += _json_key(item[0]) + key_separator
+                value = item[1]
+            else:
+                value = item
+        if self.tracer:
+            self._trace("serialize", tic, characters=characters, streamed=1)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+JSNAC Build Cache
+
+This module provides an on-disk cache of rendered schemas, keyed by a hash of the input file
+contents, the JSNAC version and any options that affect the output. Unchanged definition files
+can then skip parsing and schema generation entirely. The cache is bounded in size, with the
+least recently used schemas evicted first.
+
+Classes:
+    SchemaCache:
+        A size-bounded, least recently used cache of rendered schemas stored in a directory.
+
+Functions:
+    default_cache_dir() -> Path:
+        Returns the default cache directory ($XDG_CACHE_HOME/jsnac or ~/.cache/jsnac).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from jsnac import __version__
+
+# Default maximum size of the cache directory in bytes
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+CACHE_SUFFIX = ".schema.json"
+
+
+def default_cache_dir() -> Path:
+    """
+    Returns the default cache directory ($XDG_CACHE_HOME/jsnac or ~/.cache/jsnac).
+
+    Returns:
+        Path: The default cache directory.
+
+    """
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg_cache_home) if xdg_cache_home else Path.home() / ".cache"
+    return base / "jsnac"
+
+
+class SchemaCache:
+    """
+    A size-bounded, least recently used cache of rendered schemas stored in a directory.
+
+    Each schema is stored in its own file named after its key. Reading a schema refreshes the
+    file's modification time, which is used to decide which schemas to evict once the total size
+    of the cache grows beyond max_size. Writes are atomic, so a cache directory can be shared by
+    several processes (e.g. batch mode workers).
+
+    Methods:
+        key(data: bytes, options: dict | None = None) -> str:
+            Returns the cache key for the given input data and build options.
+        get(key: str) -> str | None:
+            Returns the cached schema for a key, or None on a cache miss.
+        put(key: str, schema: str) -> None:
+            Stores a schema in the cache, evicting old entries if the cache is full.
+        evict() -> int:
+            Removes the least recently used schemas until the cache fits within max_size.
+
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str | Path | None): Directory to store the cache in. Defaults to default_cache_dir().
+            max_size (int): Maximum total size of the cached schemas in bytes.
+
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_size = max_size
+        # Running estimate of the cache size, only computed once something is added
+        self._size: int | None = None
+        # Guards the size estimate, as async builds store schemas from the threads of an executor
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the state to pickle, dropping the size estimate as each process keeps its own.
+
+        Returns:
+            dict: The picklable state of the cache.
+
+        """
+        return {"cache_dir": self.cache_dir, "max_size": self.max_size, "_size": None}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores a pickled cache, giving it a lock of its own as locks cannot be pickled.
+
+        Args:
+            state (dict): The state returned by __getstate__.
+
+        """
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{CACHE_SUFFIX}"
+
+    @staticmethod
+    def key(data: bytes, options: dict | None = None) -> str:
+        """
+        Returns the cache key for the given input data and build options.
+
+        Args:
+            data (bytes): The raw contents of the definition file.
+            options (dict | None): Any options that change the rendered schema.
+
+        Returns:
+            str: A hex digest identifying the rendered schema.
+
+        """
+        digest = hashlib.sha256()
+        digest.update(__version__.encode())
+        digest.update(json.dumps(options or {}, sort_keys=True).encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """
+        Returns the cached schema for a key, or None on a cache miss.
+
+        Args:
+            key (str): The cache key, as returned by key().
+
+        Returns:
+            str | None: The cached schema if present.
+
+        """
+        path = self._path(key)
+        try:
+            schema = path.read_text(encoding="utf-8")
+            # Mark the entry as recently used
+            os.utime(path)
+        except OSError:
+            return None
+        return schema
+
+    def put(self, key: str, schema: str) -> None:
+        """
+        Stores a schema in the cache, evicting old entries if the cache is full.
+
+        The schema is written to a temporary file that is then renamed over the entry, so readers
+        never see a partly written schema and concurrent writers (processes or threads) of the same
+        key do not interfere with each other.
+
+        Args:
+            key (str): The cache key, as returned by key().
+            schema (str): The rendered schema to store.
+
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        # Unique per process and thread, as async builds store schemas from the threads of an executor
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(schema, encoding="utf-8")
+            tmp.replace(path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        with self._lock:
+            if self._size is None:
+                self._size = self._usage()[1]
+            else:
+                self._size += path.stat().st_size
+            full = self._size > self.max_size
+        if full:
+            self.evict()
+
+    def _usage(self) -> tuple[list[tuple[float, int, Path]], int]:
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob(f"*{CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        return entries, total
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used schemas until the cache fits within max_size.
+
+        Returns:
+            int: The number of schemas removed.
+
+        """
+        if not self.cache_dir.is_dir():
+            return 0
+        entries, total = self._usage()
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._size = total
+        return removed
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+JSNAC Subschema Deduplication
+
+This module provides the optional pass that hoists repeated object and array subschemas of a built
+schema (e.g. the same interface or BGP neighbor shape under many devices) into shared $defs
+entries, replacing every occurrence with a $ref. The schema is smaller and quicker to parse, and
+validators compile each shared shape once.
+
+Subschemas are compared by content, in key order, so identical shapes are shared wherever they
+appear. As the output of an object does not depend on its title, shapes repeated under different
+property names are shared too. Each shared entry is named after the property it was first found
+under, with a numeric suffix if the name is already taken.
+
+Choice kinds repeating the same choices (e.g. a large list of platforms or regions used by many
+properties) share a single enum in $defs, named after the first property with a "_choices" suffix,
+and each property keeps its own title and description next to the $ref.
+
+Variables:
+    MIN_SIZE (int): Default minimum size (in compact JSON characters) of a subschema to share.
+
+Functions:
+    dedupe_subschemas(properties: Any, reserved: Iterable[str] = (), min_size: int = MIN_SIZE) -> tuple[Any, dict]:
+        Returns the properties with repeated subschemas replaced by a $ref, and the shared subschemas.
+"""
+
+import hashlib
+import json
+import re
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any
+
+# Subschemas smaller than this are left inline, as a $ref and its $defs entry would not be much smaller
+MIN_SIZE = 64
+# Characters that would need escaping in a $ref JSON pointer (or URI fragment) are replaced in names
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+# Keys of a built choice kind, whose enum can be shared
+_CHOICE_KEYS = frozenset({"title", "description", "enum"})
+
+
+def _children(node: dict | list) -> Iterable[tuple[Any, Any]]:
+    # The key (or index) and value of each item of an object or array
+    return node.items() if isinstance(node, dict) else enumerate(node)
+
+
+def _shareable(node: Any) -> bool:  # noqa: ANN401
+    # Only object and array subschemas are shared, not the property maps or item lists they contain
+    return isinstance(node, dict) and node.get("type") in {"object", "array"}
+
+
+def _choices(node: Any) -> bool:  # noqa: ANN401
+    # A choice kind (an enum with an optional title and description) shares its choices, not itself
+    return isinstance(node, dict) and isinstance(node.get("enum"), list) and node.keys() <= _CHOICE_KEYS
+
+
+def _fingerprints(properties: Any) -> dict[int, tuple[str, int]]:  # noqa: ANN401
+    """
+    Returns the fingerprint and size of every object and array in the properties, keyed by id.
+
+    The fingerprint of a container covers its items in order, with nested containers replaced by
+    their own fingerprint, so each container is serialized once however deeply it is nested.
+    Containers shared by several parents (e.g. from YAML aliases or an incremental build) are only
+    fingerprinted once.
+
+    Args:
+        properties (Any): The built properties.
+
+    Returns:
+        dict[int, tuple[str, int]]: The hex digest and compact JSON size of each container.
+
+    """
+    info: dict[int, tuple[str, int]] = {}
+    # Each entry is (container, whether its children have been fingerprinted)
+    stack: list[tuple[Any, bool]] = [(properties, False)]
+    while stack:
+        node, ready = stack.pop()
+        if not isinstance(node, (dict, list)) or id(node) in info:
+            continue
+        if not ready:
+            stack.append((node, True))
+            stack.extend((child, False) for _, child in _children(node) if isinstance(child, (dict, list)))
+            continue
+        nested = 0
+        placeholders = 0
+        shallow: dict | list = {} if isinstance(node, dict) else []
+        for key, child in _children(node):
+            if isinstance(child, (dict, list)):
+                digest, size = info[id(child)]
+                nested += size
+                placeholders += len(digest) + 2
+                child = digest  # noqa: PLW2901
+            if isinstance(shallow, dict):
+                shallow[key] = child
+            else:
+                shallow.append(child)
+        serialized = json.dumps(shallow, separators=(",", ":"), default=repr)
+        digest = hashlib.blake2b(serialized.encode(), digest_size=16).hexdigest()
+        info[id(node)] = (digest, len(serialized) - placeholders + nested)
+    return info
+
+
+def _count(properties: Any, info: dict[int, tuple[str, int]], min_size: int) -> Counter[str]:  # noqa: ANN401
+    """
+    Counts the occurrences of each subschema that could be shared, as they would appear once shared.
+
+    Choice kinds are counted by the fingerprint of their enum, so the same choices are shared
+    whatever the title of each property.
+
+    Containers that stay inline (e.g. property maps) are walked every time they occur, but a subschema
+    that could be shared is only walked the first time: a shape only repeated because its parent is
+    repeated then occurs once, as the parent is shared as a whole.
+
+    Args:
+        properties (Any): The built properties.
+        info (dict[int, tuple[str, int]]): The fingerprint and size of every container, from _fingerprints.
+        min_size (int): Minimum size of a subschema to share.
+
+    Returns:
+        Counter[str]: The number of occurrences of each fingerprint.
+
+    """
+    counts: Counter[str] = Counter()
+    stack = [properties]
+    while stack:
+        node = stack.pop()
+        for _, child in _children(node):
+            if not isinstance(child, (dict, list)):
+                continue
+            if isinstance(child, dict) and _choices(child):
+                digest, size = info[id(child["enum"])]
+                if size >= min_size:
+                    counts[digest] += 1
+                continue
+            digest, size = info[id(child)]
+            if not _shareable(child) or size < min_size:
+                stack.append(child)
+                continue
+            counts[digest] += 1
+            if counts[digest] == 1:
+                stack.append(child)
+    return counts
+
+
+def dedupe_subschemas(
+    properties: Any,  # noqa: ANN401
+    reserved: Iterable[str] = (),
+    min_size: int = MIN_SIZE,
+) -> tuple[Any, dict[str, dict]]:
+    """
+    Returns the properties with repeated subschemas replaced by a $ref, and the shared subschemas.
+
+    The properties are not modified: every container on the way is copied, so properties shared
+    with an incremental build's remembered subschemas are left as they were. Shared subschemas may
+    themselves reference other shared subschemas. The tree is walked with explicit stacks, so deep
+    definitions do not hit Python's recursion limit.
+
+    Args:
+        properties (Any): The built properties of a schema.
+        reserved (Iterable[str]): Names already used in $defs (e.g. the kinds), never given to a shared subschema.
+        min_size (int): Minimum size of a subschema to share, in compact JSON characters.
+
+    Returns:
+        tuple[Any, dict[str, dict]]: The deduplicated properties, and the shared subschemas to add
+                                     to $defs (keyed by name, in the order they were first found).
+
+    """
+    if not isinstance(properties, (dict, list)):
+        return properties, {}
+    info = _fingerprints(properties)
+    counts = _count(properties, info, min_size)
+    shared = {digest for digest, count in counts.items() if count > 1}
+    if not shared:
+        return properties, {}
+    return _rewrite(properties, info, shared, set(reserved))
+
+
+def _rewrite(
+    properties: dict | list,
+    info: dict[int, tuple[str, int]],
+    shared: set[str],
+    taken: set[str],
+) -> tuple[Any, dict[str, dict]]:
+    """
+    Copies the properties, replacing the shared subschemas with a $ref and collecting them by name.
+
+    Args:
+        properties (dict | list): The built properties.
+        info (dict[int, tuple[str, int]]): The fingerprint and size of every container, from _fingerprints.
+        shared (set[str]): The fingerprints of the subschemas to share.
+        taken (set[str]): The names already used in $defs, updated with the names given out.
+
+    Returns:
+        tuple[Any, dict[str, dict]]: The deduplicated properties and the shared subschemas.
+
+    """
+    names: dict[str, str] = {}
+    definitions: dict[str, dict] = {}
+    root: list = [None]
+    # Each entry is (parent container, key or index in the parent, container, name hint, whether it is a $defs entry)
+    stack: list[tuple] = [(root, 0, properties, "root", True)]
+    while stack:
+        parent, slot, node, hint, definition = stack.pop()
+        digest = info[id(node)][0]
+        if not definition and _choices(node) and info[id(node["enum"])][0] in shared:
+            parent[slot] = _choice_ref(node, info[id(node["enum"])][0], hint, names, definitions, taken)
+            continue
+        if not definition and digest in shared and _shareable(node):
+            name = names.get(digest)
+            if name is None:
+                name = names[digest] = _unique_name(hint, taken)
+                definitions[name] = {}
+                stack.append((definitions, name, node, hint, True))
+            parent[slot] = {"$ref": f"#/$defs/{name}"}
+            continue
+        copy = parent[slot] = dict(node) if isinstance(node, dict) else list(node)
+        children = []
+        for key, child in _children(node):
+            if isinstance(child, (dict, list)):
+                # Shared names follow the property a subschema is under, or the array whose items it is
+                child_hint = hint if key == "properties" or isinstance(node, list) else str(key)
+                children.append((copy, key, child, f"{hint}_items" if key == "items" else child_hint, False))
+        stack.extend(reversed(children))
+    return root[0], definitions
+
+
+def _choice_ref(  # noqa: PLR0913, PLR0917
+    node: dict,
+    digest: str,
+    hint: str,
+    names: dict[str, str],
+    definitions: dict[str, dict],
+    taken: set[str],
+) -> dict:
+    # Returns a choice kind with its enum replaced by a $ref, adding the shared enum to the definitions
+    name = names.get(digest)
+    if name is None:
+        name = names[digest] = _unique_name(f"{hint}_choices", taken)
+        definitions[name] = {"enum": list(node["enum"])}
+    return {**{key: value for key, value in node.items() if key != "enum"}, "$ref": f"#/$defs/{name}"}
+
+
+def _unique_name(hint: str, taken: set[str]) -> str:
+    # Returns a $defs name based on the hint that is not yet taken, and marks it as taken
+    base = _UNSAFE_NAME.sub("_", hint) or "shared"
+    name = base
+    suffix = 2
+    while name in taken:
+        name = f"{base}_{suffix}"
+        suffix += 1
+    taken.add(name)
+    return name
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+JSNAC Native Kind Checkers
+
+This module provides dedicated checkers for the built-in network kinds (ipv4, ipv4_cidr, mac, vlan,
+etc.). Each checker accepts exactly the same values as the corresponding $defs entry in
+jsnac.core.kinds (type, pattern and minimum/maximum combined), but without going through generic
+JSON Schema keyword evaluation. They are used by jsnac.core.validate.Validator to short-circuit
+references to unmodified built-in kinds, and can be registered with a jsonschema FormatChecker.
+
+Variables:
+    KIND_CHECKERS (Mapping[str, Callable[[Any], bool]]): Checker for each supported built-in kind.
+
+Functions:
+    is_ipv4(value: Any) -> bool:
+        Checks a value against the ipv4 kind.
+    is_ipv4_cidr(value: Any) -> bool:
+        Checks a value against the ipv4_cidr kind.
+    is_ipv4_prefix(value: Any) -> bool:
+        Checks a value against the ipv4_prefix kind.
+    is_ipv6(value: Any) -> bool:
+        Checks a value against the ipv6 kind.
+    is_ipv6_cidr(value: Any) -> bool:
+        Checks a value against the ipv6_cidr kind.
+    is_ipv6_prefix(value: Any) -> bool:
+        Checks a value against the ipv6_prefix kind.
+    is_mac(value: Any) -> bool:
+        Checks a value against the mac kind.
+    is_mac_dot(value: Any) -> bool:
+        Checks a value against the mac_dot kind.
+    format_checker(base: FormatChecker | None = None) -> FormatChecker:
+        Returns a jsonschema FormatChecker with a format registered for each supported kind.
+"""
+
+import string
+from collections.abc import Callable, Mapping
+from types import MappingProxyType
+from typing import Any
+
+from jsnac.core.kinds import BUILTIN_KINDS
+
+_HEX = frozenset(string.hexdigits)
+_IPV4_PREFIXES = frozenset(str(i) for i in range(33))
+_IPV6_PREFIXES = frozenset(("32", "36", "40", "44", "48", "52", "56", "60", "64", "128"))
+_MAC_SEPARATORS = frozenset(":-")
+
+
+def _strip(value: str) -> str:
+    # The kind patterns end with "$", which also matches just before a trailing newline
+    return value.removesuffix("\n")
+
+
+def _octet(value: str) -> bool:
+    # 1 or 2 digits (leading zeros allowed), or 3 digits between 100 and 255
+    length = len(value)
+    return 0 < length < 4 and value.isascii() and value.isdigit() and (length < 3 or 100 <= int(value) <= 255)  # noqa: PLR2004
+
+
+def _ipv4(value: str) -> bool:
+    octets = value.split(".")
+    return len(octets) == 4 and all(_octet(o) for o in octets)  # noqa: PLR2004
+
+
+def _hextets(parts: list[str]) -> bool:
+    return all(len(p) <= 4 and _HEX.issuperset(p) for p in parts)  # noqa: PLR2004
+
+
+def _ipv6(value: str) -> bool:
+    # Equivalent to ^(([a-fA-F0-9]{1,4}|):){1,7}([a-fA-F0-9]{1,4}|:)$, the address either ends
+    # in a hextet (2 to 8 groups) or in "::" (1 to 7 groups followed by an extra colon)
+    parts = value.split(":")
+    if parts[-1]:
+        return 2 <= len(parts) <= 8 and _hextets(parts)  # noqa: PLR2004
+    return 3 <= len(parts) <= 9 and not parts[-2] and _hextets(parts)  # noqa: PLR2004
+
+
+def _is_integer(value: Any) -> bool:  # noqa: ANN401
+    # Matches the JSON Schema integer type, which includes floats with no fractional part
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+def is_ipv4(value: Any) -> bool:  # noqa: ANN401
+    """
+    Checks a value against the ipv4 kind.
+
+    Args:
+        value (Any): The value to check.
+
+    Returns:
+        bool: True if the value is a valid ipv4 kind.
+
+    """
+    return isinstance(value, str) and _ipv4(_strip(value))
+
+
+def is_ipv4_cidr(value: Any) -> bool:  # noqa: ANN401
+    """
+    Checks a value against the ipv4_cidr kind.
+
+    Args:
+        value (Any): The value to check.
+
+    Returns:
+        bool: True if the value is a valid ipv4_cidr kind.
+
+    """
+    if not isinstance(value, str):
+        return False
+    address, sep, prefix = _strip(value).partition("/")
+    return sep == "/" and prefix in _IPV4_PREFIXES and _ipv4(address)
+
+
+def is_ipv4_prefix(value: Any) -> bool:  # noqa: ANN401
+    """
+    Checks a value against the ipv4_prefix kind.
+
+    Args:
+        value (Any): The value to check.
+
+    Returns:
+        bool: True if the value is a valid ipv4_prefix kind.
+
+    """
+    if not isinstance(value, str):
+        return False
+    value = _strip(value)
+    return value.startswith("/") and value[1:] in _IPV4_PREFIXES
+
+
+def is_ipv6(value: Any) -> bool:  # noqa: ANN401
+    """
+    Checks a value against the ipv6 kind.
+
+    Args:
+        value (Any): The value to check.
+
+    Returns:
+        bool: True if the value is a valid ipv6 kind.
+
+    """
+    return isinstance(value, str) and _ipv6(_strip(value))
+
+
+def is_ipv6_cidr(value: Any) -> bool:  # noqa: ANN401
+    """
+    Checks a value against the ipv6_cidr kind.
+
+    Args:
+        value (Any): The value to check.
+
+    Returns:
+        bool: True if the value is a valid ipv6_cidr kind.
+
+    """
+    if not isinstance(value, str):
+        return False
+    address, sep, prefix = _strip(value).partition("/")
+    return sep == "/" and prefix in _IPV6_PREFIXES and _ipv6(address)
+
+
+def is_ipv6_prefix(value: Any) -> bool:  # noqa: ANN401
+    """
+    Checks a value against the ipv6_prefix kind.
+
+    Args:
+        value (Any): The value to check.
+
+    Returns:
+        bool: True if the value is a valid ipv6_prefix kind.
+
+    """
+    if not isinstance(value, str):
+        return False
+    value = _strip(value)
+    return value.startswith("/") and value[1:] in _IPV6_PREFIXES
+
+
+def is_mac(value: Any) -> bool:  # noqa: ANN401
+    """
+    Checks a value against the mac kind (xx:xx:xx:xx:xx:xx, ":" or "-" separated).
+
+    Args:
+        value (Any): The value to check.
+
+    Returns:
+        bool: True if the value is a valid mac kind.
+
+    """
+    if not isinstance(value, str):
+        return False
+    value = _strip(value)
+    return (
+        len(value) == 17  # noqa: PLR2004
+        and _MAC_SEPARATORS.issuperset(value[2::3])
+        and _HEX.issuperset(value[0::3])
+        and _HEX.issuperset(value[1::3])
+    )
+
+
+def is_mac_dot(value: Any) -> bool:  # noqa: ANN401
+    """
+    Checks a value against the mac_dot kind (xxxx.xxxx.xxxx).
+
+    Args:
+        value (Any): The value to check.
+
+    Returns:
+        bool: True if the value is a valid mac_dot kind.
+
+    """
+    if not isinstance(value, str):
+        return False
+    value = _strip(value)
+    return len(value) == 14 and value[4] == value[9] == "." and _HEX.issuperset(value.replace(".", "", 2))  # noqa: PLR2004
+
+
+def _integer_checker(kind: str) -> Callable[[Any], bool]:
+    minimum = BUILTIN_KINDS[kind]["minimum"]
+    maximum = BUILTIN_KINDS[kind]["maximum"]
+
+    def check(value: Any) -> bool:  # noqa: ANN401
+        return _is_integer(value) and minimum <= value <= maximum
+
+    check.__name__ = f"is_{kind}"
+    check.__doc__ = f"Checks a value against the {kind} kind (integer between {minimum} and {maximum})."
+    return check
+
+
+KIND_CHECKERS: Mapping[str, Callable[[Any], bool]] = MappingProxyType(
+    {
+        "ipv4": is_ipv4,
+        "ipv4_cidr": is_ipv4_cidr,
+        "ipv4_prefix": is_ipv4_prefix,
+        "ipv6": is_ipv6,
+        "ipv6_cidr": is_ipv6_cidr,
+        "ipv6_prefix": is_ipv6_prefix,
+        "mac": is_mac,
+        "mac_dot": is_mac_dot,
+        **{kind: _integer_checker(kind) for kind in ("uint16", "uint32", "uint64", "mtu", "vlan")},
+    }
+)
+
+
+def format_checker(base: Any = None) -> Any:  # noqa: ANN401
+    """
+    Returns a jsonschema FormatChecker with a format registered for each supported kind.
+
+    Formats are registered as "jsnac-<kind>" (e.g. {"format": "jsnac-ipv4_cidr"}), so they do not
+    clash with the standard formats. As with the standard formats, values of a different JSON type
+    to the kind (e.g. an integer checked against jsnac-mac) are ignored.
+
+    Args:
+        base (FormatChecker | None): An existing FormatChecker to register the formats with.
+                                     Defaults to a new, empty FormatChecker.
+
+    Returns:
+        FormatChecker: The format checker.
+
+    """
+    import jsonschema  # noqa: PLC0415
+
+    checker = base if base is not None else jsonschema.FormatChecker(formats=())
+    for kind, check in KIND_CHECKERS.items():
+        kind_type = str if BUILTIN_KINDS[kind]["type"] == "string" else (int, float)
+        checker.checks(f"jsnac-{kind}")(_applies_to(kind_type, check))
+    return checker
+
+
+def _applies_to(kind_type: type | tuple[type, ...], check: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    def format_check(value: Any) -> bool:  # noqa: ANN401
+        return not isinstance(value, kind_type) or isinstance(value, bool) or check(value)
+
+    return format_check
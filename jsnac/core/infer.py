@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+JSNAC Schema Inference
+
+This module infers a JSNAC definition from plain YAML/JSON data (e.g. an inventory of host_vars),
+so a schema can be bootstrapped from the data it will validate. Every document is walked once and
+folded into a summary of each path (the types seen, how often each key was present and which
+built-in kinds every value matched), then discarded. Memory use therefore follows the number of
+distinct paths in the data rather than the number or size of the documents.
+
+Strings are matched against the built-in kinds (ipv4, ipv4_cidr, mac, ...) and the most specific
+kind matched by every value is used. Integers are only given a built-in kind (vlan, mtu) when the
+key names it and every value is within the kind's range, as the values alone are not enough to
+tell a VLAN from any other small number. Paths seen with several types are emitted as a plain
+JSON schema list of types, and keys present in every object are marked as required.
+
+Summaries can be merged, so large corpora are split across a pool of worker processes that each
+summarise a share of the files, and the summaries are merged in input order.
+
+Classes:
+    SchemaInferrer:
+        Summarises YAML/JSON documents and emits a JSNAC definition describing them.
+
+Functions:
+    infer_files(paths: list[Path], workers: int | None = None, json_input=False, yaml_loader="auto") -> SchemaInferrer:
+        Summarises many YAML/JSON files using a process pool.
+"""
+
+import json
+import os
+import re
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from jsnac.core.formats import (
+    KIND_CHECKERS,
+    is_ipv4,
+    is_ipv4_cidr,
+    is_ipv4_prefix,
+    is_ipv6,
+    is_ipv6_cidr,
+    is_ipv6_prefix,
+    is_mac,
+    is_mac_dot,
+)
+from jsnac.core.kinds import BUILTIN_KINDS
+from jsnac.core.load import get_yaml_loader, stringify_keys
+
+
+def _pattern_checker(kind: str) -> Callable[[str], bool]:
+    match = re.compile(BUILTIN_KINDS[kind]["pattern"]).match
+    return lambda value: match(value) is not None
+
+
+def _is_ipv6_address(value: str) -> bool:
+    # The ipv6 pattern also accepts values such as "12:30", only treat values with 2 or more colons as addresses
+    return value.count(":") >= 2 and is_ipv6(value)  # noqa: PLR2004
+
+
+# Built-in kinds detected from string values, most specific first (e.g. a MAC address is also a valid
+# ipv6 value, and "/32" both a valid ipv4_prefix and ipv6_prefix)
+_STRING_KINDS: dict[str, Callable[[str], bool]] = {
+    "ipv4": is_ipv4,
+    "ipv4_cidr": is_ipv4_cidr,
+    "ipv4_prefix": is_ipv4_prefix,
+    "mac": is_mac,
+    "mac_dot": is_mac_dot,
+    "ipv6": _is_ipv6_address,
+    "ipv6_cidr": is_ipv6_cidr,
+    "ipv6_prefix": is_ipv6_prefix,
+    "email": _pattern_checker("email"),
+    "domain": _pattern_checker("domain"),
+}
+_ALL_STRING_KINDS = frozenset(_STRING_KINDS)
+# Built-in integer kinds, only used when the key contains the kind's name
+_INTEGER_KINDS = ("vlan", "mtu")
+
+_TYPES = {bool: "boolean", int: "integer", float: "number", str: "string", type(None): "null"}
+
+
+class _Node:
+    # The summary of every value seen at one path of the documents
+
+    __slots__ = ("count", "items", "kinds", "maximum", "minimum", "objects", "properties", "types")
+
+    def __init__(self) -> None:
+        self.count = 0  # Number of values seen, i.e. how often the key was present in its parent objects
+        self.types: set[str] = set()
+        self.kinds: frozenset[str] | None = None  # Kinds matched by every string, None until a string is seen
+        self.minimum: int | None = None
+        self.maximum: int | None = None
+        self.objects = 0  # Number of those values that were objects
+        self.properties: dict[str, _Node] = {}
+        self.items: _Node | None = None
+
+
+def _observe(root: _Node, document: Any) -> None:  # noqa: ANN401
+    # Iterative so deeply nested documents do not hit the recursion limit
+    stack = [(root, document)]
+    while stack:
+        node, value = stack.pop()
+        node.count += 1
+        if isinstance(value, dict):
+            node.types.add("object")
+            node.objects += 1
+            for key, child in value.items():
+                child_node = node.properties.get(str(key))
+                if child_node is None:
+                    child_node = node.properties[str(key)] = _Node()
+                stack.append((child_node, child))
+        elif isinstance(value, list):
+            node.types.add("array")
+            if node.items is None:
+                node.items = _Node()
+            stack.extend((node.items, item) for item in value)
+        else:
+            # YAML timestamps and other scalars are written as strings in JSON
+            kind = _TYPES.get(type(value), "string")
+            node.types.add(kind)
+            if kind == "string":
+                candidates = _ALL_STRING_KINDS if node.kinds is None else node.kinds
+                if candidates:
+                    text = str(value)
+                    node.kinds = frozenset(k for k in candidates if _STRING_KINDS[k](text))
+            elif kind == "integer":
+                node.minimum = value if node.minimum is None else min(node.minimum, value)
+                node.maximum = value if node.maximum is None else max(node.maximum, value)
+
+
+def _merge(target: _Node, source: _Node) -> None:
+    stack = [(target, source)]
+    while stack:
+        into, node = stack.pop()
+        into.count += node.count
+        into.objects += node.objects
+        into.types |= node.types
+        if node.kinds is not None:
+            into.kinds = node.kinds if into.kinds is None else into.kinds & node.kinds
+        if node.minimum is not None:
+            into.minimum = node.minimum if into.minimum is None else min(into.minimum, node.minimum)
+        if node.maximum is not None:
+            into.maximum = node.maximum if into.maximum is None else max(into.maximum, node.maximum)
+        for key, child in node.properties.items():
+            if key in into.properties:
+                stack.append((into.properties[key], child))
+            else:
+                into.properties[key] = child
+        if node.items is not None:
+            if into.items is None:
+                into.items = node.items
+            else:
+                stack.append((into.items, node.items))
+
+
+def _scalar_kind(name: str, kind: str, node: _Node) -> str:
+    # The js_kind of a path holding a single scalar type, a built-in kind if every value matched one
+    if kind == "string" and node.kinds:
+        return next(k for k in _STRING_KINDS if k in node.kinds)
+    if kind == "integer":
+        for candidate in _INTEGER_KINDS:
+            if candidate in name.lower() and all(KIND_CHECKERS[candidate](v) for v in (node.minimum, node.maximum)):
+                return candidate
+    return kind
+
+
+def _definition(name: str, node: _Node) -> dict[str, Any]:
+    # The JSNAC definition of a path, whose nested properties and items are filled in by the caller
+    # Every integer is a valid number
+    types = node.types - {"integer"} if {"integer", "number"} <= node.types else node.types
+    if types == {"object"}:
+        required = [key for key, child in node.properties.items() if child.count == node.objects]
+        return {"properties": {}, "required": required} if required else {"properties": {}}
+    if types == {"array"}:
+        return {"items": {}}
+    if len(types) == 1:
+        return {"js_kind": {"name": _scalar_kind(name, next(iter(types)), node)}}
+    # JSNAC kinds cannot express a union, so mixed paths are passed through as a JSON schema list of types
+    return {"type": sorted(types)}
+
+
+class SchemaInferrer:
+    """
+    Summarises YAML/JSON documents and emits a JSNAC definition describing them.
+
+    Documents are summarised as they are added and not kept, so any number of them can be added.
+    Only documents that are mappings are summarised, as a JSNAC schema always describes an object.
+
+    Attributes:
+        documents (int): The number of documents summarised.
+        errors (list[str]): A message for each file that could not be read or parsed, or document skipped.
+
+    Methods:
+        add(document: Any) -> None:
+            Summarises a single YAML/JSON document.
+        add_file(path: Path) -> None:
+            Summarises every document in a YAML/JSON file.
+        merge(other: SchemaInferrer) -> None:
+            Merges the summary of another inferrer into this one.
+        definition(title: str | None = None) -> dict:
+            Returns a JSNAC definition describing every document summarised so far.
+
+    """
+
+    def __init__(self, *, json_input: bool = False, yaml_loader: str = "auto") -> None:
+        """
+        Initializes an empty SchemaInferrer.
+
+        Args:
+            json_input (bool): Parse every file as JSON. Otherwise only .json files are parsed as JSON.
+            yaml_loader (str): The PyYAML loader to parse YAML files with ("auto", "c" or "python").
+
+        """
+        self.json_input = json_input
+        self.yaml_loader = yaml_loader
+        self.documents = 0
+        self.errors: list[str] = []
+        self._root = _Node()
+
+    def add(self, document: Any) -> None:  # noqa: ANN401
+        """
+        Summarises a single YAML/JSON document.
+
+        Args:
+            document (Any): The parsed document, skipped (and recorded in errors) unless it is a mapping.
+
+        """
+        if not isinstance(document, dict):
+            self.errors.append(f"Skipped a document that is not a mapping ({type(document).__name__})")
+            return
+        _observe(self._root, document)
+        self.documents += 1
+
+    def add_file(self, path: Path) -> None:
+        """
+        Summarises every document in a YAML/JSON file.
+
+        A file that cannot be read or parsed is recorded in errors rather than raised, so a single bad
+        file does not abort the inference of a whole inventory.
+
+        Args:
+            path (Path): The file to summarise.
+
+        """
+        import yaml  # noqa: PLC0415
+
+        try:
+            data = path.read_bytes()
+            if self.json_input or path.suffix == ".json":
+                documents = [json.loads(data)]
+            else:
+                documents = stringify_keys(list(yaml.load_all(data, Loader=get_yaml_loader(self.yaml_loader))))
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            self.errors.append(f"{path}: {type(e).__name__}: {e}")
+            return
+        for document in documents:
+            # An empty file or trailing "---" parses to None
+            if document is not None:
+                self.add(document)
+
+    def merge(self, other: "SchemaInferrer") -> None:
+        """
+        Merges the summary of another inferrer into this one.
+
+        The other inferrer's summary is shared rather than copied, so it must not be used afterwards.
+
+        Args:
+            other (SchemaInferrer): The inferrer to merge, e.g. one returned by a worker process.
+
+        """
+        _merge(self._root, other._root)  # noqa: SLF001
+        self.documents += other.documents
+        self.errors.extend(other.errors)
+
+    def definition(self, title: str | None = None) -> dict[str, Any]:
+        """
+        Returns a JSNAC definition describing every document summarised so far.
+
+        Properties are listed in the order they were first seen, and every object's properties are
+        required if they were present in all of its occurrences.
+
+        Args:
+            title (str | None): The title of the schema, defaults to "JSNAC inferred Schema".
+
+        Returns:
+            dict: The definition, with "header" and "schema" sections, ready to be built or dumped to YAML.
+
+        """
+        schema: dict[str, Any] = {}
+        # Each entry is (output container, key in the container, name, summary), walked iteratively
+        # like the documents. Items are named after their array, so VLANs listed under "vlans" are detected
+        stack = [(schema, key, key, child) for key, child in reversed(self._root.properties.items())]
+        while stack:
+            parent, slot, name, node = stack.pop()
+            definition = parent[slot] = _definition(name, node)
+            if "properties" in definition:
+                properties = definition["properties"]
+                stack.extend((properties, k, k, v) for k, v in reversed(node.properties.items()))
+            elif "items" in definition and node.items is not None and node.items.count:
+                stack.append((definition, "items", name, node.items))
+        return {
+            "header": {
+                "title": title or "JSNAC inferred Schema",
+                "description": f"Inferred from {self.documents} documents",
+            },
+            "schema": schema,
+        }
+
+
+def _infer_chunk(paths: list[Path], json_input: bool, yaml_loader: str) -> SchemaInferrer:  # noqa: FBT001
+    inferrer = SchemaInferrer(json_input=json_input, yaml_loader=yaml_loader)
+    for path in paths:
+        inferrer.add_file(path)
+    return inferrer
+
+
+def infer_files(
+    paths: list[Path],
+    workers: int | None = None,
+    json_input: bool = False,  # noqa: FBT001, FBT002
+    yaml_loader: str = "auto",
+) -> SchemaInferrer:
+    """
+    Summarises many YAML/JSON files using a process pool.
+
+    Each worker summarises a share of the files and only its summary is sent back, so the cost of
+    moving data between processes does not grow with the size of the files.
+
+    Args:
+        paths (list[Path]): The files to summarise.
+        workers (int | None): Number of worker processes. Defaults to the number of CPUs.
+                              A value of 1 summarises everything in the current process.
+        json_input (bool): Parse every file as JSON. Otherwise only .json files are parsed as JSON.
+        yaml_loader (str): The PyYAML loader to parse YAML files with ("auto", "c" or "python").
+
+    Returns:
+        SchemaInferrer: The merged summary of every file.
+
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths)) or 1
+    if workers == 1:
+        return _infer_chunk(paths, json_input, yaml_loader)
+    # Contiguous shares keep the properties in the order they first appear in the inputs
+    size = -(-len(paths) // (workers * 4))
+    chunks = [paths[i : i + size] for i in range(0, len(paths), size)]
+    inferrer = SchemaInferrer(json_input=json_input, yaml_loader=yaml_loader)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for summary in executor.map(partial(_infer_chunk, json_input=json_input, yaml_loader=yaml_loader), chunks):
+            inferrer.merge(summary)
+    return inferrer
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+JSNAC Kinds
+
+This module holds the registry of js_kinds that JSNAC provides out of the box (ipv4, mac, vlan, etc.).
+The registry is built once at import time and is read-only, so it can be shared by every SchemaBuilder
+without being rebuilt for each schema.
+
+Custom kinds (the "js_kinds" section of a definition) can also be collected into a KindRegistry, e.g.
+an organisation wide kinds library. A registry is parsed and built once, is immutable, and can be passed
+to any number of SchemaBuilders, threads or (as it is picklable) worker processes.
+
+Variables:
+    BUILTIN_KINDS (Mapping[str, Mapping[str, Any]]): Read-only mapping of kind name to its $defs entry.
+    BUILTIN_KIND_NAMES (frozenset[str]): The names of all built-in kinds, for fast membership tests.
+
+Classes:
+    KindRegistry:
+        An immutable collection of custom js_kinds, built once and shared between builds.
+
+Functions:
+    builtin_definitions() -> dict:
+        Returns a fresh, mutable copy of the built-in $defs entries.
+    custom_definition(kind: str, kind_data: Mapping[str, Any]) -> tuple[dict, str | None]:
+        Builds the $defs entry for a custom js_kind, along with an error message if it is invalid.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+
+from jsnac.core.load import get_yaml_loader, load_choices, resolve_choices_files, stringify_keys
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+_BUILTIN_KINDS: dict[str, dict[str, Any]] = {
+    "ipv4": {
+        "type": "string",
+        "pattern": "^((25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])\\.){3,3}(25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])$",
+        "title": "IPv4 Address",
+        "description": "IPv4 address (String) \n Format: xxx.xxx.xxx.xxx",
+    },
+    # Decided to just go simple for now, may add more complex validation in the future from
+    # https://stackoverflow.com/questions/53497/regular-expression-that-matches-valid-ipv6-addresses
+    "ipv6": {
+        "type": "string",
+        "pattern": "^(([a-fA-F0-9]{1,4}|):){1,7}([a-fA-F0-9]{1,4}|:)$",
+        "title": "IPv6 Address",
+        "description": "Short IPv6 address (String) \nAccepts both full and short form addresses, link-local addresses, and IPv4-mapped addresses",  # noqa: E501
+    },
+    "ipv4_cidr": {
+        "type": "string",
+        "pattern": "^((25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])\\.){3,3}(25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])/(1[0-9]|[0-9]|2[0-9]|3[0-2])$",  # noqa: E501
+        "title": "IPv4 CIDR",
+        "description": "IPv4 CIDR (String) \nFormat: xxx.xxx.xxx.xxx/xx",
+    },
+    "ipv6_cidr": {
+        "type": "string",
+        "pattern": "^(([a-fA-F0-9]{1,4}|):){1,7}([a-fA-F0-9]{1,4}|:)/(32|36|40|44|48|52|56|60|64|128)$",
+        "description": "Full IPv6 CIDR (String) \nFormat: xxxx:xxxx:xxxx:xxxx:xxxx:xxxx:xxxx:xxxx/xxx",
+    },
+    "ipv4_prefix": {
+        "type": "string",
+        "pattern": "^/(1[0-9]|[0-9]|2[0-9]|3[0-2])$",
+        "description": "IPv4 Prefix (String) \nFormat: /xx between 0 and 32",
+    },
+    "ipv6_prefix": {
+        "type": "string",
+        "pattern": "^/(32|36|40|44|48|52|56|60|64|128)$",
+        "description": "IPv6 prefix (String) \nFormat: /xx between 32 and 64 in increments of 4. also /128",
+    },
+    "domain": {
+        "type": "string",
+        "pattern": "^([a-zA-Z0-9-]{1,63}\\.)+[a-zA-Z]{2,63}$",
+        "description": "Domain name (String) \nFormat: example.com",
+    },
+    "email": {
+        "type": "string",
+        "pattern": "^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}$",
+        "description": "Email address (String) \nFormat: user@domain.com",
+    },
+    "http_url": {
+        "type": "string",
+        "pattern": "^(https?://)?([\\da-z.-]+)\\.([a-z.]{2,6})([/\\w .-]*)*\\??([^#\\s]*)?(#.*)?$",
+        "description": "HTTP(s) URL (String) \nFormat: http://example.com",
+    },
+    "uint16": {
+        "type": "integer",
+        "minimum": 0,
+        "maximum": 65535,
+        "description": "16-bit Unsigned Integer \nRange: 0 to 65535",
+    },
+    "uint32": {
+        "type": "integer",
+        "minimum": 0,
+        "maximum": 4294967295,
+        "description": "32-bit Unsigned Integer \nRange: 0 to 4294967295",
+    },
+    "uint64": {
+        "type": "integer",
+        "minimum": 0,
+        "maximum": 18446744073709551615,
+        "description": "64-bit Unsigned Integer \nRange: 0 to 18446744073709551615",
+    },
+    "mtu": {
+        "type": "integer",
+        "minimum": 68,
+        "maximum": 9192,
+        "description": "Maximum Transmission Unit (MTU) \nRange: 68 to 9192",
+    },
+    "mac": {
+        "type": "string",
+        "pattern": "^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$",
+        "description": "MAC Address (String) \nFormat: xx:xx:xx:xx:xx:xx",
+    },
+    "mac_dot": {
+        "type": "string",
+        "pattern": "^([0-9A-Fa-f]{4}[.]){2}([0-9A-Fa-f]{4})$",
+        "description": "MAC Address with dots (String) \nFormat: xxxx.xxxx.xxxx",
+    },
+    "vlan": {
+        "type": "integer",
+        "minimum": 1,
+        "maximum": 4094,
+        "description": "VLAN ID (Integer) \nRange: 1 to 4094",
+    },
+    "docker_image": {
+        "type": "string",
+        "pattern": "^[a-z0-9]+(?:[._-][a-z0-9]+)*$",
+        "description": "Docker Image Name (String) \nFormat: alpine:latest",
+    },
+}
+
+BUILTIN_KINDS: Mapping[str, Mapping[str, Any]] = MappingProxyType(
+    {kind: MappingProxyType(definition) for kind, definition in _BUILTIN_KINDS.items()}
+)
+BUILTIN_KIND_NAMES: frozenset[str] = frozenset(BUILTIN_KINDS)
+
+
+def builtin_definitions() -> dict[str, dict[str, Any]]:
+    """
+    Returns a fresh, mutable copy of the built-in $defs entries.
+
+    The copy is cheap (a shallow copy of each entry) and can be modified or extended with
+    user-defined kinds without affecting the shared registry.
+
+    Returns:
+        dict[str, dict[str, Any]]: Mapping of kind name to a copy of its $defs entry.
+
+    """
+    return {kind: dict(definition) for kind, definition in BUILTIN_KINDS.items()}
+
+
+def custom_definition(kind: str, kind_data: Mapping[str, Any]) -> tuple[dict[str, Any], str | None]:
+    """
+    Builds the $defs entry for a custom js_kind, along with an error message if it is invalid.
+
+    Custom kinds of type pattern (a regex) and choice (an enum) are supported. The choices of a choice
+    kind are given inline (choices) or loaded from a file (choices_file, see jsnac.core.load.load_choices),
+    so a large enum referenced by many properties is emitted once in $defs. An invalid kind still gets a
+    $defs entry (typed null or string, and titled "Error"), but must not be referenced by the schema.
+
+    Args:
+        kind (str): The name of the kind.
+        kind_data (Mapping[str, Any]): The kind from the "js_kinds" section of a definition.
+
+    Returns:
+        tuple[dict[str, Any], str | None]: The $defs entry, and the error message or None if the kind is valid.
+
+    """
+    definition: dict[str, Any] = {}
+    definition["title"] = kind_data.get("title", f"{kind}")
+    definition["description"] = kind_data.get("description", f"Custom Kind: {kind}")
+    match kind_data.get("type"):
+        case "pattern":
+            definition["type"] = "string"
+            if "regex" in kind_data:
+                definition["pattern"] = kind_data["regex"]
+                return definition, None
+            definition["type"] = "null"
+            definition["title"] = "Error"
+            definition["description"] = "No regex key provided"
+            return definition, f"regex key is required for js_kind ({kind}) with type pattern"
+        case "choice":
+            try:
+                if "choices" in kind_data:
+                    definition["enum"] = kind_data["choices"]
+                    return definition, None
+                if "choices_file" in kind_data:
+                    definition["enum"] = load_choices(kind_data["choices_file"])
+                    return definition, None
+                error = f"choices or choices_file key is required for js_kind ({kind}) with type choice"
+            except ValueError as e:
+                error = f"Invalid choices_file for js_kind ({kind}): {e}"
+            definition["type"] = "null"
+            definition["title"] = "Error"
+            definition["description"] = error
+            return definition, error
+        case _:
+            definition["type"] = "string"
+            definition["title"] = "Error"
+            definition["description"] = f"Invalid type ({kind_data.get('type')}), defaulted to string"
+            return definition, f"Invalid type ({kind_data.get('type')}) for js_kind ({kind}), defaulting to string"
+
+
+@dataclass(frozen=True)
+class KindRegistry:
+    """
+    An immutable collection of custom js_kinds, built once and shared between builds.
+
+    The $defs entry of every kind is built when the registry is created, so a SchemaBuilder given
+    the registry only copies them. Kinds in the "js_kinds" section of a definition take precedence
+    over a registry kind of the same name. Invalid kinds are logged once, when the registry is created.
+
+    Attributes:
+        kinds (Mapping[str, Mapping[str, Any]]): The custom kinds, as in the "js_kinds" section of a definition.
+        names (frozenset[str]): The names of the valid kinds, which the schema may reference.
+        fingerprint (str): A hash of the kinds, identifying the registry in build cache keys.
+
+    Methods:
+        from_file(path: str | Path, yaml_loader: str = "auto") -> KindRegistry:
+            Creates a registry from a YAML or JSON file of kinds.
+        definitions() -> dict[str, dict[str, Any]]:
+            Returns a fresh, mutable copy of the $defs entries of every kind.
+        merged(kinds: Mapping[str, Mapping[str, Any]] | KindRegistry) -> KindRegistry:
+            Returns a new registry with additional kinds, which take precedence over existing ones.
+
+    """
+
+    kinds: Mapping[str, Mapping[str, Any]] = field(default_factory=dict, repr=False, compare=False)
+    names: frozenset[str] = field(init=False, repr=False, compare=False)
+    fingerprint: str = field(init=False)
+    _definitions: dict[str, dict[str, Any]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """
+        Builds the $defs entry of every kind, logging any invalid ones.
+
+        Raises:
+            ValueError: If the kinds are not a mapping of kind names to mappings.
+
+        """
+        if not isinstance(self.kinds, Mapping) or not all(isinstance(k, Mapping) for k in self.kinds.values()):
+            msg = "Kinds must be a mapping of kind names to js_kind definitions"
+            raise ValueError(msg)
+        # Keep a private copy, so the registry cannot be changed through the mapping it was created from
+        kinds = {kind: dict(kind_data) for kind, kind_data in self.kinds.items()}
+        definitions = {}
+        names = set()
+        for kind, kind_data in kinds.items():
+            definitions[kind], error = custom_definition(kind, kind_data)
+            if error is None:
+                names.add(kind)
+            else:
+                _log.error(error)
+        # The definitions are included, as a kind's choices may come from a file
+        serialized = json.dumps([kinds, definitions], sort_keys=True, default=str).encode()
+        object.__setattr__(self, "kinds", MappingProxyType(kinds))
+        object.__setattr__(self, "names", frozenset(names))
+        object.__setattr__(self, "fingerprint", hashlib.sha256(serialized).hexdigest())
+        object.__setattr__(self, "_definitions", definitions)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        """
+        Pickles the registry along with its built definitions, so they are not rebuilt when unpickled.
+
+        Returns:
+            tuple[Any, ...]: The function to restore the registry with, and its arguments.
+
+        """
+        # MappingProxyType cannot be pickled, so pickle the state as plain dictionaries
+        state = {"kinds": dict(self.kinds), "names": self.names, "fingerprint": self.fingerprint}
+        return (_restore_registry, (state, self._definitions))
+
+    @classmethod
+    def from_file(cls, path: str | Path, yaml_loader: str = "auto") -> "KindRegistry":
+        """
+        Creates a registry from a YAML or JSON file of kinds.
+
+        The file is either a mapping of kind names to kinds, or a JSNAC definition whose "js_kinds"
+        section is used (any other sections are ignored). Files with a .json suffix are parsed as JSON.
+        Relative choices_file paths are relative to the directory of the kinds file.
+
+        Args:
+            path (str | Path): The kinds file.
+            yaml_loader (str): The YAML loader to use (auto, c or python), see jsnac.core.load.
+
+        Returns:
+            KindRegistry: The registry.
+
+        Raises:
+            ValueError: If the file does not contain valid YAML or JSON data, or is not a mapping of kinds.
+
+        """
+        import yaml  # noqa: PLC0415
+
+        path = Path(path)
+        try:
+            with path.open("rb") as f:
+                if path.suffix == ".json":
+                    data = json.load(f)
+                else:
+                    data = stringify_keys(yaml.load(f, Loader=get_yaml_loader(yaml_loader)))  # noqa: S506
+        except (ValueError, yaml.YAMLError) as e:
+            msg = f"Invalid kinds file ({path}): {e}"
+            raise ValueError(msg) from e
+        if isinstance(data, dict) and "js_kinds" in data:
+            data = data["js_kinds"]
+        return cls(resolve_choices_files(data, path.parent) or {})
+
+    def definitions(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns a fresh, mutable copy of the $defs entries of every kind.
+
+        Returns:
+            dict[str, dict[str, Any]]: Mapping of kind name to a copy of its $defs entry.
+
+        """
+        return {kind: dict(definition) for kind, definition in self._definitions.items()}
+
+    def merged(self, kinds: "Mapping[str, Mapping[str, Any]] | KindRegistry") -> "KindRegistry":
+        """
+        Returns a new registry with additional kinds, which take precedence over existing ones.
+
+        Args:
+            kinds (Mapping | KindRegistry): The kinds to add.
+
+        Returns:
+            KindRegistry: The new registry.
+
+        """
+        other = kinds.kinds if isinstance(kinds, KindRegistry) else kinds
+        return KindRegistry({**self.kinds, **other})
+
+    def __contains__(self, kind: object) -> bool:
+        """
+        Checks if a kind is a valid kind in the registry.
+
+        Returns:
+            bool: True if the kind can be referenced by a schema.
+
+        """
+        return kind in self.names
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterates over the names of every kind in the registry, including invalid ones.
+
+        Returns:
+            Iterator[str]: The kind names.
+
+        """
+        return iter(self.kinds)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of kinds in the registry, including invalid ones.
+
+        Returns:
+            int: The number of kinds.
+
+        """
+        return len(self.kinds)
+
+
+def _restore_registry(state: dict[str, Any], definitions: dict[str, dict[str, Any]]) -> KindRegistry:
+    registry = object.__new__(KindRegistry)
+    # Frozen dataclasses only block attribute assignment, their instance dictionary can still be filled in
+    vars(registry).update(state, kinds=MappingProxyType(state["kinds"]), _definitions=definitions)
+    return registry
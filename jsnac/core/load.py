@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+JSNAC Definition Loaders
+
+This module selects the PyYAML loader used to parse YAML definitions. PyYAML's pure Python
+SafeLoader is several times slower than CSafeLoader, which wraps libyaml and is available whenever
+PyYAML was built with it. Both accept the same safe subset of YAML and produce the same data for
+JSNAC definitions, so the C loader is used automatically when it is available.
+
+PyYAML is only imported when a loader is first requested, so JSON-only builds (and CLI commands
+that never parse YAML) do not pay for importing it.
+
+YAML mapping keys are not always strings (e.g. a VLAN ID "100:" is loaded as an int), so keys are
+converted to strings the same way a JSON round trip would, as every key ends up in a JSON schema.
+
+It also merges JSNAC definitions, so a definition can be composed from several YAML documents or
+files (e.g. a shared js_kinds library and per-role schema fragments) that are each parsed once, and
+loads the choices of choice kinds kept in their own file (e.g. thousands of site codes). A relative
+choices_file is relative to the definition file it is in, so each definition file is resolved on
+its own before definitions are merged.
+
+Variables:
+    YAML_LOADERS (tuple[str, ...]): The names accepted by get_yaml_loader().
+
+Functions:
+    check_yaml_loader(name: str) -> str:
+        Checks a YAML loader name is valid, without importing PyYAML.
+    get_yaml_loader(name: str = "auto") -> type:
+        Returns the PyYAML loader class for a name ("auto", "c" or "python").
+    stringify_keys(data: Any) -> Any:
+        Converts every mapping key that is not a string to a string, in place.
+    merge_definitions(base: dict, update: dict) -> dict:
+        Deep merges one JSNAC definition into another, returning a new definition.
+    load_choices(path: str | Path, yaml_loader: str | type = "auto") -> list:
+        Loads the choices of a choice js_kind from a JSON, YAML or plain text file.
+    resolve_choices_files(data: Any, base_dir: str | Path) -> Any:
+        Makes every relative choices_file path in a definition relative to base_dir instead, in place.
+    choices_files(data: Any) -> list[str]:
+        Returns every choices_file path in a definition, without duplicates.
+"""
+
+import json
+from collections.abc import Iterator
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+YAML_LOADERS = ("auto", "c", "python")
+
+
+def check_yaml_loader(name: str) -> str:
+    """
+    Checks a YAML loader name is valid, without importing PyYAML.
+
+    Args:
+        name (str): The name of the loader.
+
+    Returns:
+        str: The name, unchanged.
+
+    Raises:
+        ValueError: If the name is not a known loader.
+
+    """
+    if name not in YAML_LOADERS:
+        msg = f"Invalid YAML loader ({name}), must be one of: {', '.join(YAML_LOADERS)}"
+        raise ValueError(msg)
+    return name
+
+
+def get_yaml_loader(name: str = "auto") -> type:
+    """
+    Returns the PyYAML loader class for a name.
+
+    Args:
+        name (str): "c" for libyaml's CSafeLoader, "python" for the pure Python SafeLoader, or
+                    "auto" to use CSafeLoader if PyYAML was built with libyaml and SafeLoader otherwise.
+
+    Returns:
+        type: The loader class, to be passed to yaml.load().
+
+    Raises:
+        ValueError: If the name is not a known loader.
+        ImportError: If the C loader was requested but PyYAML was built without libyaml.
+
+    """  # noqa: DOC502
+    check_yaml_loader(name)
+    import yaml  # noqa: PLC0415
+
+    match name:
+        case "python":
+            return yaml.SafeLoader
+        case "c":
+            if not yaml.__with_libyaml__:
+                msg = "The c YAML loader requires PyYAML to be built with libyaml"
+                raise ImportError(msg)
+            return yaml.CSafeLoader
+        case _:  # auto
+            return yaml.CSafeLoader if yaml.__with_libyaml__ else yaml.SafeLoader
+
+
+def _json_key(key: Any) -> str:  # noqa: ANN401
+    # The same key json.dumps() writes, e.g. 100 -> "100", True -> "true" and None -> "null"
+    if isinstance(key, bool | int | float) or key is None:
+        return json.dumps(key)
+    return str(key)
+
+
+def stringify_keys(data: Any) -> Any:  # noqa: ANN401
+    """
+    Converts every mapping key that is not a string to a string, in place.
+
+    Keys are converted as json.dumps() would (e.g. 100 becomes "100" and true becomes "true"), so
+    YAML definitions build the same schema as their JSON equivalent. Mappings that only have string
+    keys, which is almost always the case, are left untouched. Mappings shared through YAML aliases
+    are only converted once, and the data is walked with an explicit stack so deep definitions do
+    not hit Python's recursion limit.
+
+    Args:
+        data (Any): Data parsed from YAML.
+
+    Returns:
+        Any: The same data, with string keys only.
+
+    """
+    seen: set[int] = set()
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, dict):
+            if not all(isinstance(key, str) for key in node):
+                items = list(node.items())
+                node.clear()
+                node.update((key if isinstance(key, str) else _json_key(key), value) for key, value in items)
+            stack.extend(value for value in node.values() if isinstance(value, dict | list))
+        elif isinstance(node, list):
+            stack.extend(value for value in node if isinstance(value, dict | list))
+    return data
+
+
+def merge_definitions(base: dict[str, Any], update: dict[str, Any]) -> dict[str, Any]:
+    """
+    Deep merges one JSNAC definition into another, returning a new definition.
+
+    The "header" and "js_kinds" sections are merged key by key, so a later definition can override
+    a header field or redefine a single kind. The "schema" section is merged recursively, except
+    that a property with a js_kind is replaced as a whole rather than combined with the previous
+    one. Any other section, or a value that is not a mapping on both sides, is replaced.
+
+    Neither definition is modified: only the mappings along merged paths are copied, the rest of
+    both definitions is shared with the result.
+
+    Args:
+        base (dict): The definition to merge into.
+        update (dict): The definition to merge, taking precedence over the base.
+
+    Returns:
+        dict: The merged definition.
+
+    Raises:
+        ValueError: If either definition is not a mapping.
+
+    """
+    if not isinstance(base, dict) or not isinstance(update, dict):
+        msg = "Only JSNAC definitions that are mappings can be merged"
+        raise ValueError(msg)  # noqa: TRY004
+    merged = dict(base)
+    for section, value in update.items():
+        current = merged.get(section)
+        if not (isinstance(current, dict) and isinstance(value, dict)):
+            merged[section] = value
+        elif section == "schema":
+            merged[section] = _merge_schema(current, value)
+        elif section in {"header", "js_kinds"}:
+            merged[section] = {**current, **value}
+        else:
+            merged[section] = value
+    return merged
+
+
+def _merge_schema(base: dict, update: dict) -> dict:
+    # Iterative so deeply nested schemas merge without hitting the recursion limit
+    merged = dict(base)
+    stack = [(merged, update)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            current = target.get(key)
+            if (
+                isinstance(current, dict)
+                and isinstance(value, dict)
+                and "js_kind" not in current
+                and "js_kind" not in value
+            ):
+                target[key] = nested = dict(current)
+                stack.append((nested, value))
+            else:
+                target[key] = value
+    return merged
+
+
+def load_choices(path: str | Path, yaml_loader: str | type = "auto") -> list[Any]:
+    """
+    Loads the choices of a choice js_kind from a JSON, YAML or plain text file.
+
+    Files with a .json suffix hold a JSON array and .yml/.yaml files a YAML sequence. Any other file
+    has one choice per line, skipping blank lines and lines starting with "#". Parsed files are kept
+    until they change (by modification time and size), so a large file referenced by many kinds or
+    builds is only parsed once. Relative paths are relative to the working directory, see
+    resolve_choices_files for resolving those of a definition file.
+
+    Args:
+        path (str | Path): The choices file.
+        yaml_loader (str | type): The PyYAML loader (or the name of one) for YAML files, see get_yaml_loader.
+
+    Returns:
+        list[Any]: A new list of the choices.
+
+    Raises:
+        ValueError: If the file cannot be read or parsed, or does not contain a list of choices.
+
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+        choices = _load_choices(path.resolve(), stat.st_mtime_ns, stat.st_size, yaml_loader)
+    except OSError as e:
+        msg = f"Cannot read choices file ({path}): {e}"
+        raise ValueError(msg) from e
+    return list(choices)
+
+
+@lru_cache(maxsize=32)
+def _load_choices(path: Path, mtime_ns: int, size: int, yaml_loader: str | type) -> tuple[Any, ...]:  # noqa: ARG001
+    # The modification time and size are only part of the cache key, so a changed file is parsed again
+    if path.suffix == ".json":
+        try:
+            choices = json.loads(path.read_bytes())
+        except ValueError as e:
+            msg = f"Invalid choices file ({path}): {e}"
+            raise ValueError(msg) from e
+    elif path.suffix in {".yml", ".yaml"}:
+        import yaml  # noqa: PLC0415
+
+        loader = get_yaml_loader(yaml_loader) if isinstance(yaml_loader, str) else yaml_loader
+        try:
+            choices = yaml.load(path.read_bytes(), Loader=loader)  # noqa: S506
+        except yaml.YAMLError as e:
+            msg = f"Invalid choices file ({path}): {e}"
+            raise ValueError(msg) from e
+    else:
+        lines = (line.strip() for line in path.read_text(encoding="utf-8").splitlines())
+        choices = [line for line in lines if line and not line.startswith("#")]
+    if not isinstance(choices, list):
+        msg = f"Choices file ({path}) must contain a list of choices"
+        raise ValueError(msg)  # noqa: TRY004
+    return tuple(choices)
+
+
+def _choices_file_nodes(data: Any) -> Iterator[dict]:  # noqa: ANN401
+    # Every mapping (js_kind or custom kind) with a choices_file, walked with an explicit stack
+    seen: set[int] = set()
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, dict):
+            if isinstance(node.get("choices_file"), str):
+                yield node
+            stack.extend(value for value in node.values() if isinstance(value, dict | list))
+        elif isinstance(node, list):
+            stack.extend(value for value in node if isinstance(value, dict | list))
+
+
+def resolve_choices_files(data: Any, base_dir: str | Path) -> Any:  # noqa: ANN401
+    """
+    Makes every relative choices_file path in a definition relative to base_dir instead, in place.
+
+    Called with the directory of the definition file as it is loaded, so a definition builds the
+    same wherever it is built from, and merged definitions from different directories each keep
+    their own paths. Absolute paths are left as they are.
+
+    Args:
+        data (Any): A parsed definition (or kinds file).
+        base_dir (str | Path): The directory relative paths are relative to.
+
+    Returns:
+        Any: The same data, with absolute choices_file paths only.
+
+    """
+    base_dir = Path(base_dir).absolute()
+    for node in _choices_file_nodes(data):
+        path = Path(node["choices_file"])
+        if not path.is_absolute():
+            node["choices_file"] = str(base_dir / path)
+    return data
+
+
+def choices_files(data: Any) -> list[str]:  # noqa: ANN401
+    """
+    Returns every choices_file path in a definition, without duplicates.
+
+    The order only depends on the definition, so the paths can be used in a cache key.
+
+    Args:
+        data (Any): A parsed definition (or kinds file).
+
+    Returns:
+        list[str]: The choices_file paths, without duplicates.
+
+    """
+    return list(dict.fromkeys(node["choices_file"] for node in _choices_file_nodes(data)))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+JSNAC Build Metrics
+
+This module collects the metrics of a schema build (wall time per phase, the size of the schema
+and optionally peak memory use) so builds can be compared over time. BuildMetrics is a tracer (see
+jsnac.core.trace), so it is enabled by passing it to a SchemaBuilder, and costs nothing otherwise:
+
+    metrics = BuildMetrics()
+    jsnac = SchemaBuilder(tracer=metrics)
+    with metrics.track_memory():
+        jsnac.add_yaml(data)
+        schema = jsnac.build_schema()
+    print(metrics.as_dict())
+
+Classes:
+    BuildMetrics:
+        Collects the per-phase timings and counters of one or more schema builds.
+"""
+
+import sys
+import time
+import tracemalloc
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from jsnac.core.trace import TraceEvent
+
+# Counters reported in the detail of trace events, summed across builds
+COUNTERS = ("nodes", "refs", "definitions", "defs", "reused", "shared")
+
+
+@dataclass
+class BuildMetrics:
+    """
+    Collects the per-phase timings and counters of one or more schema builds.
+
+    Attributes:
+        phases (dict[str, float]): Wall time of each phase in seconds, in the order they first ran.
+        nodes (int): Number of objects and arrays in the built properties.
+        refs (int): Number of $ref keywords in the built properties.
+        definitions (int): Number of definitions built (built-in and custom kinds).
+        defs (int): Number of $defs entries emitted (after pruning).
+        reused (int): Number of subschemas reused by incremental builds.
+        shared (int): Number of repeated subschemas moved to $defs by deduplicating builds.
+        peak_memory (int | None): Peak memory allocated by Python in bytes, if tracked with track_memory().
+
+    Methods:
+        __call__(event: TraceEvent) -> None:
+            Records a trace event, so the metrics can be used as a SchemaBuilder tracer.
+        phase(name: str) -> Generator[None, None, None]:
+            Context manager timing a phase that runs outside of the builder (e.g. writing the schema).
+        track_memory() -> Generator[None, None, None]:
+            Context manager recording the peak memory allocated while it is active.
+        as_dict() -> dict[str, Any]:
+            Returns the metrics as a JSON serializable dictionary, including the total time.
+
+    """
+
+    phases: dict[str, float] = field(default_factory=dict)
+    nodes: int = 0
+    refs: int = 0
+    definitions: int = 0
+    defs: int = 0
+    reused: int = 0
+    shared: int = 0
+    peak_memory: int | None = None
+
+    def __call__(self, event: TraceEvent) -> None:
+        """
+        Records a trace event, so the metrics can be used as a SchemaBuilder tracer.
+
+        Args:
+            event (TraceEvent): The trace event.
+
+        """
+        self.phases[event.phase] = self.phases.get(event.phase, 0.0) + event.seconds
+        for counter in COUNTERS:
+            if counter in event.detail:
+                setattr(self, counter, getattr(self, counter) + event.detail[counter])
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        """
+        Context manager timing a phase that runs outside of the builder (e.g. writing the schema).
+
+        Args:
+            name (str): The name of the phase.
+
+        Yields:
+            None: The phase is timed until the context exits.
+
+        """
+        tic = time.perf_counter()
+        try:
+            yield
+        finally:
+            self(TraceEvent(name, time.perf_counter() - tic))
+
+    @contextmanager
+    def track_memory(self) -> Generator[None, None, None]:
+        """
+        Context manager recording the peak memory allocated while it is active.
+
+        This uses tracemalloc, which slows down allocation heavy code considerably, so phase
+        timings taken while tracking memory should not be compared with those taken without.
+
+        Yields:
+            None: Memory is tracked until the context exits.
+
+        """
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            if started:
+                tracemalloc.stop()
+            self.peak_memory = max(self.peak_memory or 0, peak)
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Returns the metrics as a JSON serializable dictionary, including the total time.
+
+        The peak resident set size of the whole process so far (peak_rss, in bytes) is also
+        included where the platform supports it, otherwise it is None.
+
+        Returns:
+            dict[str, Any]: The metrics.
+
+        """
+        metrics = asdict(self)
+        metrics["total"] = sum(self.phases.values())
+        metrics["peak_rss"] = _peak_rss()
+        return metrics
+
+
+def _peak_rss() -> int | None:
+    try:
+        import resource  # noqa: PLC0415
+    except ImportError:
+        # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes everywhere else
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+JSNAC Schema Serializers
+
+This module provides the functions used by SchemaBuilder to turn a built schema into a JSON string.
+The standard library json module is used by default, with orjson supported as a faster alternative
+when it is installed. Any callable with the same signature can be passed to SchemaBuilder instead.
+
+Variables:
+    SERIALIZERS (tuple[str, ...]): The names accepted by get_serializer().
+
+Functions:
+    json_serializer(schema: dict, indent: int | None = 4, sort_keys: bool = False) -> str:
+        Serializes a schema with the standard library json module.
+    orjson_serializer(schema: dict, indent: int | None = 4, sort_keys: bool = False) -> str:
+        Serializes a schema with orjson (only 2 space indentation is supported).
+    get_serializer(name: str = "json") -> Serializer:
+        Returns the serializer for a name ("json", "orjson" or "auto").
+"""
+
+import json
+from collections.abc import Callable
+from importlib.util import find_spec
+from typing import Any
+
+# A serializer takes the schema, the indent (None for compact output) and whether to sort keys
+Serializer = Callable[..., str]
+SERIALIZERS = ("json", "orjson", "auto")
+
+
+def json_serializer(schema: dict[str, Any], indent: int | None = 4, sort_keys: bool = False) -> str:  # noqa: FBT001, FBT002
+    """
+    Serializes a schema with the standard library json module.
+
+    Args:
+        schema (dict): The schema to serialize.
+        indent (int | None): Number of spaces to indent by, None for compact output.
+        sort_keys (bool): Sort the keys of every object.
+
+    Returns:
+        str: The serialized schema.
+
+    """
+    if indent is None:
+        return json.dumps(schema, separators=(",", ":"), sort_keys=sort_keys)
+    return json.dumps(schema, indent=indent, sort_keys=sort_keys)
+
+
+def orjson_serializer(schema: dict[str, Any], indent: int | None = 4, sort_keys: bool = False) -> str:  # noqa: FBT001, FBT002
+    """
+    Serializes a schema with orjson.
+
+    orjson only supports indenting by 2 spaces, so any indent other than None is written with 2 spaces.
+    Non-ASCII characters are written as UTF-8 rather than escaped. An ImportError is raised if orjson
+    is not installed.
+
+    Args:
+        schema (dict): The schema to serialize.
+        indent (int | None): Whether to indent the output, None for compact output.
+        sort_keys (bool): Sort the keys of every object.
+
+    Returns:
+        str: The serialized schema.
+
+    """
+    import orjson  # noqa: PLC0415
+
+    option = 0
+    if indent is not None:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(schema, option=option).decode("utf-8")
+
+
+def get_serializer(name: str = "json") -> Serializer:
+    """
+    Returns the serializer for a name.
+
+    Args:
+        name (str): "json" for the standard library, "orjson" for orjson, or "auto" to use
+                    orjson if it is installed and fall back to the standard library otherwise.
+
+    Returns:
+        Serializer: The serializer function.
+
+    Raises:
+        ValueError: If the name is not a known serializer.
+        ImportError: If orjson was requested but is not installed.
+
+    """
+    match name:
+        case "json":
+            return json_serializer
+        case "orjson":
+            if find_spec("orjson") is None:
+                msg = "The orjson serializer requires orjson to be installed (pip install orjson)"
+                raise ImportError(msg)
+            return orjson_serializer
+        case "auto":
+            return orjson_serializer if find_spec("orjson") is not None else json_serializer
+        case _:
+            msg = f"Invalid serializer ({name}), must be one of: {', '.join(SERIALIZERS)}"
+            raise ValueError(msg)
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+JSNAC Schema Server
+
+This module serves the schemas of a directory of definition files over HTTP, so editors, language
+servers and CI runners can fetch them from a single place instead of from copies of generated files.
+Every schema is built once on start-up and kept in memory, and the definitions are watched (see
+jsnac.core.watch) so only the schemas of changed files are rebuilt.
+
+Each schema is served as compact JSON, and its response body, gzip compressed body and ETag are
+prepared when it is built rather than per request. Clients that poll with If-None-Match get an
+empty 304 response until the schema changes, so serving a schema is little more than a dictionary
+lookup. If a definition fails to rebuild, the last good schema keeps being served.
+
+Schemas are served at the path of their definition file relative to the watched files, with a
+.schema.json suffix (e.g. definitions/roles/leaf.yml is served at /roles/leaf.schema.json). The
+root path (/) lists every schema with its ETag. Definitions only differing by their suffix (e.g.
+leaf.yml and leaf.json) would share a path, so only the first one found is served.
+
+Classes:
+    ServedSchema:
+        A response body prepared for serving, with its gzip compressed form and ETag.
+    SchemaStore:
+        Thread safe, in-memory store of the schemas being served, keyed by URL path.
+    SchemaServer:
+        Builds, watches and serves the schemas of a set of definition files over HTTP.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from jsnac.core.batch import BuildOptions, BuildResult, output_path_for, render_schema
+from jsnac.core.watch import Watcher
+
+SCHEMA_CONTENT_TYPE = "application/schema+json"
+INDEX_CONTENT_TYPE = "application/json"
+
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+
+@dataclass(frozen=True)
+class ServedSchema:
+    """
+    A response body prepared for serving, with its gzip compressed form and ETag.
+
+    Attributes:
+        body (bytes): The UTF-8 encoded response body.
+        gzipped (bytes): The gzip compressed response body.
+        etag (str): The quoted entity tag of the body.
+        content_type (str): The media type of the body.
+
+    Methods:
+        from_text(text: str, content_type: str = SCHEMA_CONTENT_TYPE) -> ServedSchema:
+            Prepares a response body from the text of a schema.
+        gzip_etag -> str:
+            The entity tag of the gzip compressed body.
+
+    """
+
+    body: bytes
+    gzipped: bytes
+    etag: str
+    content_type: str = SCHEMA_CONTENT_TYPE
+
+    @classmethod
+    def from_text(cls, text: str, content_type: str = SCHEMA_CONTENT_TYPE) -> "ServedSchema":
+        """
+        Prepares a response body from the text of a schema.
+
+        Bodies are compressed once, at the highest level, with a fixed timestamp so the same schema
+        always produces the same compressed body.
+
+        Args:
+            text (str): The schema (or other JSON document) to serve.
+            content_type (str): The media type of the document.
+
+        Returns:
+            ServedSchema: The prepared response body.
+
+        """
+        body = text.encode("utf-8")
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        return cls(body, gzip.compress(body, compresslevel=9, mtime=0), etag, content_type)
+
+    @property
+    def gzip_etag(self) -> str:
+        """The entity tag of the gzip compressed body, which must differ from that of the plain body."""
+        return f'{self.etag[:-1]}-gzip"'
+
+
+class SchemaStore:
+    """
+    Thread safe, in-memory store of the schemas being served, keyed by URL path.
+
+    The index of every schema (served at "/") is rebuilt whenever a schema is added, changed or
+    removed, so it is prepared in advance like the schemas themselves.
+
+    Methods:
+        get(path: str) -> ServedSchema | None:
+            Returns the schema (or the index) served at a URL path.
+        put(path: str, schema: str) -> ServedSchema:
+            Stores the schema served at a URL path.
+        remove(path: str) -> None:
+            Stops serving the schema at a URL path.
+        paths() -> list[str]:
+            Returns the URL paths of every stored schema.
+
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty SchemaStore."""
+        self._lock = threading.Lock()
+        self._schemas: dict[str, ServedSchema] = {}
+        self._index = self._build_index()
+
+    def _build_index(self) -> ServedSchema:
+        schemas = {path: {"etag": entry.etag} for path, entry in sorted(self._schemas.items())}
+        return ServedSchema.from_text(json.dumps({"schemas": schemas}, separators=(",", ":")), INDEX_CONTENT_TYPE)
+
+    def get(self, path: str) -> ServedSchema | None:
+        """
+        Returns the schema (or the index) served at a URL path.
+
+        Args:
+            path (str): The URL path, without a query string.
+
+        Returns:
+            ServedSchema | None: The prepared response, or None if nothing is served at the path.
+
+        """
+        if path == "/":
+            return self._index
+        return self._schemas.get(path)
+
+    def put(self, path: str, schema: str) -> ServedSchema:
+        """
+        Stores the schema served at a URL path.
+
+        Args:
+            path (str): The URL path to serve the schema at.
+            schema (str): The rendered schema.
+
+        Returns:
+            ServedSchema: The prepared response.
+
+        """
+        entry = ServedSchema.from_text(schema)
+        with self._lock:
+            previous = self._schemas.get(path)
+            self._schemas[path] = entry
+            if previous is None or previous.etag != entry.etag:
+                self._index = self._build_index()
+        return entry
+
+    def remove(self, path: str) -> None:
+        """
+        Stops serving the schema at a URL path.
+
+        Args:
+            path (str): The URL path of the schema.
+
+        """
+        with self._lock:
+            if self._schemas.pop(path, None) is not None:
+                self._index = self._build_index()
+
+    def paths(self) -> list[str]:
+        """
+        Returns the URL paths of every stored schema.
+
+        Returns:
+            list[str]: The URL paths, sorted.
+
+        """
+        with self._lock:
+            return sorted(self._schemas)
+
+
+class _StoreWatcher(Watcher):
+    # A Watcher that renders the schemas into a SchemaStore rather than writing them to files
+
+    def __init__(  # noqa: PLR0913
+        self,
+        paths: list[str],
+        store: SchemaStore,
+        *,
+        interval: float,
+        debounce: float,
+        json_input: bool,
+        options: BuildOptions,
+    ) -> None:
+        super().__init__(paths, interval=interval, debounce=debounce, json_input=json_input, options=options)
+        self.store = store
+
+    def url_path(self, path: Path) -> str:
+        return output_path_for(path, Path("/"), self._base).as_posix()
+
+    def _build_one(self, path: Path) -> BuildResult:
+        url_path = Path(self.url_path(path))
+        error = self._claim(path, url_path)
+        if error is not None:
+            return BuildResult(path, url_path, 0.0, error)
+        tic = time.perf_counter()
+        try:
+            schema, _ = render_schema(path, self.json_input, options=self.options, builder=self._builder(path))
+        except Exception as e:  # noqa: BLE001
+            # Keep serving the last good schema, a definition is often broken half way through an edit
+            return BuildResult(path, url_path, time.perf_counter() - tic, f"{type(e).__name__}: {e}")
+        self.store.put(url_path.as_posix(), schema)
+        return BuildResult(path, url_path, time.perf_counter() - tic)
+
+    def _removed(self, path: Path) -> None:
+        super()._removed(path)
+        self.store.remove(self.url_path(path))
+
+
+def _accepts_gzip(header: str | None) -> bool:
+    # True if an Accept-Encoding header allows gzip, i.e. lists it (or *) without q=0
+    for item in (header or "").split(","):
+        coding, *params = (p.strip() for p in item.split(";"))
+        if coding.lower() not in {"gzip", "*"}:
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _matches(header: str | None, etags: set[str]) -> bool:
+    # True if an If-None-Match header matches any of the entity tags (weak comparison)
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") in etags for tag in header.split(","))
+
+
+class _SchemaHandler(BaseHTTPRequestHandler):
+    # Serves the prepared responses of the server's SchemaStore, the store does all of the work up front
+
+    server: "_SchemaHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self._respond(include_body=True)
+
+    def do_HEAD(self) -> None:
+        self._respond(include_body=False)
+
+    def _respond(self, *, include_body: bool) -> None:
+        entry = self.server.store.get(urlsplit(self.path).path)
+        if entry is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "No schema at this path")
+            return
+        use_gzip = _accepts_gzip(self.headers.get("Accept-Encoding"))
+        etag = entry.gzip_etag if use_gzip else entry.etag
+        if _matches(self.headers.get("If-None-Match"), {entry.etag, entry.gzip_etag}):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(etag)
+            self.end_headers()
+            return
+        body = entry.gzipped if use_gzip else entry.body
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", entry.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self._send_cache_headers(etag)
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def _send_cache_headers(self, etag: str) -> None:
+        self.send_header("ETag", etag)
+        # Clients may keep the schema but must revalidate it, which is what makes polling cheap
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        logging.getLogger(__name__).debug("%s - %s", self.address_string(), format % args)
+
+
+class _SchemaHTTPServer(ThreadingHTTPServer):
+    # A ThreadingHTTPServer with the store its handlers serve from
+
+    def __init__(self, address: tuple[str, int], store: SchemaStore) -> None:
+        super().__init__(address, _SchemaHandler)
+        self.store = store
+
+
+class SchemaServer:
+    """
+    Builds, watches and serves the schemas of a set of definition files over HTTP.
+
+    Requests are handled on a thread each, while a background thread polls the definitions for
+    changes and swaps in rebuilt schemas. Schemas are always served compact, whatever the indent of
+    the build options.
+
+    Methods:
+        address -> tuple[str, int]:
+            The host and port the server is listening on.
+        build_all() -> list[BuildResult]:
+            Builds the schema for every watched definition file.
+        serve_forever(callback: Callable | None = None) -> None:
+            Serves requests and rebuilds changed schemas until shut down.
+        shutdown() -> None:
+            Stops serve_forever(), from another thread.
+        server_close() -> None:
+            Closes the listening socket.
+
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        paths: list[str],
+        *,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        interval: float = 0.25,
+        debounce: float = 0.1,
+        json_input: bool = False,
+        options: BuildOptions | None = None,
+    ) -> None:
+        """
+        Initializes the SchemaServer and starts listening, without building or serving anything yet.
+
+        Args:
+            paths (list[str]): Files, directories or glob patterns of definition files to serve.
+            host (str): The address to listen on.
+            port (int): The port to listen on, 0 to pick a free port.
+            interval (float): Seconds between polls for changed definitions.
+            debounce (float): Seconds a changed file must be left untouched before it is rebuilt.
+            json_input (bool): Treat every input as JSON.
+            options (BuildOptions | None): Options controlling how each schema is built.
+
+        """
+        self.log = logging.getLogger(__name__)
+        self.store = SchemaStore()
+        self.watcher = _StoreWatcher(
+            paths,
+            self.store,
+            interval=interval,
+            debounce=debounce,
+            json_input=json_input,
+            options=replace(options or BuildOptions(), indent=None),
+        )
+        self._httpd = _SchemaHTTPServer((host, port), self.store)
+        self._stop = threading.Event()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The host and port the server is listening on."""
+        host, port = self._httpd.server_address[:2]
+        return str(host), int(port)
+
+    def build_all(self) -> list[BuildResult]:
+        """
+        Builds the schema for every watched definition file.
+
+        Returns:
+            list[BuildResult]: The outcome of each build, the output path being the URL path served at.
+
+        """
+        return self.watcher.build_all()
+
+    def serve_forever(self, callback: Callable[[list[BuildResult]], object] | None = None) -> None:
+        """
+        Serves requests and rebuilds changed schemas until shut down.
+
+        Args:
+            callback (Callable | None): Called with the results of each rebuild, on the watcher thread.
+
+        """
+        self._stop.clear()
+        watcher = threading.Thread(target=self.watcher.run, args=(callback, self._stop), daemon=True)
+        watcher.start()
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._stop.set()
+            watcher.join()
+
+    def shutdown(self) -> None:
+        """Stops serve_forever(), from another thread."""
+        self._httpd.shutdown()
+
+    def server_close(self) -> None:
+        """Closes the listening socket."""
+        self._httpd.server_close()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+JSNAC Build Tracing
+
+This module provides structured timing events for each phase of a schema build, as a cheap
+alternative to debug logging the data being processed. A SchemaBuilder only measures and emits
+events if it was given a tracer, otherwise the tracing code is skipped entirely.
+
+The phases are:
+    read: Reading the definition file (jsnac.core.batch.render_schema only).
+    parse: Loading the YAML or JSON definition (add_yaml / add_json).
+    definitions: Building the $defs section from the built-in and custom kinds.
+    properties: Building the properties from the "schema" section, and pruning the $defs.
+    dedupe: Moving repeated subschemas to shared $defs entries (only with dedupe).
+    serialize: Serializing the schema to a string (build_schema only), or streaming it with its
+               properties built along the way (iter_schema / write_schema).
+
+Classes:
+    TraceEvent:
+        The duration and details of a single build phase.
+
+Functions:
+    log_tracer(logger: logging.Logger, level: int = logging.DEBUG) -> Tracer:
+        Returns a tracer that logs each event as a single line.
+    combine_tracers(*tracers: Tracer | None) -> Tracer | None:
+        Returns a tracer passing each event to every given tracer, or None if there are none.
+"""
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+# The phases of a build, in the order they run (read and dedupe do not run in every build)
+PHASES = ("read", "parse", "definitions", "properties", "dedupe", "serialize")
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    """
+    The duration and details of a single build phase.
+
+    Attributes:
+        phase (str): The build phase, one of PHASES.
+        seconds (float): Wall time taken by the phase.
+        detail (dict[str, Any]): Small, phase specific counters (e.g. the number of definitions built).
+
+    """
+
+    phase: str
+    seconds: float
+    detail: dict[str, Any] = field(default_factory=dict)
+
+
+# A tracer is any callable accepting a TraceEvent, e.g. list.append to collect them
+Tracer = Callable[[TraceEvent], object]
+
+
+def log_tracer(logger: logging.Logger, level: int = logging.DEBUG) -> Tracer:
+    """
+    Returns a tracer that logs each event as a single line.
+
+    Args:
+        logger (logging.Logger): The logger to write the events to.
+        level (int): The level to log the events at.
+
+    Returns:
+        Tracer: The tracer.
+
+    """
+
+    def trace(event: TraceEvent) -> None:
+        if logger.isEnabledFor(level):
+            detail = ", ".join(f"{k}={v}" for k, v in event.detail.items())
+            logger.log(level, "[TRACE] %s: %.6f seconds (%s)", event.phase, event.seconds, detail)
+
+    return trace
+
+
+def combine_tracers(*tracers: Tracer | None) -> Tracer | None:
+    """
+    Returns a tracer passing each event to every given tracer, or None if there are none.
+
+    Args:
+        *tracers (Tracer | None): The tracers to combine, None entries are skipped.
+
+    Returns:
+        Tracer | None: The combined tracer, a single tracer as is, or None to disable tracing.
+
+    """
+    active = [t for t in tracers if t is not None]
+    if len(active) <= 1:
+        return active[0] if active else None
+
+    def trace(event: TraceEvent) -> None:
+        for tracer in active:
+            tracer(event)
+
+    return trace
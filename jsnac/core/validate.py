@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+JSNAC Validator
+
+This module validates YAML and JSON documents against a (JSNAC generated) JSON schema. The schema
+is compiled once, including every regex pattern it contains, and can then be used to validate any
+number of documents, optionally across a pool of worker processes that each compile the schema once.
+References to unmodified built-in kinds (ipv4, mac, vlan, etc.) are checked directly (a single regex
+search or the native range checkers from jsnac.core.formats) instead of going through generic JSON
+Schema $ref, type and pattern keyword evaluation. String values of an enum (e.g. a choice kind with
+thousands of choices) are looked up in a set built up front instead of compared with each choice.
+
+Validation is performed by the jsonschema package, which is an optional dependency of JSNAC
+(pip install jsnac[validate]).
+
+Classes:
+    ValidationResult:
+        The outcome of validating a single document (any errors and the time taken).
+    Validator:
+        Compiles a schema once and validates many documents against it.
+"""
+
+import json
+import os
+import re
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.formats import KIND_CHECKERS
+from jsnac.core.kinds import BUILTIN_KINDS
+from jsnac.core.load import get_yaml_loader
+
+
+@dataclass(frozen=True)
+class ValidationResult:
+    """
+    The outcome of validating a single document.
+
+    Attributes:
+        path (Path): The document that was validated.
+        errors (tuple[str, ...]): Validation errors, formatted as "<path in document>: <message>".
+        seconds (float): Wall time taken to load and validate the document.
+
+    """
+
+    path: Path
+    errors: tuple[str, ...]
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        """True if the document is valid against the schema."""
+        return not self.errors
+
+
+def _import_jsonschema() -> Any:  # noqa: ANN401
+    try:
+        import jsonschema  # noqa: PLC0415
+    except ImportError as e:
+        msg = "Validation requires the jsonschema package, install it with: pip install jsnac[validate]"
+        raise ImportError(msg) from e
+    return jsonschema
+
+
+def _search(pattern: re.Pattern) -> Callable[[Any], bool]:
+    def check(value: Any) -> bool:  # noqa: ANN401
+        return isinstance(value, str) and pattern.search(value) is not None
+
+    return check
+
+
+def _native_refs(schema: dict, patterns: dict[str, re.Pattern]) -> dict[str, Callable[[Any], bool]]:
+    # Only kinds whose definition is untouched can be checked natively, a user kind may override one
+    definitions = schema.get("$defs", {}) if isinstance(schema, dict) else {}
+    refs = {}
+    for kind, check in KIND_CHECKERS.items():
+        definition = dict(BUILTIN_KINDS[kind])
+        if definitions.get(kind) != definition:
+            continue
+        # Per value, CPython's regex engine beats the pure Python string checkers (see
+        # benchmarks/bench_formats.py), the saving here comes from skipping the $ref evaluation
+        refs[f"#/$defs/{kind}"] = _search(patterns[definition["pattern"]]) if "pattern" in definition else check
+    return refs
+
+
+def _collect_enums(schema: Any) -> dict[int, frozenset[str]]:  # noqa: ANN401
+    # The string choices of every enum in the schema, keyed by the id of the enum's list
+    enums = {}
+    stack = [schema]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            enum = node.get("enum")
+            if isinstance(enum, list):
+                enums[id(enum)] = frozenset(choice for choice in enum if isinstance(choice, str))
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return enums
+
+
+def _collect_patterns(schema: Any, patterns: dict[str, re.Pattern]) -> None:  # noqa: ANN401
+    # Walk the whole schema so every regex is compiled up front rather than on first use
+    stack = [schema]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            pattern = node.get("pattern")
+            if isinstance(pattern, str) and pattern not in patterns:
+                patterns[pattern] = re.compile(pattern)
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+class Validator:
+    """
+    Compiles a schema once and validates many documents against it.
+
+    The JSON Schema draft is taken from the schema's $schema keyword (draft-07 if missing). Every
+    "pattern" in the schema is compiled when the Validator is created and reused for each document,
+    and the string choices of every "enum" are collected into a set for constant time lookups.
+    Values referencing an unmodified built-in kind are checked natively, falling back to the regular
+    $ref evaluation (and its error messages) only when the native check fails.
+
+    Methods:
+        from_builder(builder: SchemaBuilder) -> Validator:
+            Creates a Validator for the schema built by a SchemaBuilder.
+        iter_errors(instance: Any) -> Iterator[str]:
+            Yields the validation errors for a document that has already been loaded.
+        validate(instance: Any) -> list[str]:
+            Returns the validation errors for a document that has already been loaded.
+        validate_file(path: str | Path) -> ValidationResult:
+            Loads a YAML or JSON file and validates it.
+        validate_files(paths: Iterable[str | Path], workers: int | None = 1) -> Iterator[ValidationResult]:
+            Validates many files, optionally across a pool of worker processes.
+
+    """
+
+    def __init__(self, schema: dict | str, *, native: bool = True) -> None:
+        """
+        Initializes the Validator, compiling the schema.
+
+        Args:
+            schema (dict | str): The JSON schema, either as a dictionary or a JSON string.
+            native (bool): Check references to built-in kinds with the native checkers.
+
+        Raises:
+            ValueError: If the schema is not a valid JSON schema.
+
+        """
+        jsonschema = _import_jsonschema()
+        self.schema = json.loads(schema) if isinstance(schema, str) else schema
+        cls = jsonschema.validators.validator_for(self.schema, default=jsonschema.Draft7Validator)
+        try:
+            cls.check_schema(self.schema)
+        except jsonschema.SchemaError as e:
+            msg = f"Invalid JSON schema: {e.message}"
+            raise ValueError(msg) from e
+        self._error = jsonschema.ValidationError
+        self._patterns: dict[str, re.Pattern] = {}
+        _collect_patterns(self.schema, self._patterns)
+        self.native = native
+        self._native_refs = _native_refs(self.schema, self._patterns) if native else {}
+        self._enums = _collect_enums(self.schema)
+        self._ref_keyword = cls.VALIDATORS["$ref"]
+        self._enum_keyword = cls.VALIDATORS["enum"]
+        cls = jsonschema.validators.extend(cls, {"pattern": self._pattern, "$ref": self._ref, "enum": self._enum})
+        self._validator = cls(self.schema)
+
+    @classmethod
+    def from_builder(cls, builder: SchemaBuilder) -> "Validator":
+        """
+        Creates a Validator for the schema built by a SchemaBuilder.
+
+        Args:
+            builder (SchemaBuilder): A builder that already has data added to it.
+
+        Returns:
+            Validator: A Validator for the built schema.
+
+        """
+        return cls(builder.build_schema_dict())
+
+    def _pattern(self, validator: Any, pattern: str, instance: Any, schema: dict) -> Iterator[Any]:  # noqa: ANN401, ARG002
+        # Same as the jsonschema pattern keyword, but using the regexes compiled up front
+        if not isinstance(instance, str):
+            return
+        compiled = self._patterns.get(pattern)
+        if compiled is None:
+            compiled = self._patterns[pattern] = re.compile(pattern)
+        if not compiled.search(instance):
+            yield self._error(f"{instance!r} does not match {pattern!r}")
+
+    def _ref(self, validator: Any, ref: str, instance: Any, schema: dict) -> Iterator[Any]:  # noqa: ANN401
+        # Valid values for a built-in kind skip resolving the reference altogether
+        check = self._native_refs.get(ref)
+        if check is not None and check(instance):
+            return
+        yield from self._ref_keyword(validator, ref, instance, schema)
+
+    def _enum(self, validator: Any, enums: Any, instance: Any, schema: dict) -> Iterator[Any]:  # noqa: ANN401
+        # A string only equals a string, so its membership is a set lookup rather than a scan of the choices
+        choices = self._enums.get(id(enums))
+        if choices is None or not isinstance(instance, str):
+            yield from self._enum_keyword(validator, enums, instance, schema)
+        elif instance not in choices:
+            yield self._error(f"{instance!r} is not one of {enums!r}")
+
+    def iter_errors(self, instance: Any) -> Iterator[str]:  # noqa: ANN401
+        """
+        Yields the validation errors for a document that has already been loaded.
+
+        Args:
+            instance (Any): The document to validate.
+
+        Yields:
+            str: Each validation error, formatted as "<path in document>: <message>".
+
+        """
+        for error in self._validator.iter_errors(instance):
+            location = "/".join(str(p) for p in error.absolute_path) or "<root>"
+            yield f"{location}: {error.message}"
+
+    def validate(self, instance: Any) -> list[str]:  # noqa: ANN401
+        """
+        Returns the validation errors for a document that has already been loaded.
+
+        Args:
+            instance (Any): The document to validate.
+
+        Returns:
+            list[str]: The validation errors, empty if the document is valid.
+
+        """
+        return list(self.iter_errors(instance))
+
+    def validate_file(self, path: str | Path) -> ValidationResult:
+        """
+        Loads a YAML or JSON file and validates it.
+
+        Files with a .json suffix are parsed as JSON, anything else as YAML (with libyaml's
+        CSafeLoader when available). Files that cannot be read or parsed are reported as a single
+        error rather than raised.
+
+        Args:
+            path (str | Path): The file to validate.
+
+        Returns:
+            ValidationResult: The outcome of the validation.
+
+        """
+        import yaml  # noqa: PLC0415
+
+        path = Path(path)
+        tic = time.perf_counter()
+        try:
+            with path.open("rb") as f:
+                instance = json.load(f) if path.suffix == ".json" else yaml.load(f, Loader=get_yaml_loader())  # noqa: S506
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            return ValidationResult(path, (f"<file>: {type(e).__name__}: {e}",), time.perf_counter() - tic)
+        errors = tuple(self.iter_errors(instance))
+        return ValidationResult(path, errors, time.perf_counter() - tic)
+
+    def validate_files(self, paths: Iterable[str | Path], workers: int | None = 1) -> Iterator[ValidationResult]:
+        """
+        Validates many files, optionally across a pool of worker processes.
+
+        Each worker compiles the schema once when it starts. Results are yielded in the same order
+        as the paths, as soon as they are available.
+
+        Args:
+            paths (Iterable[str | Path]): The files to validate.
+            workers (int | None): Number of worker processes, None for the number of CPUs.
+                                  A value of 1 validates everything in the current process.
+
+        Yields:
+            ValidationResult: The outcome of validating each file.
+
+        """
+        paths = [Path(p) for p in paths]
+        workers = min(workers or os.cpu_count() or 1, len(paths)) or 1
+        if workers == 1:
+            yield from (self.validate_file(p) for p in paths)
+            return
+        chunksize = max(1, len(paths) // (workers * 4))
+        initargs = (self.schema, self.native)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+            yield from executor.map(_validate_worker, paths, chunksize=chunksize)
+
+
+# The Validator used by each worker process, compiled once by the pool initializer
+_worker_validator: Validator | None = None
+
+
+def _init_worker(schema: dict, native: bool) -> None:  # noqa: FBT001
+    global _worker_validator  # noqa: PLW0603
+    _worker_validator = Validator(schema, native=native)
+
+
+def _validate_worker(path: Path) -> ValidationResult:
+    if _worker_validator is None:
+        msg = "Validator worker has not been initialized"
+        raise RuntimeError(msg)
+    return _worker_validator.validate_file(path)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+JSNAC Watcher
+
+This module keeps schemas up to date while their definition files are being edited. A single,
+long-running process watches files, directories or glob patterns of definition files and rebuilds
+only the schemas whose sources changed, so there is no interpreter or PyYAML start-up cost per edit.
+
+Changes are detected by polling file modification times and sizes with os.stat, which works the
+same on every platform and filesystem (including network and container mounts where inotify events
+are not delivered). Bursts of writes (e.g. an editor saving via a temporary file) are debounced so
+each schema is only rebuilt once the file has settled. Each definition file keeps its own
+incremental SchemaBuilder, so an edit to a large definition only re-processes the changed branch.
+If two definition files map to the same schema (e.g. foo.yml and foo.json), the one found first
+keeps it and the other fails to build until one of them is renamed or removed. The choices files
+used by each definition (see jsnac.core.load.load_choices) are watched too, and a change to one
+rebuilds every definition using it.
+
+Classes:
+    Watcher:
+        Watches definition files and rebuilds the schemas of those that change.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from jsnac.core.batch import BuildOptions, BuildResult, build_file, collect_inputs, common_base, output_path_for
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.load import choices_files
+
+# (st_mtime_ns, st_size) of a definition file, used to detect changes
+Signature = tuple[int, int]
+
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+
+class Watcher:
+    """
+    Watches definition files and rebuilds the schemas of those that change.
+
+    Methods:
+        scan() -> dict[Path, Signature]:
+            Returns the current signature of every watched definition file.
+        build_all() -> list[BuildResult]:
+            Builds the schema for every watched definition file.
+        poll() -> list[BuildResult]:
+            Checks for changed files once and rebuilds their schemas.
+        run(callback: Callable | None = None, stop: threading.Event | None = None) -> None:
+            Polls for changes until stopped, passing the results of each rebuild to the callback.
+
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        paths: list[str],
+        output_dir: str | Path | None = None,
+        *,
+        interval: float = 0.25,
+        debounce: float = 0.1,
+        json_input: bool = False,
+        options: BuildOptions | None = None,
+    ) -> None:
+        """
+        Initializes the Watcher and takes an initial snapshot of the watched files.
+
+        Args:
+            paths (list[str]): Files, directories or glob patterns of definition files to watch.
+            output_dir (str | Path | None): Directory to mirror the schemas under, defaults to next to each input.
+            interval (float): Seconds between polls for changes.
+            debounce (float): Seconds a changed file must be left untouched before it is rebuilt.
+            json_input (bool): Treat every input as JSON.
+            options (BuildOptions | None): Options controlling how each schema is built.
+
+        """
+        self.log = logging.getLogger(__name__)
+        self.paths = paths
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.interval = interval
+        self.debounce = debounce
+        self.json_input = json_input
+        self.options = options or BuildOptions()
+        self._builders: dict[Path, SchemaBuilder] = {}
+        # The definition file each output is built from, to reject a second file mapping to the same output
+        self._owners: dict[Path, Path] = {}
+        # The choices files each definition used when last built, and their signatures (None if missing)
+        self._dependencies: dict[Path, list[Path]] = {}
+        self._dependency_snapshot: dict[Path, Signature | None] = {}
+        self._snapshot = self.scan()
+        # Fix the output layout at start-up so schemas do not move when files are added or removed
+        self._base = common_base(list(self._snapshot)) if self._snapshot else None
+
+    def scan(self) -> dict[Path, Signature]:
+        """
+        Returns the current signature of every watched definition file.
+
+        Returns:
+            dict[Path, Signature]: The (modification time, size) of each definition file.
+
+        """
+        signatures = {}
+        for path in collect_inputs(self.paths):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    @staticmethod
+    def _sign(files: Iterable[Path]) -> dict[Path, Signature | None]:
+        # The signature of each choices file, None for a missing file so that creating it is noticed
+        signatures: dict[Path, Signature | None] = {}
+        for file in files:
+            try:
+                stat = file.stat()
+            except OSError:
+                signatures[file] = None
+                continue
+            signatures[file] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def _builder(self, path: Path) -> SchemaBuilder:
+        builder = self._builders.get(path)
+        if builder is None:
+            builder = self._builders[path] = self.options.builder(incremental=True)
+        return builder
+
+    def _claim(self, path: Path, output_path: Path) -> str | None:
+        # Returns an error if the output is already built from another definition file
+        owner = self._owners.setdefault(output_path, path)
+        if owner != path:
+            return f"{owner} is already written to {output_path}, rename one of them"
+        return None
+
+    def _build_one(self, path: Path) -> BuildResult:
+        # Overridden by subclasses that keep the schemas somewhere other than files
+        output_path = output_path_for(path, self.output_dir, self._base)
+        error = self._claim(path, output_path)
+        if error is not None:
+            return BuildResult(path, output_path, 0.0, error)
+        return build_file(path, output_path, self.json_input, options=self.options, builder=self._builder(path))
+
+    def _removed(self, path: Path) -> None:
+        self.log.info("Definition file removed: %s", path)
+        self._builders.pop(path, None)
+        self._owners = {output: owner for output, owner in self._owners.items() if owner != path}
+        self._dependencies.pop(path, None)
+
+    def _build(self, paths: list[Path]) -> list[BuildResult]:
+        results = []
+        for path in paths:
+            results.append(self._build_one(path))
+            # Taken from the definition rather than the build, as an incremental build skips unchanged subschemas
+            data = getattr(self._builders.get(path), "data", None)
+            self._dependencies[path] = [Path(f) for f in choices_files(data)] if data is not None else []
+        # Choices files already watched keep their signature from before the build, so a change made during the
+        # build is picked up by the next poll, and files used for the first time are signed now
+        watched = set(itertools.chain.from_iterable(self._dependencies.values()))
+        previous = self._dependency_snapshot
+        self._dependency_snapshot = {f: s for f, s in previous.items() if f in watched}
+        self._dependency_snapshot.update(self._sign(watched - previous.keys()))
+        return results
+
+    def build_all(self) -> list[BuildResult]:
+        """
+        Builds the schema for every watched definition file.
+
+        Returns:
+            list[BuildResult]: The outcome of each build.
+
+        """
+        return self._build(list(self._snapshot))
+
+    def poll(self) -> list[BuildResult]:
+        """
+        Checks for changed files once and rebuilds their schemas.
+
+        If anything changed, the watcher waits until the files have been left untouched for the
+        debounce period before rebuilding, so a burst of writes only triggers a single rebuild.
+        A changed choices file rebuilds every definition that used it in its last build.
+
+        Returns:
+            list[BuildResult]: The outcome of each rebuild, empty if nothing changed.
+
+        """
+        current = self.scan()
+        dependencies = self._sign(self._dependency_snapshot)
+        if current == self._snapshot and dependencies == self._dependency_snapshot:
+            return []
+        # Wait for the writes to settle
+        while True:
+            time.sleep(self.debounce)
+            settled = self.scan(), self._sign(self._dependency_snapshot)
+            if settled == (current, dependencies):
+                break
+            current, dependencies = settled
+        changed = [p for p, signature in current.items() if self._snapshot.get(p) != signature]
+        # Definitions using a changed choices file are rebuilt too
+        files = {f for f, signature in dependencies.items() if self._dependency_snapshot.get(f) != signature}
+        changed += [p for p, used in self._dependencies.items() if p in current and files.intersection(used)]
+        for path in self._snapshot.keys() - current.keys():
+            self._removed(path)
+        self._snapshot = current
+        self._dependency_snapshot = dependencies
+        return self._build(list(dict.fromkeys(changed)))
+
+    def run(
+        self,
+        callback: Callable[[list[BuildResult]], object] | None = None,
+        stop: threading.Event | None = None,
+    ) -> None:
+        """
+        Polls for changes until stopped, passing the results of each rebuild to the callback.
+
+        Args:
+            callback (Callable | None): Called with the results of each rebuild.
+            stop (threading.Event | None): Event to stop watching. If None, runs until interrupted.
+
+        """
+        stop = stop or threading.Event()
+        while not stop.wait(self.interval):
+            results = self.poll()
+            if results and callback is not None:
+                callback(results)
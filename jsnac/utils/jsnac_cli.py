@@ -7,48 +7,201 @@ to JSON and build schemas. It includes functions for setting up logging, parsing
 and processing input files to infer schemas.
 
 Functions:
-    _setup_logging() -> logging.Logger:
+    _setup_logging(verbose: bool = False) -> logging.Logger:
         Sets up logging for the JSNAC CLI.
 
     parse_args(args: str | None = None) -> Namespace:
         Parses command-line arguments for the JSNAC CLI.
 
+    parse_validate_args(args: list[str]) -> Namespace:
+        Parses command-line arguments for the "jsnac validate" subcommand.
+
+    validate(args: list[str]) -> None:
+        Validates YAML/JSON files against a schema ("jsnac validate").
+
+    parse_watch_args(args: list[str]) -> Namespace:
+        Parses command-line arguments for the "jsnac watch" subcommand.
+
+    watch(args: list[str]) -> None:
+        Rebuilds schemas whenever their definitions change ("jsnac watch").
+
+    parse_serve_args(args: list[str]) -> Namespace:
+        Parses command-line arguments for the "jsnac serve" subcommand.
+
+    serve(args: list[str]) -> None:
+        Serves schemas over HTTP, rebuilding them whenever their definitions change ("jsnac serve").
+
     main(args: str | None = None) -> None:
         Main function for the JSNAC CLI. Parses command-line arguments, sets up logging,
         and processes input files to infer schemas.
 """
 
 # Dependencies (Standard Library)
+import json
 import logging
 import sys
 import time
 from argparse import ArgumentParser, Namespace
+from contextlib import nullcontext
 from pathlib import Path
+from typing import TextIO
+
+from jsnac import __version__
+from jsnac.core.batch import (
+    BuildOptions,
+    BuildResult,
+    build_many,
+    collect_inputs,
+    common_base,
+    output_path_for,
+    render_schema,
+    stream_schema,
+)
+from jsnac.core.cache import SchemaCache
+from jsnac.core.kinds import KindRegistry
+from jsnac.core.load import YAML_LOADERS
+from jsnac.core.serialize import SERIALIZERS
+from jsnac.core.trace import combine_tracers, log_tracer
+
 
-from jsnac import SchemaBuilder, __version__
+class _CLIHandler(logging.StreamHandler):
+    """The log handler added by the CLI, writing to whatever sys.stderr currently is."""
 
+    @property
+    def stream(self) -> TextIO:
+        """The current sys.stderr."""
+        return sys.stderr
 
-def _setup_logging() -> logging.Logger:
+    @stream.setter
+    def stream(self, _stream: TextIO) -> None:
+        # The stream is always looked up when writing, so it cannot go stale (e.g. if stderr is replaced)
+        pass
+
+
+def _setup_logging(verbose: bool = False) -> logging.Logger:  # noqa: FBT001, FBT002
     """
     Set up logging for the JSNAC CLI.
 
+    The level is set before the handler is attached, so nothing is logged (or formatted) at debug
+    level unless verbose output was requested. Calling this again (e.g. running main() more than
+    once in the same process) reuses the existing handler instead of adding another one.
+
+    Args:
+        verbose (bool): Log debug messages, including the timing of each build phase.
+
     Returns:
         logging.Logger: A logger instance for the JSNAC CLI.
 
     """
     log = logging.getLogger("jsnac")
-    log.setLevel(logging.DEBUG)
-    formatter = logging.Formatter("[%(levelname)s] - %(name)s - %(message)s")
-    ch = logging.StreamHandler()
-    ch.setFormatter(formatter)
-    log.addHandler(ch)
+    log.setLevel(logging.DEBUG if verbose else logging.INFO)
+    handler = next((h for h in log.handlers if isinstance(h, _CLIHandler)), None)
+    if handler is None:
+        handler = _CLIHandler()
+        handler.setFormatter(logging.Formatter("[%(levelname)s] - %(name)s - %(message)s"))
+        log.addHandler(handler)
     return log
 
 
+def _add_build_arguments(parser: ArgumentParser, *, files: bool = True) -> None:
+    """
+    Add the arguments controlling how each schema is built, shared by schema building subcommands.
+
+    Args:
+        parser (ArgumentParser): The parser to add the arguments to.
+        files (bool): Add the arguments that only apply to schemas written to files (--compact,
+                      --indent and --stream). Otherwise they are set to write compact schemas.
+
+    """
+    parser.add_argument(
+        "--prune-defs",
+        action="store_true",
+        help="Only include the $defs entries that are referenced by the schema",
+    )
+    if files:
+        parser.add_argument(
+            "--compact",
+            action="store_true",
+            help="Write the schema without any whitespace",
+        )
+        parser.add_argument(
+            "--indent",
+            type=int,
+            default=4,
+            help="Number of spaces to indent the schema by (default: 4)",
+        )
+    else:
+        parser.set_defaults(compact=True, indent=None, stream=False)
+    parser.add_argument(
+        "--sort-keys",
+        action="store_true",
+        help="Sort the keys of every object in the schema, for deterministic diffs",
+    )
+    parser.add_argument(
+        "--serializer",
+        choices=SERIALIZERS,
+        default="json",
+        help="JSON serializer to use, auto uses orjson if it is installed (default: json)",
+    )
+    parser.add_argument(
+        "--yaml-loader",
+        choices=YAML_LOADERS,
+        default="auto",
+        help="YAML loader to use, auto uses the libyaml C loader if PyYAML was built with it (default: auto)",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Move object and array subschemas repeated within a schema to shared $defs entries, referenced with $ref",
+    )
+    if files:
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Stream each schema to its file as it is built, so large schemas are never held in memory "
+            "(always uses the json serializer, and skips the build cache)",
+        )
+    parser.add_argument(
+        "-k",
+        "--kinds",
+        type=str,
+        metavar="FILE",
+        help="YAML/JSON file of custom js_kinds (e.g. a shared kinds library) available to every schema",
+    )
+
+
 def parse_args(args: str | None = None) -> Namespace:
     """
     Parse command-line arguments for the JSNAC CLI.
 
+    The command-line options are:
+        --version: Show the version of the application.
+        -f, --file (str, repeatable): Path to the YAML file to convert to JSON and build a schema. If given
+                                      more than once, the files are merged in order into a single schema.
+        -b, --batch (str, multiple): Files, directories or glob patterns to build schemas for in batch mode.
+        -m, --manifest (str): Path to a manifest file listing the inputs for batch mode.
+        -j, --json: Skip converting YAML to JSON and use JSON directly.
+        --prune-defs: Only include the $defs entries that are referenced by the schema.
+        --compact: Write the schema without any whitespace.
+        --indent (int, default=4): Number of spaces to indent the schema by.
+        --sort-keys: Sort the keys of every object in the schema.
+        --serializer (str, default="json"): JSON serializer to use (json, orjson or auto).
+        --yaml-loader (str, default="auto"): YAML loader to use (auto, c or python).
+        --dedupe: Move repeated object and array subschemas to shared $defs entries.
+        --stream: Stream each schema to its file as it is built, instead of rendering it in memory first.
+        -k, --kinds (str): Path to a YAML/JSON file of custom js_kinds available to every schema.
+        -o, --output (str, default="jsnac.schema.json"): Path to the output file.
+        --output-dir (str): Directory to write batch mode schemas to, mirroring the input layout.
+        -w, --workers (int): Number of worker processes to use in batch mode.
+        --no-cache: Always rebuild schemas instead of using the build cache.
+        --cache-dir (str): Directory to store the build cache in.
+        --cache-size (int, default=100): Maximum size of the build cache in MB.
+        --metrics-json (str): Path to write the build metrics of -f/--file to as JSON.
+        --trace-memory: Include the peak memory allocated by the build in the metrics.
+        --profile (str): Path to write a cProfile dump of the -f/--file build to.
+        -i, --infer: Infer a JSNAC definition (or schema) from plain YAML/JSON data files instead.
+        -v, --verbose: Increase log verbosity.
+
     Args:
         args (str | None): A string of arguments to parse. If None, the arguments
                            will be taken from sys.argv.
@@ -56,16 +209,11 @@ def parse_args(args: str | None = None) -> Namespace:
     Returns:
         argparse.Namespace: An object containing the parsed arguments.
 
-    Arguments:
-        --version: Show the version of the application.
-        -f, --file (str, required): Path to the YAML file to convert to JSON and build a schema.
-        -j, --json: Skip converting YAML to JSON and use JSON directly.
-        -o, --output (str, default="jsnac.schema.json"): Path to the output file.
-        -i, --infer: Attempt to infer the schema on an unmodified YAML/JSON file [In Development].
-        -v, --verbose: Increase log verbosity.
-
     """
-    parser = ArgumentParser(description="JSNAC CLI")
+    parser = ArgumentParser(
+        description="JSNAC CLI",
+        epilog="Subcommands: jsnac validate, jsnac watch, jsnac serve (see jsnac <subcommand> -h)",
+    )
     parser.add_argument(
         "--version",
         action="version",
@@ -76,8 +224,24 @@ def parse_args(args: str | None = None) -> Namespace:
         "-f",
         "--file",
         type=str,
-        required=True,
-        help="Path to the YAML file to convert to JSON and build a schema",
+        action="append",
+        help="Path to the YAML file to convert to JSON and build a schema. Repeat to merge several files "
+        "(e.g. a shared js_kinds library and a schema) in order into a single schema",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        type=str,
+        nargs="+",
+        default=[],
+        metavar="PATH",
+        help="Files, directories or glob patterns to build schemas for in batch mode",
+    )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        type=str,
+        help="Path to a manifest file listing the files, directories or glob patterns for batch mode",
     )
     parser.add_argument(
         "-j",
@@ -85,6 +249,7 @@ def parse_args(args: str | None = None) -> Namespace:
         action="store_true",
         help="Skip converting YAML to JSON and use JSON directly",
     )
+    _add_build_arguments(parser)
     parser.add_argument(
         "-o",
         "--output",
@@ -92,63 +257,552 @@ def parse_args(args: str | None = None) -> Namespace:
         default="jsnac.schema.json",
         help="Path to the output file (default: jsnac.schema.json)",
     )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help="Directory to write batch mode schemas to, mirroring the input layout (default: next to each input)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="Number of worker processes to use in batch mode (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always rebuild schemas instead of using the build cache",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Directory to store the build cache in (default: $XDG_CACHE_HOME/jsnac or ~/.cache/jsnac)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=100,
+        help="Maximum size of the build cache in MB (default: 100)",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=str,
+        metavar="FILE",
+        help="Write the build metrics (time per phase, node and $ref counts, peak memory) to a JSON file",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Include the peak memory allocated by the build in the metrics (slows the build down)",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="FILE",
+        help="Write a cProfile dump of the build to a file (view it with python -m pstats FILE)",
+    )
     parser.add_argument(
         "-i",
         "--infer",
         action="store_true",
-        help="Attempt to infer the schema on an unmodified YAML/JSON file [In Development]",
+        help="Infer the schema from plain YAML/JSON data (e.g. host_vars) given with -f/-b/-m instead. "
+        "Writes the inferred JSNAC definition if the output is a .yml/.yaml file, otherwise its schema",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Increase log verbosity")
+    # Check for an input before any unrecognized arguments, the same order argparse reports them in
+    flags, extras = parser.parse_known_args(args)
+    if not (flags.file or flags.batch or flags.manifest):
+        parser.error("the following arguments are required: -f/--file (or -b/--batch, -m/--manifest)")
+    if (flags.metrics_json or flags.profile) and (flags.infer or not flags.file):
+        parser.error("--metrics-json and --profile require -f/--file, and are not supported with -i/--infer")
+    if flags.trace_memory and not flags.metrics_json:
+        parser.error("--trace-memory requires --metrics-json")
+    if extras:
+        parser.error("unrecognized arguments: {}".format(" ".join(extras)))
+    return flags
+
+
+def _build_options(flags: Namespace) -> BuildOptions:
+    """
+    Collect the options controlling how each schema is built from the command-line arguments.
+
+    The kinds file (if any) is parsed once here, and the resulting KindRegistry shared by every build.
+
+    Args:
+        flags (Namespace): The parsed command-line arguments.
+
+    Returns:
+        BuildOptions: The build options.
+
+    """
+    return BuildOptions(
+        prune_defs=flags.prune_defs,
+        indent=None if flags.compact else flags.indent,
+        sort_keys=flags.sort_keys,
+        serializer=flags.serializer,
+        yaml_loader=flags.yaml_loader,
+        kinds=KindRegistry.from_file(flags.kinds, flags.yaml_loader) if flags.kinds else None,
+        dedupe=flags.dedupe,
+        stream=flags.stream,
+    )
+
+
+def _log_results(results: list[BuildResult], log: logging.Logger) -> int:
+    """
+    Log the outcome of each build.
+
+    Args:
+        results (list[BuildResult]): The build results.
+        log (logging.Logger): The CLI logger.
+
+    Returns:
+        int: The number of inputs that failed to build.
+
+    """
+    failed = 0
+    for result in results:
+        if result.ok:
+            status = "CACHED" if result.cached else "OK"
+            log.info("[%s] %s -> %s (%.4f seconds)", status, result.input_path, result.output_path, result.seconds)
+        else:
+            failed += 1
+            log.error("[FAILED] %s (%.4f seconds): %s", result.input_path, result.seconds, result.error)
+    return failed
+
+
+def _run_batch(flags: Namespace, log: logging.Logger, cache: SchemaCache | None) -> int:
+    """
+    Build schemas for every input matched by the batch and manifest arguments.
+
+    Args:
+        flags (Namespace): The parsed command-line arguments.
+        log (logging.Logger): The CLI logger.
+        cache (SchemaCache | None): The build cache, or None if disabled.
+
+    Returns:
+        int: The number of inputs that failed to build.
+
+    """
+    inputs = collect_inputs(flags.batch, flags.manifest)
+    output_dir = Path(flags.output_dir) if flags.output_dir else None
+    base = common_base(inputs)
+    jobs = [(i, output_path_for(i, output_dir, base)) for i in inputs]
+    log.info("Building %d schemas", len(jobs))
+    tic = time.perf_counter()
+    try:
+        results = build_many(
+            jobs, workers=flags.workers, json_input=flags.json, cache=cache, options=_build_options(flags)
+        )
+    except ValueError as e:
+        log.error("%s", e)  # noqa: TRY400
+        return len(jobs)
+    toc = time.perf_counter()
+    failed = _log_results(results, log)
+    built = len(results) - failed
+    log.info("Built %d of %d schemas in %.4f seconds (%d failed)", built, len(results), toc - tic, failed)
+    return failed
+
+
+def _run_single(flags: Namespace, log: logging.Logger, cache: SchemaCache | None) -> None:
+    """
+    Build the schema for the -f/--file input(s), optionally collecting metrics and a profile of the build.
+
+    Args:
+        flags (Namespace): The parsed command-line arguments.
+        log (logging.Logger): The CLI logger.
+        cache (SchemaCache | None): The build cache, or None if disabled.
+
+    """
+    input_files = [Path(f) for f in flags.file]
+    log.debug("Using %s file(s): %s", "JSON" if flags.json else "YAML", ", ".join(flags.file))
+    options = _build_options(flags)
+    metrics = None
+    if flags.metrics_json:
+        from jsnac.core.metrics import BuildMetrics  # noqa: PLC0415
+
+        metrics = BuildMetrics()
+    # Report the timing of each build phase when verbose, rather than the data being processed
+    tracer = combine_tracers(metrics, log_tracer(log) if flags.verbose else None)
+    builder = options.builder(tracer=tracer) if tracer else None
+    profiler = None
+    if flags.profile:
+        import cProfile  # noqa: PLC0415
+
+        profiler = cProfile.Profile()
+    # Build the schema (unless unchanged since the last build) and record the time taken
+    schema_file = Path(flags.output)
+    schema, cached = None, False
+    tic = time.perf_counter()
+    with metrics.track_memory() if metrics and flags.trace_memory else nullcontext():
+        if profiler:
+            profiler.enable()
+        try:
+            if options.stream:
+                # The schema is written as it is built, so there is no separate write
+                stream_schema(input_files, schema_file, flags.json, options, builder=builder)
+            else:
+                schema, cached = render_schema(input_files, flags.json, cache, options, builder=builder)
+        finally:
+            if profiler:
+                profiler.disable()
+    toc = time.perf_counter()
+    duration = toc - tic
+    outcome = "loaded from cache" if cached else "built and streamed" if schema is None else "built"
+    log.info("Schema %s in %.4f seconds", outcome, duration)
+    # Write the schema to a file
+    if schema is not None:
+        with metrics.phase("write") if metrics else nullcontext(), schema_file.open(mode="w", encoding="utf-8") as f:
+            f.write(schema)
+    log.info("Schema written to: %s", schema_file)
+    if profiler:
+        profiler.dump_stats(flags.profile)
+        log.info("Profile written to: %s", flags.profile)
+    if metrics:
+        inputs = [str(f) for f in input_files]
+        report = {"input": inputs[0] if len(inputs) == 1 else inputs, "cached": cached, **metrics.as_dict()}
+        Path(flags.metrics_json).write_text(json.dumps(report, indent=4), encoding="utf-8")
+        log.info("Metrics written to: %s", flags.metrics_json)
+
+
+def _run_infer(flags: Namespace, log: logging.Logger) -> int:
+    """
+    Infer a JSNAC definition from the data files matched by the file, batch and manifest arguments.
+
+    The definition is written as YAML if the output is a .yml/.yaml file, otherwise the schema is
+    built from it (with the regular build options) and written instead.
+
+    Args:
+        flags (Namespace): The parsed command-line arguments.
+        log (logging.Logger): The CLI logger.
+
+    Returns:
+        int: The number of files that could not be read or parsed.
+
+    """
+    from jsnac.core.infer import infer_files  # noqa: PLC0415
+
+    inputs = [Path(f) for f in flags.file or []]
+    if flags.batch or flags.manifest:
+        inputs += collect_inputs(flags.batch, flags.manifest)
+    log.info("Inferring the schema of %d files", len(inputs))
+    tic = time.perf_counter()
+    inferrer = infer_files(inputs, workers=flags.workers, json_input=flags.json, yaml_loader=flags.yaml_loader)
+    definition = inferrer.definition()
+    for error in inferrer.errors:
+        log.error("[FAILED] %s", error)
+    log.info("Inferred from %d documents in %.4f seconds", inferrer.documents, time.perf_counter() - tic)
+    output = Path(flags.output)
+    if output.suffix in {".yml", ".yaml"}:
+        import yaml  # noqa: PLC0415
+
+        output.write_text(yaml.safe_dump(definition, sort_keys=False), encoding="utf-8")
+        log.info("Definition written to: %s", output)
+    else:
+        options = _build_options(flags)
+        builder = options.builder()
+        builder.add_json(json.dumps(definition))
+        output.write_text(builder.build_schema(indent=options.indent, sort_keys=options.sort_keys), encoding="utf-8")
+        log.info("Schema written to: %s", output)
+    return len(inferrer.errors)
+
+
+def parse_validate_args(args: list[str]) -> Namespace:
+    """
+    Parse command-line arguments for the "jsnac validate" subcommand.
+
+    The command-line options are:
+        PATH (str, multiple): Files, directories or glob patterns of YAML/JSON documents to validate.
+        -s, --schema (str): Path to a JSON schema to validate against.
+        -f, --file (str, repeatable): Path to a JSNAC definition to build the schema from instead.
+        -j, --json: Parse the JSNAC definition as JSON.
+        -w, --workers (int): Number of worker processes to validate with.
+        -v, --verbose: Increase log verbosity.
+
+    Args:
+        args (list[str]): The arguments following "validate".
+
+    Returns:
+        argparse.Namespace: An object containing the parsed arguments.
+
+    """
+    parser = ArgumentParser(prog="jsnac validate", description="Validate YAML/JSON files against a schema")
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="PATH",
+        help="Files, directories or glob patterns of YAML/JSON documents to validate",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-s", "--schema", type=str, help="Path to a JSON schema to validate against")
+    source.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        action="append",
+        help="Path to a JSNAC definition to build the schema from, repeat to merge several definitions",
+    )
+    parser.add_argument("-j", "--json", action="store_true", help="Parse the JSNAC definition as JSON")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="Number of worker processes to validate with (default: number of CPUs)",
     )
     parser.add_argument("-v", "--verbose", action="store_true", help="Increase log verbosity")
     return parser.parse_args(args)
 
 
+def validate(args: list[str]) -> None:
+    """
+    Validates YAML/JSON files against a schema ("jsnac validate").
+
+    The schema is either read from a JSON schema file or built from a JSNAC definition, compiled
+    once, and then used to validate every matched document across a pool of worker processes.
+    The CLI exits with a non-zero status if any document is invalid.
+
+    Args:
+        args (list[str]): The arguments following "validate".
+
+    """
+    from jsnac.core.validate import Validator  # noqa: PLC0415
+
+    flags = parse_validate_args(args)
+    log = _setup_logging(flags.verbose)
+    if flags.schema:
+        validator = Validator(Path(flags.schema).read_text(encoding="utf-8"))
+    else:
+        schema, _ = render_schema([Path(f) for f in flags.file], flags.json)
+        validator = Validator(schema)
+    paths = collect_inputs(flags.paths)
+    log.info("Validating %d files", len(paths))
+    tic = time.perf_counter()
+    invalid = 0
+    for result in validator.validate_files(paths, workers=flags.workers):
+        if result.ok:
+            log.debug("[VALID] %s (%.4f seconds)", result.path, result.seconds)
+            continue
+        invalid += 1
+        log.error("[INVALID] %s (%.4f seconds)", result.path, result.seconds)
+        for error in result.errors:
+            log.error("    %s", error)
+    toc = time.perf_counter()
+    log.info("Validated %d files in %.4f seconds (%d invalid)", len(paths), toc - tic, invalid)
+    sys.exit(1 if invalid else 0)
+
+
+def parse_watch_args(args: list[str]) -> Namespace:
+    """
+    Parse command-line arguments for the "jsnac watch" subcommand.
+
+    The command-line options are:
+        PATH (str, multiple): Files, directories or glob patterns of JSNAC definitions to watch.
+        -j, --json: Parse every definition as JSON.
+        --prune-defs, --compact, --indent, --sort-keys, --serializer, --yaml-loader, --dedupe, --stream, -k: As for
+            a regular schema build.
+        --output-dir (str): Directory to write the schemas to, mirroring the input layout.
+        --interval (float, default=0.25): Seconds between checks for changed files.
+        --debounce (float, default=0.1): Seconds a changed file must be left untouched before rebuilding.
+        -v, --verbose: Increase log verbosity.
+
+    Args:
+        args (list[str]): The arguments following "watch".
+
+    Returns:
+        argparse.Namespace: An object containing the parsed arguments.
+
+    """
+    parser = ArgumentParser(prog="jsnac watch", description="Rebuild schemas whenever their definitions change")
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="PATH",
+        help="Files, directories or glob patterns of JSNAC definitions to watch",
+    )
+    parser.add_argument("-j", "--json", action="store_true", help="Parse every definition as JSON")
+    _add_build_arguments(parser)
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help="Directory to write the schemas to, mirroring the input layout (default: next to each input)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.25,
+        help="Seconds between checks for changed files (default: 0.25)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.1,
+        help="Seconds a changed file must be left untouched before it is rebuilt (default: 0.1)",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Increase log verbosity")
+    return parser.parse_args(args)
+
+
+def watch(args: list[str]) -> None:
+    """
+    Rebuilds schemas whenever their definitions change ("jsnac watch").
+
+    Every schema is built once on start-up, after which the definitions are polled for changes and
+    only the schemas of modified (or newly added) definitions are rebuilt, in the same process.
+    Runs until interrupted (Ctrl+C).
+
+    Args:
+        args (list[str]): The arguments following "watch".
+
+    """
+    from jsnac.core.watch import Watcher  # noqa: PLC0415
+
+    flags = parse_watch_args(args)
+    log = _setup_logging(flags.verbose)
+    watcher = Watcher(
+        flags.paths,
+        flags.output_dir,
+        interval=flags.interval,
+        debounce=flags.debounce,
+        json_input=flags.json,
+        options=_build_options(flags),
+    )
+    _log_results(watcher.build_all(), log)
+    log.info("Watching for changes, press Ctrl+C to stop")
+    try:
+        watcher.run(lambda results: _log_results(results, log))
+    except KeyboardInterrupt:
+        log.info("Stopped watching")
+    sys.exit(0)
+
+
+def parse_serve_args(args: list[str]) -> Namespace:
+    """
+    Parses command-line arguments for the "jsnac serve" subcommand.
+
+    Schemas are always served as compact JSON, so the --compact, --indent and --stream options of
+    the other subcommands are not accepted. The command-line options are:
+        PATH (str): One or more files, directories or glob patterns of JSNAC definitions to serve.
+        -j, --json: Parse every definition as JSON (otherwise only .json files are).
+        --prune-defs, --sort-keys, --serializer, --yaml-loader, --dedupe, -k: As for a regular schema build.
+        --host (str, default=127.0.0.1): Address to listen on.
+        --port (int, default=8000): Port to listen on.
+        --interval (float, default=0.25): Seconds between checks for changed files.
+        --debounce (float, default=0.1): Seconds a changed file must be left untouched before rebuilding.
+        -v, --verbose: Increase log verbosity (and log every request).
+
+    Args:
+        args (list[str]): The arguments following "serve".
+
+    Returns:
+        Namespace: The parsed arguments.
+
+    """
+    parser = ArgumentParser(
+        prog="jsnac serve",
+        description="Serve schemas over HTTP, rebuilding them whenever their definitions change",
+        epilog="Schemas are always served as compact JSON",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="PATH",
+        help="Files, directories or glob patterns of JSNAC definitions to serve",
+    )
+    parser.add_argument("-j", "--json", action="store_true", help="Parse every definition as JSON")
+    _add_build_arguments(parser, files=False)
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.25,
+        help="Seconds between checks for changed files (default: 0.25)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.1,
+        help="Seconds a changed file must be left untouched before it is rebuilt (default: 0.1)",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Increase log verbosity")
+    return parser.parse_args(args)
+
+
+def serve(args: list[str]) -> None:
+    """
+    Serves schemas over HTTP, rebuilding them whenever their definitions change ("jsnac serve").
+
+    Every schema is built once on start-up and kept in memory, after which the definitions are
+    polled for changes as with "jsnac watch". Runs until interrupted (Ctrl+C).
+
+    Args:
+        args (list[str]): The arguments following "serve".
+
+    """
+    from jsnac.core.serve import SchemaServer  # noqa: PLC0415
+
+    flags = parse_serve_args(args)
+    log = _setup_logging(flags.verbose)
+    server = SchemaServer(
+        flags.paths,
+        host=flags.host,
+        port=flags.port,
+        interval=flags.interval,
+        debounce=flags.debounce,
+        json_input=flags.json,
+        options=_build_options(flags),
+    )
+    _log_results(server.build_all(), log)
+    host, port = server.address
+    log.info("Serving schemas on http://%s:%s/, press Ctrl+C to stop", host, port)
+    try:
+        server.serve_forever(lambda results: _log_results(results, log))
+    except KeyboardInterrupt:
+        log.info("Stopped serving")
+    finally:
+        server.server_close()
+    sys.exit(0)
+
+
+# Subcommands are dispatched on the first argument, anything else is a regular schema build
+SUBCOMMANDS = {
+    "validate": validate,
+    "watch": watch,
+    "serve": serve,
+}
+
+
 def main(args: str | None = None) -> None:
     """
     Main function for the JSNAC CLI.
 
     This function parses command-line arguments, sets up logging, and processes
     an input file (either JSON or YAML) to infer a schema using the SchemaBuilder
-    class. The inferred schema is then written to an output file.
+    class. The inferred schema is then written to an output file. In batch mode
+    every matched input is built across a process pool instead, and the CLI exits
+    with a non-zero status if any of them failed. If the first argument is a
+    subcommand (e.g. validate), it is run instead.
 
     Args:
         args (str | None): Command-line arguments as a string. If None, arguments
                            will be parsed from sys.argv.
 
     """
+    argv = list(sys.argv[1:] if args is None else args)
+    if argv and argv[0] in SUBCOMMANDS:
+        SUBCOMMANDS[argv[0]](argv[1:])
     flags: Namespace = parse_args(args)
-    log = _setup_logging()
-    if flags.verbose:
-        log.setLevel(logging.DEBUG)
-    else:
-        log.setLevel(logging.INFO)
+    log = _setup_logging(flags.verbose)
     log.info("Starting JSNAC CLI")
-    # File is required but checking anyway
-    if flags.file:
-        input_file = Path(flags.file)
-        jsnac = SchemaBuilder()
-        if flags.json:
-            log.debug("Using JSON file: %s", flags.file)
-            with input_file.open(encoding="utf-8") as f:
-                jsnac.add_json(f.read())
-                f.close()
-        else:
-            log.debug("Using YAML file: %s", flags.file)
-            with input_file.open(encoding="utf-8") as f:
-                jsnac.add_yaml(f.read())
-                f.close()
-        # Build the schema and record the time taken
-        tic = time.perf_counter()
-        schema = jsnac.build_schema()
-        toc = time.perf_counter()
-        duration = toc - tic
-        log.info("Schema built in %.4f seconds", duration)
-        # Write the schema to a file
-        schema_file = Path(flags.output)
-        with schema_file.open(mode="w", encoding="utf-8") as f:
-            f.write(schema)
-        log.info("Schema written to: %s", schema_file)
+    cache = None if flags.no_cache else SchemaCache(flags.cache_dir, flags.cache_size * 1024 * 1024)
+    failed = 0
+    if flags.infer:
+        failed = _run_infer(flags, log)
+    elif flags.batch or flags.manifest:
+        failed = _run_batch(flags, log, cache)
+    if flags.file and not flags.infer:
+        _run_single(flags, log, cache)
     log.info("JSNAC CLI complete")
-    sys.exit(0)
+    sys.exit(1 if failed else 0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from jsnac.core.aio import abuild_many, arender_schema, avalidate_files
+from jsnac.core.batch import render_schema
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.validate import Validator
+
+EXAMPLE = Path("data/example-jsnac.yml")
+
+
+# Test a builder can add a file and build a schema from a coroutine
+def test_builder_async() -> None:
+    async def build() -> list[str]:
+        jsnac = SchemaBuilder()
+        await jsnac.aadd_file(EXAMPLE)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return await asyncio.gather(*(jsnac.abuild(indent=None, executor=executor) for _ in range(4)))
+
+    schemas = asyncio.run(build())
+    jsnac = SchemaBuilder()
+    jsnac.add_file(EXAMPLE)
+    assert schemas == [jsnac.build_schema(indent=None)] * 4
+
+
+# Test many schemas are rendered concurrently, in order, in threads or processes
+def test_abuild_many(tmp_path) -> None:
+    bad = tmp_path / "bad.yml"
+    bad.write_text("schema: [", encoding="utf-8")
+    inputs = [EXAMPLE, Path("data/example-jsnac.json")] * 3
+    expected = [render_schema(i)[0] for i in inputs]
+    assert asyncio.run(abuild_many(inputs, limit=2)) == expected
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert asyncio.run(abuild_many(inputs, executor=executor)) == expected
+    results = asyncio.run(abuild_many([EXAMPLE, bad], return_exceptions=True))
+    assert results[0] == expected[0]
+    assert isinstance(results[1], ValueError)
+    with pytest.raises(ValueError, match="Invalid YAML data"):
+        asyncio.run(abuild_many([bad]))
+    assert asyncio.run(arender_schema(EXAMPLE)) == (expected[0], False)
+
+
+# Test many files are validated concurrently, in order
+def test_avalidate_files(tmp_path) -> None:
+    validator = Validator(render_schema(EXAMPLE)[0])
+    invalid = tmp_path / "invalid.yml"
+    invalid.write_text(json.dumps({"chassis": {"hostname": 1}}), encoding="utf-8")
+    paths = [Path("data/example.yml"), invalid, tmp_path / "missing.yml"]
+    results = asyncio.run(avalidate_files(validator, paths, limit=2))
+    assert [r.path for r in results] == paths
+    assert [r.ok for r in results] == [True, False, False]
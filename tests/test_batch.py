@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from jsnac.core.batch import (
+    BuildOptions,
+    build_file,
+    build_many,
+    collect_inputs,
+    common_base,
+    output_path_for,
+    render_schema,
+    stream_schema,
+)
+from jsnac.core.cache import SchemaCache
+from jsnac.core.trace import PHASES, TraceEvent
+
+
+def _make_tree(tmp_path) -> Path:
+    root = tmp_path / "defs"
+    (root / "group_vars").mkdir(parents=True)
+    (root / "host_vars").mkdir(parents=True)
+    shutil.copy("data/example-jsnac.yml", root / "group_vars" / "all.yml")
+    shutil.copy("data/example-jsnac.json", root / "host_vars" / "spine1.json")
+    (root / "host_vars" / "spine1.schema.json").write_text("{}", encoding="utf-8")
+    (root / "host_vars" / "notes.txt").write_text("ignored", encoding="utf-8")
+    return root
+
+
+# Test that directories are searched recursively and generated schemas are skipped
+def test_collect_directory(tmp_path) -> None:
+    root = _make_tree(tmp_path)
+    inputs = collect_inputs([str(root)])
+    assert inputs == [root / "group_vars" / "all.yml", root / "host_vars" / "spine1.json"]
+
+
+# Test that glob patterns and manifest entries are expanded and de-duplicated
+def test_collect_glob_and_manifest(tmp_path) -> None:
+    root = _make_tree(tmp_path)
+    manifest = root / "manifest.txt"
+    manifest.write_text("# Shared definitions\ngroup_vars/all.yml\n\nhost_vars/*.json\n", encoding="utf-8")
+    inputs = collect_inputs([str(root / "**" / "*.yml")], str(manifest))
+    assert inputs == [root / "group_vars" / "all.yml", root / "host_vars" / "spine1.json"]
+
+
+# Test output paths are either next to the input or mirrored under an output directory
+def test_output_paths(tmp_path) -> None:
+    root = _make_tree(tmp_path)
+    inputs = collect_inputs([str(root)])
+    base = common_base(inputs)
+    assert output_path_for(inputs[0]) == root / "group_vars" / "all.schema.json"
+    assert output_path_for(inputs[1], tmp_path / "out", base) == tmp_path / "out" / "host_vars" / "spine1.schema.json"
+
+
+# Test a failed build is reported in the result rather than raised
+def test_build_file_failure(tmp_path) -> None:
+    result = build_file(tmp_path / "missing.yml", tmp_path / "missing.schema.json")
+    assert not result.ok
+    assert "FileNotFoundError" in result.error
+
+
+# Test that inputs mapping to the same output path are rejected before anything is built
+def test_build_many_collision(tmp_path) -> None:
+    jobs = [
+        (Path(f"data/example-jsnac{suffix}"), tmp_path / "example-jsnac.schema.json") for suffix in (".yml", ".json")
+    ]
+    with pytest.raises(ValueError, match="would both be written to"):
+        build_many(jobs, workers=2)
+    assert not (tmp_path / "example-jsnac.schema.json").exists()
+
+
+# Test a streamed build writes the same schema, and leaves nothing behind if it fails
+def test_build_file_stream(tmp_path) -> None:
+    source = Path("data/example-jsnac.yml")
+    output = tmp_path / "out" / "example.schema.json"
+    result = build_file(source, output, options=BuildOptions(stream=True, sort_keys=True))
+    assert result.ok
+    assert not result.cached
+    assert output.read_text(encoding="utf-8") == render_schema(source, options=BuildOptions(sort_keys=True))[0]
+    (tmp_path / "bad.yml").write_text("schema: [", encoding="utf-8")
+    result = build_file(tmp_path / "bad.yml", tmp_path / "bad.schema.json", options=BuildOptions(stream=True))
+    assert not result.ok
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bad.yml", "out"]
+
+
+# Test that a batch builds the same schemas in-process and across a process pool
+def test_build_many(tmp_path) -> None:
+    root = _make_tree(tmp_path)
+    inputs = collect_inputs([str(root)])
+    base = common_base(inputs)
+    for workers in (1, 2):
+        out = tmp_path / f"out{workers}"
+        jobs = [(i, output_path_for(i, out, base)) for i in inputs]
+        results = build_many(jobs, workers=workers)
+        assert [r.input_path for r in results] == inputs
+        assert all(r.ok for r in results)
+        schema = json.loads((out / "group_vars" / "all.schema.json").read_text(encoding="utf-8"))
+        assert schema["title"] == "Example Schema"
+
+
+# Test several definition files are merged into one schema, and cached as a whole
+def test_render_merged(tmp_path) -> None:
+    kinds = tmp_path / "kinds.yml"
+    role = tmp_path / "role.json"
+    kinds.write_text("js_kinds:\n  site:\n    type: pattern\n    regex: ^lon$\n", encoding="utf-8")
+    role.write_text(json.dumps({"schema": {"a": {"js_kind": {"name": "site"}}}}), encoding="utf-8")
+    cache = SchemaCache(tmp_path / "cache")
+    schema, cached = render_schema([kinds, role], cache=cache)
+    assert not cached
+    assert json.loads(schema)["properties"]["a"]["$ref"] == "#/$defs/site"
+    assert render_schema([kinds, role], cache=cache) == (schema, True)
+    # Swapping the order merges differently, so must not hit the same cache entry
+    assert not render_schema([role, kinds], cache=cache)[1]
+
+
+# Test the cache key covers the choices files of a definition, resolved relative to the definition
+def test_render_choices_file(tmp_path) -> None:
+    choices = tmp_path / "sites.txt"
+    choices.write_text("lon\n", encoding="utf-8")
+    definition = tmp_path / "sites.json"
+    site = {"js_kind": {"name": "choice", "choices_file": "sites.txt"}}
+    definition.write_text(json.dumps({"schema": {"site": site}}), encoding="utf-8")
+    cache = SchemaCache(tmp_path / "cache")
+    schema, cached = render_schema(definition, cache=cache)
+    assert not cached
+    assert json.loads(schema)["properties"]["site"]["enum"] == ["lon"]
+    assert render_schema(definition, cache=cache) == (schema, True)
+    choices.write_text("lon\nnyc\n", encoding="utf-8")
+    schema, cached = render_schema(definition, cache=cache)
+    assert not cached
+    assert json.loads(schema)["properties"]["site"]["enum"] == ["lon", "nyc"]
+    # A definition only mentioning choices_file is cached as usual
+    other = tmp_path / "other.json"
+    other.write_text(json.dumps({"header": {"title": "choices_file"}, "schema": {}}), encoding="utf-8")
+    render_schema(other, cache=cache)
+    assert render_schema(other, cache=cache)[1]
+
+
+# Test every phase traced by a build, streamed or not, is one of PHASES, in the order of PHASES
+def test_traced_phases(tmp_path) -> None:
+    definition = Path("data/example-jsnac.yml")
+    output_path = tmp_path / "example.schema.json"
+    for options in (BuildOptions(), BuildOptions(dedupe=True)):
+        events: list[TraceEvent] = []
+        render_schema(definition, options=options, builder=options.builder(tracer=events.append))
+        phases = [e.phase for e in events]
+        assert phases == [p for p in PHASES if p != "dedupe" or options.dedupe]
+        events.clear()
+        stream_schema(definition, output_path, options=options, builder=options.builder(tracer=events.append))
+        streamed = [e.phase for e in events]
+        assert streamed == sorted(streamed, key=PHASES.index)
+        assert "read" in streamed
@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
 import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import pytest
+import yaml
 
 from jsnac.core.build import SchemaBuilder
+from jsnac.core.kinds import BUILTIN_KIND_NAMES, BUILTIN_KINDS, KindRegistry
+from jsnac.core.load import get_yaml_loader, merge_definitions
+from jsnac.core.serialize import get_serializer
+from jsnac.core.trace import PHASES, TraceEvent
+from jsnac.core.validate import Validator
 
 
 # Test that bad JSON data raises an exception
@@ -179,3 +189,448 @@ def test_default_schema_types(js_kind) -> None:
     jsnac.add_json(json.dumps(data))
     schema = json.loads(jsnac.build_schema())
     assert schema["properties"]["test_object"]["type"] == f"{js_kind}"
+
+
+# Test the built-in kinds registry is read-only and not modified by builds
+def test_builtin_kinds_read_only() -> None:
+    assert "ipv4" in BUILTIN_KIND_NAMES
+    with pytest.raises(TypeError):
+        BUILTIN_KINDS["ipv4"]["pattern"] = "changed"  # type: ignore[index]
+    jsnac = SchemaBuilder()
+    jsnac.add_json(json.dumps({"js_kinds": {"ipv4": {"type": "pattern", "regex": "^override$"}}}))
+    schema = json.loads(jsnac.build_schema())
+    assert schema["$defs"]["ipv4"]["pattern"] == "^override$"
+    assert BUILTIN_KINDS["ipv4"]["pattern"] != "^override$"
+
+
+# Test that only referenced definitions are emitted when pruning is enabled
+def test_prune_defs() -> None:
+    data = {
+        "js_kinds": {
+            "used": {"type": "pattern", "regex": "^a$"},
+            "unused": {"type": "pattern", "regex": "^b$"},
+        },
+        "schema": {
+            "address": {"js_kind": {"name": "ipv4"}},
+            "nested": {"items": {"js_kind": {"name": "used"}}},
+            "name": {"js_kind": {"name": "string"}},
+        },
+    }
+    jsnac = SchemaBuilder(prune_defs=True)
+    jsnac.add_json(json.dumps(data))
+    schema = json.loads(jsnac.build_schema())
+    assert set(schema["$defs"]) == {"ipv4", "used"}
+    # The default is to keep every definition
+    jsnac = SchemaBuilder()
+    jsnac.add_json(json.dumps(data))
+    schema = json.loads(jsnac.build_schema())
+    assert {"ipv4", "mac", "used", "unused"} <= set(schema["$defs"])
+
+
+# Test the schema output format options
+def test_output_format() -> None:
+    jsnac = SchemaBuilder()
+    jsnac.add_yaml("header:\n  title: Format\nschema:\n  a:\n    js_kind: {name: vlan}\n")
+    pretty = jsnac.build_schema()
+    compact = jsnac.build_schema(indent=None)
+    assert json.loads(pretty) == json.loads(compact)
+    assert compact == json.dumps(json.loads(pretty), separators=(",", ":"))
+    assert len(compact) < len(pretty)
+    assert '\n  "$schema"' in jsnac.build_schema(indent=2)
+    assert list(json.loads(jsnac.build_schema(sort_keys=True))) == sorted(json.loads(pretty))
+
+
+# Test the schema can be returned as a dictionary without serializing it
+def test_build_schema_dict() -> None:
+    jsnac = SchemaBuilder()
+    jsnac.add_yaml("schema:\n  a:\n    js_kind: {name: vlan}\n")
+    schema = jsnac.build_schema_dict()
+    assert isinstance(schema, dict)
+    assert schema == json.loads(jsnac.build_schema())
+
+
+# Test a custom serializer can be passed to the builder
+def test_custom_serializer() -> None:
+    calls = []
+
+    def serializer(schema, indent=4, sort_keys=False) -> str:  # noqa: FBT002
+        calls.append((indent, sort_keys))
+        return f"{len(schema)} keys"
+
+    jsnac = SchemaBuilder(serializer=serializer)
+    jsnac.add_yaml("schema: {}")
+    assert jsnac.build_schema(indent=None, sort_keys=True) == "8 keys"
+    assert calls == [(None, True)]
+
+
+# Test the orjson serializer produces the same schema as the standard library
+def test_orjson_serializer() -> None:
+    pytest.importorskip("orjson")
+    data = Path("data/example-jsnac.yml").read_text(encoding="utf-8")
+    schemas = []
+    for serializer in ("json", "orjson", "auto"):
+        jsnac = SchemaBuilder(serializer=serializer)
+        jsnac.add_yaml(data)
+        schemas.append(json.loads(jsnac.build_schema(indent=None)))
+    assert schemas[0] == schemas[1] == schemas[2]
+
+
+# Test an unknown serializer name raises an exception
+def test_invalid_serializer() -> None:
+    with pytest.raises(ValueError, match="Invalid serializer"):
+        get_serializer("pickle")
+
+
+# Test YAML keys that are not strings (e.g. VLAN IDs) become strings, as they would through JSON
+def test_yaml_non_string_keys() -> None:
+    definition = "schema:\n  vlans:\n    properties:\n"
+    definition += "      100: {js_kind: {name: string}}\n      name: {js_kind: {name: string}}\n"
+    jsnac = SchemaBuilder()
+    jsnac.add_yaml(definition)
+    schema = jsnac.build_schema_dict()
+    assert schema["properties"]["vlans"]["properties"]["100"]["title"] == "100"
+    assert list(schema["properties"]["vlans"]["properties"]) == ["100", "name"]
+    json_builder = SchemaBuilder()
+    json_builder.add_json(json.dumps(yaml.safe_load(definition)))
+    assert json_builder.build_schema_dict() == schema
+    # Keys sort and serialize with every serializer
+    assert jsnac.build_schema(sort_keys=True) == json_builder.build_schema(sort_keys=True)
+    assert Validator(schema).validate({"vlans": {"100": "users", "name": "access"}}) == []
+    pytest.importorskip("orjson")
+    orjson_builder = SchemaBuilder(serializer="orjson")
+    orjson_builder.add_yaml(definition)
+    assert json.loads(orjson_builder.build_schema()) == schema
+
+
+# Test the C and pure Python YAML loaders, and every kind of input, produce the same schema
+def test_yaml_loaders() -> None:
+    path = Path("data/example-jsnac.yml")
+    text = path.read_text(encoding="utf-8")
+    expected = None
+    for loader in ("auto", "python", "c"):
+        if loader == "c" and not yaml.__with_libyaml__:
+            continue
+        jsnac = SchemaBuilder(yaml_loader=loader)
+        for data in (text, text.encode("utf-8")):
+            jsnac.add_yaml(data)
+            schema = jsnac.build_schema_dict()
+            expected = expected or schema
+            assert schema == expected
+        with path.open("rb") as f:
+            jsnac.add_yaml(f)
+        assert jsnac.build_schema_dict() == expected
+        jsnac.add_file(path)
+        assert jsnac.build_schema_dict() == expected
+    assert get_yaml_loader("python") is yaml.SafeLoader
+    with pytest.raises(ValueError, match="Invalid YAML loader"):
+        get_yaml_loader("unsafe")
+
+
+# Test JSON definitions can be added from bytes, streams and files
+def test_json_inputs(tmp_path) -> None:
+    data = json.dumps({"schema": {"a": {"js_kind": {"name": "vlan"}}}})
+    path = tmp_path / "definition.json"
+    path.write_text(data, encoding="utf-8")
+    jsnac = SchemaBuilder()
+    jsnac.add_json(data)
+    expected = jsnac.build_schema_dict()
+    jsnac.add_json(data.encode("utf-8"))
+    assert jsnac.build_schema_dict() == expected
+    jsnac.add_file(path)
+    assert jsnac.build_schema_dict() == expected
+    # The suffix can be overridden, JSON is also valid YAML
+    jsnac.add_file(path, json_input=False)
+    assert jsnac.build_schema_dict() == expected
+    with pytest.raises(ValueError, match="Invalid JSON data:"):
+        jsnac.add_json(b"\xff{}")
+
+
+# Test multiple YAML documents, and data added with merge, are deep merged into one definition
+def test_merge_documents() -> None:
+    kinds = "js_kinds:\n  site:\n    type: pattern\n    regex: ^(lon|nyc)$\nheader:\n  title: Shared\n"
+    role = "header:\n  id: role\nschema:\n  a:\n    js_kind: {name: site}\n  b:\n    c:\n      js_kind: {name: vlan}\n"
+    extra = "schema:\n  b:\n    d:\n      js_kind: {name: mac}\n  a:\n    js_kind: {name: string}\n"
+    jsnac = SchemaBuilder()
+    jsnac.add_yaml(f"{kinds}---\n{role}---\n")
+    merged = jsnac.build_schema_dict()
+    assert merged["title"] == "Shared"
+    assert merged["$id"] == "role"
+    assert merged["$defs"]["site"]["pattern"] == "^(lon|nyc)$"
+    # Parse the shared kinds once, then merge a fragment into it
+    jsnac.add_yaml(kinds)
+    jsnac.add_yaml(role, merge=True)
+    assert jsnac.build_schema_dict() == merged
+    jsnac.add_yaml(extra, merge=True)
+    properties = jsnac.build_schema_dict()["properties"]
+    assert properties["a"]["type"] == "string"
+    assert list(properties["b"]) == ["c", "d"]
+    # Merging without replacing the previous data requires mappings
+    jsnac.add_yaml("- not a definition")
+    with pytest.raises(ValueError, match="Only JSNAC definitions that are mappings can be merged"):
+        jsnac.add_yaml(role, merge=True)
+
+
+# Test merging definitions copies only what it changes, leaving both inputs untouched
+def test_merge_definitions() -> None:
+    base = {"header": {"title": "a"}, "schema": {"x": {"y": {"js_kind": {"name": "vlan"}}}, "z": {"w": {}}}}
+    update = {"header": {"id": "b"}, "schema": {"x": {"y": {"js_kind": {"name": "mac"}}}}, "extra": 1}
+    merged = merge_definitions(base, update)
+    assert merged == {
+        "header": {"title": "a", "id": "b"},
+        "schema": {"x": {"y": {"js_kind": {"name": "mac"}}}, "z": {"w": {}}},
+        "extra": 1,
+    }
+    assert base["schema"]["x"]["y"]["js_kind"]["name"] == "vlan"
+    assert merged["schema"]["z"] is base["schema"]["z"]
+
+
+# Test an incremental builder produces the same schemas as a regular one, before and after an edit
+def test_incremental_matches_full_build() -> None:
+    data = Path("data/example-jsnac.yml").read_text(encoding="utf-8")
+    incremental = SchemaBuilder(incremental=True, prune_defs=True)
+    for text in (data, data.replace("ipv4_cidr", "ipv6_cidr"), data):
+        full = SchemaBuilder(prune_defs=True)
+        full.add_yaml(text)
+        incremental.add_yaml(text)
+        assert incremental.build_schema_dict() == full.build_schema_dict()
+
+
+# Test an incremental rebuild only processes the branch that changed
+def test_incremental_only_rebuilds_changes(monkeypatch) -> None:
+    schema = {
+        f"device{i}": {"type": "object", "properties": {"ip": {"js_kind": {"name": "ipv4"}}, "id": i}}
+        for i in range(10)
+    }
+    jsnac = SchemaBuilder(incremental=True)
+    jsnac.data = {"schema": schema}
+    first = jsnac.build_schema_dict()
+    calls = []
+    build_kinds = SchemaBuilder._build_kinds  # noqa: SLF001
+
+    def spy(self: SchemaBuilder, title: str, data: dict, ctx: object) -> dict:
+        calls.append(title)
+        return build_kinds(self, title, data, ctx)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(SchemaBuilder, "_build_kinds", spy)
+    schema["device3"]["properties"]["ip"] = {"js_kind": {"name": "ipv6"}}
+    second = jsnac.build_schema_dict()
+    assert calls == ["ip"]
+    assert second["properties"]["device3"]["properties"]["ip"]["$ref"] == "#/$defs/ipv6"
+    # Unchanged branches are reused as is
+    assert second["properties"]["device4"] is first["properties"]["device4"]
+    # Subschemas no longer in the definition are forgotten
+    del schema["device5"]
+    jsnac.build_schema_dict()
+    assert len(jsnac._memo) == len(schema)  # noqa: SLF001
+
+
+# Test choice js_kinds load their choices from text, JSON and YAML files, once per build
+def test_choices_file(tmp_path, caplog) -> None:
+    (tmp_path / "vendors.txt").write_text("# Vendors\narista\n\njuniper\n", encoding="utf-8")
+    (tmp_path / "vendors.json").write_text(json.dumps(["arista", "juniper"]), encoding="utf-8")
+    (tmp_path / "vendors.yml").write_text("- arista\n- juniper\n", encoding="utf-8")
+    (tmp_path / "bad.json").write_text(json.dumps({"arista": 1}), encoding="utf-8")
+    schema = {
+        name: {"js_kind": {"name": "choice", "choices_file": str(tmp_path / name)}}
+        for name in ("vendors.txt", "vendors.json", "vendors.yml", "bad.json", "missing.txt")
+    }
+    jsnac = SchemaBuilder()
+    jsnac.data = {"schema": schema}
+    properties = jsnac.build_schema_dict()["properties"]
+    for name in ("vendors.txt", "vendors.json", "vendors.yml"):
+        assert properties[name]["enum"] == ["arista", "juniper"]
+    for name in ("bad.json", "missing.txt"):
+        assert properties[name]["type"] == "null"
+        assert "could not load its choices_file" in properties[name]["description"]
+    assert "could not load its choices_file" in caplog.text
+
+
+# Test an incremental rebuild picks up a changed choices file, even though the definition is unchanged
+def test_incremental_choices_file(tmp_path) -> None:
+    choices = tmp_path / "sites.txt"
+    choices.write_text("lon\n", encoding="utf-8")
+    jsnac = SchemaBuilder(incremental=True)
+    jsnac.data = {"schema": {"site": {"js_kind": {"name": "choice", "choices_file": str(choices)}}}}
+    assert jsnac.build_schema_dict()["properties"]["site"]["enum"] == ["lon"]
+    assert jsnac.build_schema_dict()["properties"]["site"]["enum"] == ["lon"]
+    choices.write_text("lon\nnyc\n", encoding="utf-8")
+    assert jsnac.build_schema_dict()["properties"]["site"]["enum"] == ["lon", "nyc"]
+
+
+# Test relative choices files are resolved from the directory of the definition, not the working directory
+def test_relative_choices_file(tmp_path, monkeypatch) -> None:
+    root = tmp_path / "defs"
+    root.mkdir()
+    (root / "sites.txt").write_text("lon\nnyc\n", encoding="utf-8")
+    definition = root / "sites.yml"
+    definition.write_text(
+        'schema:\n  site:\n    js_kind: { name: choice, choices_file: "sites.txt" }\n', encoding="utf-8"
+    )
+    monkeypatch.chdir(tmp_path)
+    jsnac = SchemaBuilder()
+    jsnac.add_file(definition)
+    assert jsnac.build_schema_dict()["properties"]["site"]["enum"] == ["lon", "nyc"]
+    jsnac = SchemaBuilder()
+    jsnac.add_yaml(definition.read_text(encoding="utf-8"), base_dir=root)
+    assert jsnac.build_schema_dict()["properties"]["site"]["enum"] == ["lon", "nyc"]
+    # Without a directory, relative paths are still taken from the working directory
+    jsnac = SchemaBuilder()
+    jsnac.add_yaml(definition.read_text(encoding="utf-8"))
+    assert jsnac.build_schema_dict()["properties"]["site"]["type"] == "null"
+
+
+# Test definitions nested deeper than the recursion limit can be built
+def test_deep_definition() -> None:
+    depth = sys.getrecursionlimit() * 2
+    node: dict = {"js_kind": {"name": "ipv4"}}
+    for level in range(depth):
+        node = {"properties": {f"level{level}": node}}
+    for incremental in (False, True):
+        jsnac = SchemaBuilder(incremental=incremental, prune_defs=True)
+        jsnac.data = {"schema": {"root": node}}
+        schema = jsnac.build_schema_dict()
+        assert list(schema["$defs"]) == ["ipv4"]
+        leaf = schema["properties"]["root"]
+        for level in reversed(range(depth)):
+            leaf = leaf["properties"][f"level{level}"]
+        assert leaf == {"title": "level0", "$ref": "#/$defs/ipv4"}
+
+
+# Test a streamed schema is the same as a serialized one, with every output option
+def test_stream_schema() -> None:
+    for prune_defs in (False, True):
+        jsnac = SchemaBuilder(prune_defs=prune_defs)
+        jsnac.add_file("data/example-jsnac.yml")
+        jsnac.add_yaml("schema:\n  empty: {}\n  list: [1, [], {js_kind: {name: mac}}, [{a: 2}]]\n", merge=True)
+        for indent, sort_keys in ((4, False), (2, True), (0, False), (None, False), (None, True)):
+            expected = jsnac.build_schema(indent=indent, sort_keys=sort_keys)
+            assert "".join(jsnac.iter_schema(indent=indent, sort_keys=sort_keys)) == expected
+    # Keys that are not strings are converted as json.dumps converts them
+    jsnac.add_yaml("schema:\n  3: {true: 1.5}\n  null: {js_kind: {name: vlan}}\n")
+    assert "".join(jsnac.iter_schema()) == jsnac.build_schema()
+    # The output is written in chunks of roughly chunk_size characters
+    chunks: list[str] = []
+    chunk_size = 1000
+    writer = type("Writer", (), {"write": staticmethod(chunks.append)})()
+    jsnac.add_file("data/example-jsnac.yml")
+    assert jsnac.write_schema(writer, chunk_size=chunk_size) == len(expected := jsnac.build_schema())
+    assert "".join(chunks) == expected
+    assert len(chunks) > 1
+    assert all(len(chunk) >= chunk_size for chunk in chunks[:-1])
+    with pytest.raises(ValueError, match="No data has been added"):
+        SchemaBuilder().iter_schema()
+
+
+# Test a deduplicating build reports the shared subschemas to the tracer
+def test_dedupe_tracer() -> None:
+    events: list[TraceEvent] = []
+    jsnac = SchemaBuilder(tracer=events.append, dedupe=True)
+    interface = {"properties": {"a": {"js_kind": {"name": "ipv4"}}, "b": {"js_kind": {"name": "mac"}}}}
+    jsnac.add_json(json.dumps({"schema": {"eth0": interface, "eth1": interface}}))
+    jsnac.build_schema()
+    assert [e.phase for e in events] == ["parse", "definitions", "properties", "dedupe", "serialize"]
+    assert events[3].detail == {"shared": 1}
+
+
+# Test definitions nested deeper than the recursion limit can be streamed
+def test_stream_deep_definition() -> None:
+    depth = sys.getrecursionlimit() * 2
+    node: dict = {"js_kind": {"name": "ipv4"}}
+    for level in range(depth):
+        node = {"properties": {f"level{level}": node}}
+    jsnac = SchemaBuilder(prune_defs=True)
+    jsnac.data = {"schema": {"root": node}}
+    schema = "".join(jsnac.iter_schema(indent=None))
+    assert '"$defs":{"ipv4":' in schema
+    assert schema.endswith('"level0":{"title":"level0","$ref":"#/$defs/ipv4"}' + "}}" * depth + "}}")
+
+
+# Test the key order of the definition is kept, including keys overriding the generated type
+def test_property_order() -> None:
+    jsnac = SchemaBuilder()
+    jsnac.add_yaml(
+        "schema:\n  b: 1\n  a:\n    items: [{js_kind: {name: vlan}}, [2, {c: 3}]]\n    type: custom\n  c: [x]\n"
+    )
+    properties = jsnac.build_schema_dict()["properties"]
+    assert list(properties) == ["b", "a", "c"]
+    assert list(properties["a"]) == ["type", "items"]
+    assert properties["a"]["type"] == "custom"
+    assert properties["a"]["items"] == [{"title": "items", "$ref": "#/$defs/vlan"}, [2, {"c": 3}]]
+
+
+# Test a tracer receives a timing event for each build phase, in order
+def test_tracer() -> None:
+    events: list[TraceEvent] = []
+    jsnac = SchemaBuilder(tracer=events.append, incremental=True)
+    jsnac.add_yaml(Path("data/example-jsnac.yml").read_text(encoding="utf-8"))
+    jsnac.build_schema()
+    jsnac.build_schema_dict()
+    # Reading the file and deduplicating are not part of this build
+    built = [phase for phase in PHASES if phase not in {"read", "dedupe"}]
+    assert [e.phase for e in events] == [*built, "definitions", "properties"]
+    assert all(e.seconds >= 0 for e in events)
+    assert events[0].detail["format"] == "yaml"
+    assert events[2].detail["reused"] == 0
+    assert events[-1].detail["reused"] > 0
+    # A streamed build has no separate properties phase, it is part of the serialize phase
+    events.clear()
+    "".join(jsnac.iter_schema())
+    assert [e.phase for e in events] == ["definitions", "serialize"]
+    assert events[-1].detail["characters"] == len(jsnac.build_schema())
+
+
+# Test nothing is logged (or formatted) at debug level when debug logging is disabled
+def test_debug_logging_skipped(monkeypatch) -> None:
+    def fail(*_args: object) -> None:
+        pytest.fail("debug message logged while debug logging is disabled")
+
+    jsnac = SchemaBuilder()
+    monkeypatch.setattr(jsnac.log, "debug", fail)
+    monkeypatch.setattr(jsnac.log, "level", logging.INFO)
+    jsnac.add_yaml(Path("data/example-jsnac.yml").read_text(encoding="utf-8"))
+    jsnac.build_schema()
+
+
+# Test many concurrent builds, of separate builders and of shared ones, match the same builds run one at a time
+def test_concurrent_builds() -> None:
+    registry = KindRegistry({"shared": {"type": "pattern", "regex": "^shared$"}})
+
+    def definition(i: int) -> dict:
+        # Each definition has its own custom kind, which must not be seen by the other builds
+        return {
+            "js_kinds": {f"kind{i}": {"type": "pattern", "regex": f"^{i}$"}},
+            "schema": {
+                f"device{j}": {
+                    "type": "object",
+                    "properties": {
+                        "own": {"js_kind": {"name": f"kind{i}"}},
+                        "other": {"js_kind": {"name": "kind0"}},
+                        "ports": {"items": [{"js_kind": {"name": "shared"}}, {"id": {"js_kind": {"name": "vlan"}}}]},
+                    },
+                }
+                for j in range(20)
+            },
+        }
+
+    def build(i: int, builder: SchemaBuilder | None = None) -> dict:
+        jsnac = builder or SchemaBuilder(prune_defs=True, kinds=registry)
+        if builder is None:
+            jsnac.data = definition(i)
+        return jsnac.build_schema_dict()
+
+    expected = [build(i) for i in range(8)]
+    shared = SchemaBuilder(prune_defs=True, kinds=registry, incremental=True)
+    shared.data = definition(3)
+    interval = sys.getswitchinterval()
+    # Switch threads as often as possible, to interleave the builds
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            separate = list(executor.map(build, [i % 8 for i in range(200)]))
+            same = list(executor.map(lambda _: build(3, shared), range(200)))
+    finally:
+        sys.setswitchinterval(interval)
+    assert separate == [expected[i % 8] for i in range(200)]
+    assert all(schema == expected[3] for schema in same)
+    assert expected[0]["properties"]["device0"]["properties"]["other"]["$ref"] == "#/$defs/kind0"
+    assert expected[1]["properties"]["device0"]["properties"]["other"]["type"] == "null"
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import os
+import pickle  # noqa: S403
+from concurrent.futures import ThreadPoolExecutor
+
+from jsnac.core.batch import BuildOptions, render_schema
+from jsnac.core.cache import SchemaCache
+
+
+# Test the cache key depends on both the input data and the build options
+def test_cache_key(tmp_path) -> None:
+    cache = SchemaCache(tmp_path)
+    key = cache.key(b"schema: {}")
+    assert key == cache.key(b"schema: {}")
+    assert key != cache.key(b"schema: {a: 1}")
+    assert key != cache.key(b"schema: {}", {"json": True})
+
+
+# Test a schema can be stored and read back, and misses return None
+def test_cache_get_put(tmp_path) -> None:
+    cache = SchemaCache(tmp_path / "cache")
+    key = cache.key(b"data")
+    assert cache.get(key) is None
+    cache.put(key, '{"title": "test"}')
+    assert cache.get(key) == '{"title": "test"}'
+
+
+# Test threads storing the same key at once (as async builds do) do not clash on the temporary file
+def test_cache_put_threads(tmp_path) -> None:
+    cache = SchemaCache(tmp_path / "cache")
+    key = cache.key(b"data")
+    schema = "x" * 1_000_000
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda _: cache.put(key, schema), range(200)))
+    assert cache.get(key) == schema
+    assert [p.name for p in cache.cache_dir.iterdir()] == [f"{key}.schema.json"]
+
+
+# Test the size estimate counts every schema stored from several threads
+def test_cache_size_threads(tmp_path) -> None:
+    cache = SchemaCache(tmp_path / "cache")
+    cache.put(cache.key(b"first"), "{}")
+    count = 500
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda i: cache.put(cache.key(str(i).encode()), "x" * 1000), range(count)))
+    assert cache._size == count * 1000 + 2  # noqa: SLF001
+
+
+# Test the least recently used schemas are evicted once the cache is full
+def test_cache_eviction(tmp_path) -> None:
+    cache = SchemaCache(tmp_path)
+    keys = [cache.key(str(i).encode()) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, "x" * 100)
+        os.utime(tmp_path / f"{key}.schema.json", (i, i))
+    cache.max_size = 350
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) is not None
+    cache.put(cache.key(b"3"), "x" * 100)
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+
+
+# Test the cache survives being pickled for pool workers
+def test_cache_pickle(tmp_path) -> None:
+    max_size = 1234
+    cache = pickle.loads(pickle.dumps(SchemaCache(tmp_path, max_size=max_size)))  # noqa: S301
+    assert cache.cache_dir == tmp_path
+    assert cache.max_size == max_size
+    cache.put(cache.key(b"data"), "{}")
+    assert cache.get(cache.key(b"data")) == "{}"
+
+
+# Test unchanged definition files are served from the cache
+def test_render_schema_cached(tmp_path) -> None:
+    definition = tmp_path / "test.yml"
+    definition.write_text("header:\n  title: First\n", encoding="utf-8")
+    cache = SchemaCache(tmp_path / "cache")
+    schema, cached = render_schema(definition, cache=cache)
+    assert not cached
+    assert render_schema(definition, cache=cache) == (schema, True)
+    definition.write_text("header:\n  title: Second\n", encoding="utf-8")
+    schema, cached = render_schema(definition, cache=cache)
+    assert not cached
+    assert '"title": "Second"' in schema
+
+
+# Test changing the build options rebuilds the schema
+def test_render_schema_options(tmp_path) -> None:
+    definition = tmp_path / "test.yml"
+    definition.write_text("schema:\n  a:\n    js_kind: {name: ipv4}\n", encoding="utf-8")
+    cache = SchemaCache(tmp_path / "cache")
+    render_schema(definition, cache=cache)
+    schema, cached = render_schema(definition, cache=cache, options=BuildOptions(prune_defs=True))
+    assert not cached
+    assert '"mac"' not in schema
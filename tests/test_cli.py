@@ -1,9 +1,23 @@
 #!/usr/bin/env python3
+import json
+import pstats
+import shutil
+
 import pytest
+import yaml
 
 from jsnac.utils.jsnac_cli import main
 
 
+# The build cache is on by default, keep it out of the user's real cache directory in every test
+@pytest.fixture
+def _cache_home(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg-cache"))
+
+
+pytestmark = pytest.mark.usefixtures("_cache_home")
+
+
 # Test CLI with no arguments
 def test_cli(capsys) -> None:
     with pytest.raises(SystemExit):
@@ -55,6 +69,226 @@ def test_cli_file_json(capsys) -> None:
 # Test CLI with verbose argument
 def test_cli_verbose(capsys) -> None:
     with pytest.raises(SystemExit):
-        main(["-f", "data/example.yml", "-v"])
+        main(["-f", "data/example.yml", "-v", "--no-cache"])
     output = capsys.readouterr()
     assert "JSNAC CLI complete" in output.err
+    assert "[TRACE] properties:" in output.err
+
+
+# Test running the CLI repeatedly in one process does not duplicate log output
+def test_cli_logging_handlers(capsys) -> None:
+    for _ in range(2):
+        with pytest.raises(SystemExit):
+            main(["-f", "data/example.yml", "--no-cache"])
+        output = capsys.readouterr()
+        assert output.err.count("Starting JSNAC CLI") == 1
+        assert "[DEBUG]" not in output.err
+
+
+# Test CLI in batch mode with a directory and an output directory
+def test_cli_batch(capsys, tmp_path) -> None:
+    shutil.copy("data/example-jsnac.json", tmp_path / "other.json")
+    with pytest.raises(SystemExit) as e:
+        main(["-b", "data/example-jsnac.yml", str(tmp_path / "other.json"), "--output-dir", str(tmp_path / "out")])
+    output = capsys.readouterr()
+    assert e.value.code == 0
+    assert "Built 2 of 2 schemas" in output.err
+    assert sorted(p.name for p in (tmp_path / "out").rglob("*.json")) == [
+        "example-jsnac.schema.json",
+        "other.schema.json",
+    ]
+
+
+# Test CLI in batch mode refuses inputs that would be written to the same schema
+def test_cli_batch_collision(capsys, tmp_path) -> None:
+    with pytest.raises(SystemExit) as e:
+        main(["-b", "data/example-jsnac.yml", "data/example-jsnac.json", "--output-dir", str(tmp_path), "-w", "1"])
+    output = capsys.readouterr()
+    assert e.value.code == 1
+    assert "would both be written to" in output.err
+    assert not list(tmp_path.iterdir())
+
+
+# Test CLI in batch mode reports failures and exits with a non-zero status
+def test_cli_batch_failure(capsys, tmp_path) -> None:
+    with pytest.raises(SystemExit) as e:
+        main(["-b", str(tmp_path / "missing.yml"), "-w", "1"])
+    output = capsys.readouterr()
+    assert e.value.code == 1
+    assert "[FAILED]" in output.err
+    assert "(1 failed)" in output.err
+
+
+# Test CLI uses the build cache for unchanged files unless disabled
+def test_cli_cache(capsys, tmp_path) -> None:
+    args = ["-f", "data/example-jsnac.yml", "-o", str(tmp_path / "out.json"), "--cache-dir", str(tmp_path / "c")]
+    for _ in range(2):
+        with pytest.raises(SystemExit):
+            main(args)
+    output = capsys.readouterr()
+    assert "Schema built in" in output.err
+    assert "Schema loaded from cache" in output.err
+    with pytest.raises(SystemExit):
+        main([*args, "--no-cache"])
+    output = capsys.readouterr()
+    assert "Schema built in" in output.err
+
+
+# Test CLI compact output
+def test_cli_compact(capsys, tmp_path) -> None:
+    output_file = tmp_path / "compact.json"
+    with pytest.raises(SystemExit):
+        main(["-f", "data/example-jsnac.yml", "-o", str(output_file), "--compact", "--sort-keys", "--no-cache"])
+    output = capsys.readouterr()
+    assert "JSNAC CLI complete" in output.err
+    assert output_file.read_text(encoding="utf-8").startswith('{"$defs":{')
+
+
+# Test a streamed schema is the same as a regular one
+def test_cli_stream(capsys, tmp_path) -> None:
+    schemas = []
+    for stream in ([], ["--stream"]):
+        output_file = tmp_path / f"stream{len(stream)}.json"
+        with pytest.raises(SystemExit):
+            main(["-f", "data/example-jsnac.yml", "-o", str(output_file), "--compact", *stream])
+        schemas.append(output_file.read_text(encoding="utf-8"))
+    assert "Schema built and streamed in" in capsys.readouterr().err
+    assert schemas[0] == schemas[1]
+
+
+# Test repeated subschemas are shared with --dedupe
+def test_cli_dedupe(capsys, tmp_path) -> None:
+    definition = tmp_path / "devices.yml"
+    interface = {"properties": {"address": {"js_kind": {"name": "ipv4"}}, "mac": {"js_kind": {"name": "mac"}}}}
+    definition.write_text(yaml.safe_dump({"schema": {"eth0": interface, "eth1": interface}}), encoding="utf-8")
+    output_file = tmp_path / "devices.schema.json"
+    with pytest.raises(SystemExit):
+        main(["-f", str(definition), "-o", str(output_file), "--dedupe", "--no-cache"])
+    assert "JSNAC CLI complete" in capsys.readouterr().err
+    schema = json.loads(output_file.read_text(encoding="utf-8"))
+    assert schema["properties"]["eth1"] == {"$ref": "#/$defs/eth0"}
+
+
+# Test the C and pure Python YAML loaders write the same schema
+def test_cli_yaml_loader(capsys, tmp_path) -> None:
+    schemas = []
+    for loader in ("python", "auto"):
+        output_file = tmp_path / f"{loader}.json"
+        with pytest.raises(SystemExit):
+            main(["-f", "data/example-jsnac.yml", "-o", str(output_file), "--yaml-loader", loader, "--no-cache"])
+        assert "JSNAC CLI complete" in capsys.readouterr().err
+        schemas.append(output_file.read_text(encoding="utf-8"))
+    assert schemas[0] == schemas[1]
+
+
+# Test several -f files are merged into a single schema
+def test_cli_merge_files(capsys, tmp_path) -> None:
+    kinds = tmp_path / "kinds.yml"
+    kinds.write_text("js_kinds:\n  site:\n    type: pattern\n    regex: ^(lon|nyc)$\n", encoding="utf-8")
+    output_file = tmp_path / "merged.json"
+    with pytest.raises(SystemExit):
+        main(["-f", str(kinds), "-f", "data/example-jsnac.yml", "-o", str(output_file), "--no-cache"])
+    assert "JSNAC CLI complete" in capsys.readouterr().err
+    schema = json.loads(output_file.read_text(encoding="utf-8"))
+    assert schema["$defs"]["site"]["pattern"] == "^(lon|nyc)$"
+    assert "properties" in schema
+
+
+# Test a shared kinds file is available to every schema
+def test_cli_kinds(capsys, tmp_path) -> None:
+    kinds = tmp_path / "kinds.yml"
+    kinds.write_text("site:\n  type: pattern\n  regex: ^(lon|nyc)$\n", encoding="utf-8")
+    definition = tmp_path / "role.yml"
+    definition.write_text("schema:\n  a:\n    js_kind: {name: site}\n", encoding="utf-8")
+    with pytest.raises(SystemExit) as e:
+        main(["-b", str(definition), "-k", str(kinds), "--no-cache", "-w", "1"])
+    assert e.value.code == 0
+    assert "JSNAC CLI complete" in capsys.readouterr().err
+    schema = json.loads((tmp_path / "role.schema.json").read_text(encoding="utf-8"))
+    assert schema["properties"]["a"]["$ref"] == "#/$defs/site"
+
+
+# Test the validate subcommand against a schema file and a JSNAC definition
+def test_cli_validate(capsys) -> None:
+    with pytest.raises(SystemExit) as e:
+        main(["validate", "-s", "data/example.schema.json", "data/example.yml", "data/example.json", "-w", "1"])
+    output = capsys.readouterr()
+    assert e.value.code == 0
+    assert "Validated 2 files" in output.err
+    with pytest.raises(SystemExit) as e:
+        main(["validate", "-f", "data/example-jsnac.yml", "data/example-jsnac.yml", "-w", "1"])
+    output = capsys.readouterr()
+    assert e.value.code == 1
+    assert "[INVALID] data/example-jsnac.yml" in output.err
+
+
+# Test the watch subcommand builds every schema up front and stops cleanly on Ctrl+C
+def test_cli_watch(capsys, tmp_path, monkeypatch) -> None:
+    def interrupt(*_args: object) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("jsnac.core.watch.Watcher.run", interrupt)
+    with pytest.raises(SystemExit) as e:
+        main(["watch", "data/example-jsnac.yml", "--output-dir", str(tmp_path), "--compact"])
+    output = capsys.readouterr()
+    assert e.value.code == 0
+    assert "Stopped watching" in output.err
+    assert (tmp_path / "example-jsnac.schema.json").exists()
+
+
+# Test the build metrics and profile can be written for a single file build
+def test_cli_metrics(capsys, tmp_path) -> None:
+    metrics_file = tmp_path / "metrics.json"
+    profile_file = tmp_path / "build.prof"
+    output_file = tmp_path / "schema.json"
+    args = ["-f", "data/example-jsnac.yml", "-o", str(output_file), "--no-cache", "--trace-memory"]
+    with pytest.raises(SystemExit):
+        main([*args, "--metrics-json", str(metrics_file), "--profile", str(profile_file)])
+    output = capsys.readouterr()
+    assert "Metrics written to" in output.err
+    metrics = json.loads(metrics_file.read_text(encoding="utf-8"))
+    assert list(metrics["phases"]) == ["read", "parse", "definitions", "properties", "serialize", "write"]
+    assert metrics["cached"] is False
+    assert metrics["peak_memory"] > 0
+    assert pstats.Stats(str(profile_file)).total_calls > 0
+    # Metrics are only supported for a single file
+    with pytest.raises(SystemExit):
+        main(["-b", "data/example-jsnac.yml", "--metrics-json", str(metrics_file)])
+    assert "--metrics-json and --profile require -f/--file" in capsys.readouterr().err
+
+
+# Test the serve subcommand builds every schema up front and stops cleanly on Ctrl+C
+def test_cli_serve(capsys, monkeypatch) -> None:
+    def interrupt(*_args: object) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("jsnac.core.serve.SchemaServer.serve_forever", interrupt)
+    with pytest.raises(SystemExit) as e:
+        main(["serve", "data/example-jsnac.yml", "--port", "0"])
+    output = capsys.readouterr()
+    assert e.value.code == 0
+    assert "-> /example-jsnac.schema.json" in output.err
+    assert "Serving schemas on http://127.0.0.1:" in output.err
+    assert "Stopped serving" in output.err
+    # Schemas are always served compact, so the file output options are rejected rather than ignored
+    with pytest.raises(SystemExit) as e:
+        main(["serve", "data/example-jsnac.yml", "--port", "0", "--indent", "2"])
+    assert e.value.code == 2  # noqa: PLR2004
+    assert "unrecognized arguments: --indent 2" in capsys.readouterr().err
+
+
+# Test inferring a definition and a schema from plain data files
+def test_cli_infer(capsys, tmp_path) -> None:
+    definition_file = tmp_path / "inferred.yml"
+    schema_file = tmp_path / "inferred.schema.json"
+    with pytest.raises(SystemExit) as e:
+        main(["-i", "-f", "data/example.yml", "-o", str(definition_file), "--no-cache"])
+    assert e.value.code == 0
+    definition = yaml.safe_load(definition_file.read_text(encoding="utf-8"))
+    assert definition["schema"]["system"]["properties"]["ntp_servers"] == {"items": {"js_kind": {"name": "ipv4"}}}
+    with pytest.raises(SystemExit) as e:
+        main(["-i", "-b", "data/example.yml", "-o", str(schema_file), "--compact"])
+    output = capsys.readouterr()
+    assert e.value.code == 0
+    assert "Inferred from 1 documents" in output.err
+    assert json.loads(schema_file.read_text(encoding="utf-8"))["title"] == "JSNAC inferred Schema"
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+import copy
+import json
+import sys
+
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.dedupe import dedupe_subschemas
+from jsnac.core.validate import Validator
+
+INTERFACE = {
+    "properties": {
+        "address": {"js_kind": {"name": "ipv4_cidr"}},
+        "mtu": {"js_kind": {"name": "mtu"}},
+        "enabled": {"js_kind": {"name": "boolean"}},
+    },
+}
+NEIGHBOR = {"properties": {"peer": {"js_kind": {"name": "ipv4"}}, "asn": {"js_kind": {"name": "uint32"}}}}
+
+
+def _definition() -> dict:
+    # Two identical devices (sharing an interface shape) and a router with the same interface shape
+    device = {"properties": {"eth0": INTERFACE, "eth1": INTERFACE}}
+    router = {"properties": {"ge-0/0/0": INTERFACE, "neighbors": {"items": NEIGHBOR}}}
+    return {"schema": {"spine1": device, "spine2": device, "router1": router}}
+
+
+# Test repeated subschemas are moved to $defs and referenced, without changing what is valid
+def test_dedupe() -> None:
+    jsnac = SchemaBuilder(dedupe=True)
+    jsnac.add_json(json.dumps(_definition()))
+    schema = jsnac.build_schema_dict()
+    properties = schema["properties"]
+    assert properties["spine1"] == properties["spine2"] == {"$ref": "#/$defs/spine1"}
+    assert schema["$defs"]["spine1"]["properties"]["eth0"] == {"$ref": "#/$defs/eth0"}
+    assert properties["router1"]["properties"]["ge-0/0/0"] == {"$ref": "#/$defs/eth0"}
+    # Shapes that are not repeated stay inline
+    assert properties["router1"]["properties"]["neighbors"]["items"]["type"] == "object"
+    assert list(schema["$defs"])[-2:] == ["spine1", "eth0"]
+    inline = SchemaBuilder()
+    inline.add_json(json.dumps(_definition()))
+    assert len(json.dumps(schema)) < len(inline.build_schema(indent=None))
+    interface = {"address": "10.0.0.1/31", "mtu": 9000, "enabled": True}
+    document = {"spine1": {"eth0": interface, "eth1": dict(interface)}, "router1": {"ge-0/0/0": dict(interface)}}
+    invalid = copy.deepcopy(document)
+    invalid["spine1"]["eth1"]["mtu"] = 1
+    for built in (schema, inline.build_schema_dict()):
+        validator = Validator(built)
+        assert validator.validate(document) == []
+        assert len(validator.validate(invalid)) == 1
+
+
+# Test a shape only repeated within a repeated parent is shared with it, and other options are kept
+def test_dedupe_nested() -> None:
+    jsnac = SchemaBuilder(dedupe=True, prune_defs=True)
+    jsnac.add_json(
+        json.dumps({"schema": {"a": {"properties": {"bgp": NEIGHBOR}}, "b": {"properties": {"bgp": NEIGHBOR}}}})
+    )
+    schema = jsnac.build_schema_dict()
+    assert set(schema["$defs"]) == {"ipv4", "uint32", "a"}
+    assert schema["$defs"]["a"]["properties"]["bgp"]["type"] == "object"
+    # A streamed schema builds the same deduplicated schema
+    assert "".join(jsnac.iter_schema()) == jsnac.build_schema()
+
+
+# Test shared names avoid existing $defs names and characters that would need escaping
+def test_dedupe_names() -> None:
+    node = SchemaBuilder()
+    node.add_json(json.dumps({"schema": {"x": INTERFACE}}))
+    interface = node.build_schema_dict()["properties"]["x"]
+    properties = {"ge-0/0/0": interface, "eth 1": interface, "list": [interface, interface]}
+    original = copy.deepcopy(properties)
+    deduped, shared = dedupe_subschemas(properties, reserved={"ge-0_0_0"})
+    assert list(shared) == ["ge-0_0_0_2"]
+    assert deduped["eth 1"] == deduped["list"][1] == {"$ref": "#/$defs/ge-0_0_0_2"}
+    # The input is left as it was, and small subschemas are not shared
+    assert properties == original
+    assert dedupe_subschemas(properties, min_size=10**6) == (properties, {})
+    assert dedupe_subschemas("scalar") == ("scalar", {})
+
+
+# Test definitions nested deeper than the recursion limit can be deduplicated
+def test_dedupe_deep_definition() -> None:
+    depth = sys.getrecursionlimit() * 2
+    node: dict = INTERFACE
+    for level in range(depth):
+        node = {"properties": {f"level{level}": node}}
+    jsnac = SchemaBuilder(dedupe=True)
+    jsnac.data = {"schema": {"first": node, "second": node}}
+    schema = jsnac.build_schema_dict()
+    assert schema["properties"]["second"] == {"$ref": "#/$defs/first"}
+    assert list(schema["$defs"])[-1] == "first"
+
+
+# Test choice kinds repeating the same choices share one enum, keeping their own titles
+def test_dedupe_choices() -> None:
+    vendors = [f"vendor-{i}" for i in range(50)]
+    jsnac = SchemaBuilder(dedupe=True)
+    jsnac.data = {
+        "schema": {
+            name: {"js_kind": {"name": "choice", "choices": list(vendors)}} for name in ("vendor", "backup", "other")
+        },
+    }
+    jsnac.data["schema"]["other"]["js_kind"]["choices"] = ["a", "b"]
+    schema = jsnac.build_schema_dict()
+    properties = schema["properties"]
+    assert properties["vendor"] == {"title": "vendor", "$ref": "#/$defs/vendor_choices"}
+    assert properties["backup"] == {"title": "backup", "$ref": "#/$defs/vendor_choices"}
+    assert schema["$defs"]["vendor_choices"] == {"enum": vendors}
+    # Small enums stay inline
+    assert properties["other"]["enum"] == ["a", "b"]
+    validator = Validator(schema)
+    assert validator.validate({"vendor": "vendor-1", "backup": "vendor-49", "other": "a"}) == []
+    assert len(validator.validate({"vendor": "vendor-50", "backup": "vendor-1"})) == 1
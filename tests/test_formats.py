@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import random
+import re
+
+import jsonschema
+import pytest
+
+from jsnac.core.formats import KIND_CHECKERS, format_checker
+from jsnac.core.kinds import BUILTIN_KINDS
+from jsnac.core.validate import Validator
+
+SAMPLES = {
+    "ipv4": ["0.0.0.0", "255.255.255.255", "192.168.0.1", "01.02.03.04", "256.1.1.1", "1.1.1", "001.1.1.1"],
+    "ipv4_cidr": ["10.0.0.0/8", "0.0.0.0/0", "1.1.1.1/32", "1.1.1.1/33", "1.1.1.1/01", "1.1.1.1", "1.1.1.1/"],
+    "ipv4_prefix": ["/0", "/32", "/33", "/01", "/", "24"],
+    "ipv6": ["2001:db8::1", "::1", "2001:db8::", "::", "1:2:3:4:5:6:7:8", "1:2:3:4:5:6:7:8:9", "12345::", ":1:"],
+    "ipv6_cidr": ["2001:db8::/32", "2001:db8::1/128", "2001:db8::/33", "2001:db8::1", "::/64"],
+    "ipv6_prefix": ["/32", "/128", "/127", "/33", "/"],
+    "mac": ["00:11:22:33:44:55", "aa-BB-cc-DD-ee-FF", "00:11-22:33:44:55", "00:11:22:33:44", "00:11:22:33:44:5g"],
+    "mac_dot": ["0011.2233.4455", "aabb.CCDD.eeff", "0011.2233.445", "0011:2233:4455", "0011.2233.445g"],
+}
+ALPHABETS = {
+    "ipv4": "0123456789.",
+    "ipv4_cidr": "0123456789./",
+    "ipv4_prefix": "0123/",
+    "ipv6": "019aF:",
+    "ipv6_cidr": "0123468aF:/",
+    "ipv6_prefix": "0123468/",
+    "mac": "0aF:-.g",
+    "mac_dot": "0aF.:g",
+}
+
+
+def _fuzz(kind: str) -> list[str]:
+    rng = random.Random(kind)  # noqa: S311
+    values = []
+    for sample in SAMPLES[kind]:
+        values.extend((sample, f"{sample}\n", f"{sample}\n\n", f" {sample}"))
+        for _ in range(200):
+            chars = list(sample)
+            chars[rng.randrange(len(chars))] = rng.choice(ALPHABETS[kind])
+            values.append("".join(chars))
+    values.extend("".join(rng.choice(ALPHABETS[kind]) for _ in range(rng.randint(0, 20))) for _ in range(2000))
+    return values
+
+
+# Test the native string checkers accept exactly the same values as the kind patterns
+@pytest.mark.parametrize("kind", sorted(SAMPLES))
+def test_native_matches_pattern(kind) -> None:
+    pattern = re.compile(BUILTIN_KINDS[kind]["pattern"])
+    check = KIND_CHECKERS[kind]
+    for value in _fuzz(kind):
+        assert check(value) == bool(pattern.search(value)), value
+    assert not check(1)
+
+
+# Test the native integer checkers match the kind type and range
+@pytest.mark.parametrize("kind", ["uint16", "uint32", "uint64", "mtu", "vlan"])
+def test_native_integers(kind) -> None:
+    definition = dict(BUILTIN_KINDS[kind])
+    check = KIND_CHECKERS[kind]
+    values = [definition["minimum"], definition["maximum"], definition["minimum"] - 1, definition["maximum"] + 1]
+    values += [float(definition["minimum"]), 100.5, "100", True, None]
+    for value in values:
+        assert check(value) == jsonschema.Draft7Validator(definition).is_valid(value), value
+
+
+# Test the kinds can be used as formats with a jsonschema FormatChecker
+def test_format_checker() -> None:
+    validator = jsonschema.Draft7Validator({"format": "jsnac-ipv4_cidr"}, format_checker=format_checker())
+    assert validator.is_valid("10.0.0.0/8")
+    assert not validator.is_valid("10.0.0.0/33")
+    # Other types are ignored, as with the standard formats
+    assert validator.is_valid(5)
+    validator = jsonschema.Draft7Validator({"format": "jsnac-vlan"}, format_checker=format_checker())
+    assert validator.is_valid(10)
+    assert not validator.is_valid(5000)
+
+
+# Test the Validator produces the same errors with and without the native checkers
+def test_validator_native() -> None:
+    schema = {
+        "$defs": {"vlan": dict(BUILTIN_KINDS["vlan"]), "mac": {"type": "string", "pattern": "^mac$"}},
+        "properties": {"vlan": {"$ref": "#/$defs/vlan"}, "mac": {"$ref": "#/$defs/mac"}},
+    }
+    native = Validator(schema)
+    generic = Validator(schema, native=False)
+    for instance in ({"vlan": 10, "mac": "mac"}, {"vlan": 0, "mac": "00:11:22:33:44:55"}, {"vlan": "1"}):
+        assert native.validate(instance) == generic.validate(instance)
+    # The mac kind has been overridden, so it must not be checked natively
+    assert native.validate({"mac": "00:11:22:33:44:55"}) != []
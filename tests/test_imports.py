@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import subprocess  # noqa: S404
+import sys
+
+import pytest
+
+import jsnac
+
+# Cumulative import time budget of the CLI module in microseconds, measured at about 80ms (of which
+# roughly half is the standard library modules it needs). Generous, as CI machines are slow and noisy
+IMPORT_BUDGET = 250_000
+# Modules only needed by some commands, which must not be imported on start-up
+DEFERRED = ("yaml", "multiprocessing", "http.server", "jsonschema", "jsnac.core.validate", "jsnac.core.infer")
+
+
+def _run(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, "-c", code], capture_output=True, text=True, check=True)  # noqa: S603
+
+
+# Test that importing the package does not import the builder, until it is used
+def test_import_package() -> None:
+    code = "import sys, jsnac; print(jsnac.__version__, 'jsnac.core.build' in sys.modules, 'yaml' in sys.modules)"
+    assert _run(code).stdout.split() == [jsnac.__version__, "False", "False"]
+    assert "SchemaBuilder" in dir(jsnac)
+    assert jsnac.SchemaBuilder.__module__ == "jsnac.core.build"
+    with pytest.raises(AttributeError, match="has no attribute 'Missing'"):
+        _ = jsnac.Missing
+
+
+# Test that the CLI does not import the modules of other commands on start-up
+def test_import_cli() -> None:
+    code = f"import sys, jsnac.utils.jsnac_cli; print([m for m in {DEFERRED!r} if m in sys.modules])"
+    assert _run(code).stdout.strip() == "[]"
+
+
+# Test that the CLI module imports within the start-up time budget (python -X importtime)
+def test_import_budget() -> None:
+    # The best of a few runs, so a single slow run on a busy machine does not fail the test
+    timings = []
+    for _ in range(3):
+        report = _run("import jsnac.utils.jsnac_cli", "-X", "importtime").stderr.splitlines()
+        cumulative = next(line for line in report if line.endswith("| jsnac.utils.jsnac_cli"))
+        timings.append(int(cumulative.split("|")[1]))
+    assert min(timings) < IMPORT_BUDGET
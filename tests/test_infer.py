@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import json
+from pathlib import Path
+
+import jsonschema
+import yaml
+
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.infer import SchemaInferrer, infer_files
+
+
+def _write_hosts(tmp_path, count: int) -> list[Path]:
+    paths = []
+    for i in range(count):
+        host = {
+            "hostname": f"leaf{i}",
+            "mgmt": {"ipv4": f"10.0.0.{i}", "mac": "aa:bb:cc:dd:ee:ff", "mtu": 1500 + i},
+            "vlans": [10, 20 + i],
+            "ntp": ["10.1.1.1", "2001:db8::1"] if i % 2 else ["10.1.1.1"],
+        }
+        if i % 2:
+            host["asn"] = 65000 + i
+        path = tmp_path / f"host{i}.yml"
+        path.write_text(yaml.safe_dump(host), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+# Test that types are merged per path, built-in kinds detected and required keys marked
+def test_infer_definition() -> None:
+    inferrer = SchemaInferrer()
+    inferrer.add({"name": "a", "addr": "10.0.0.1/24", "vlan_id": 10, "speed": 1, "desc": None, "tags": []})
+    inferrer.add({"name": "b", "addr": "10.0.0.2/24", "vlan_id": 4094, "speed": 2.5, "desc": "x", "id": "ab:cd"})
+    inferrer.add([1, 2])
+    schema = inferrer.definition("Inferred")["schema"]
+    assert inferrer.documents == 2  # noqa: PLR2004
+    assert len(inferrer.errors) == 1
+    assert schema == {
+        "name": {"js_kind": {"name": "string"}},
+        "addr": {"js_kind": {"name": "ipv4_cidr"}},
+        "vlan_id": {"js_kind": {"name": "vlan"}},
+        "speed": {"js_kind": {"name": "number"}},
+        "desc": {"type": ["null", "string"]},
+        "tags": {"items": {}},
+        "id": {"js_kind": {"name": "string"}},
+    }
+
+
+# Test that nested objects and arrays are summarised and the inferred schema accepts every input
+def test_infer_files(tmp_path) -> None:
+    paths = _write_hosts(tmp_path, 6)
+    (tmp_path / "broken.yml").write_text("a: [", encoding="utf-8")
+    serial = infer_files([*paths, tmp_path / "broken.yml"], workers=1)
+    parallel = infer_files([*paths, tmp_path / "broken.yml"], workers=2)
+    definition = parallel.definition()
+    assert definition == serial.definition()
+    assert len(parallel.errors) == 1
+    schema = definition["schema"]
+    assert schema["mgmt"] == {
+        "properties": {
+            "ipv4": {"js_kind": {"name": "ipv4"}},
+            "mac": {"js_kind": {"name": "mac"}},
+            "mtu": {"js_kind": {"name": "mtu"}},
+        },
+        "required": ["ipv4", "mac", "mtu"],
+    }
+    assert schema["vlans"] == {"items": {"js_kind": {"name": "vlan"}}}
+    assert schema["ntp"] == {"items": {"js_kind": {"name": "string"}}}
+    assert schema["asn"] == {"js_kind": {"name": "integer"}}
+    jsnac = SchemaBuilder()
+    jsnac.add_json(json.dumps(definition))
+    built = jsnac.build_schema_dict()
+    for path in paths:
+        jsonschema.validate(yaml.safe_load(path.read_text(encoding="utf-8")), built)
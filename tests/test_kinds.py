@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import json
+import pickle  # noqa: S403
+
+import pytest
+
+from jsnac.core.batch import BuildOptions, build_many
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.kinds import KindRegistry
+
+KINDS = {
+    "site": {"type": "pattern", "regex": "^(lon|nyc)$", "title": "Site"},
+    "broken": {"type": "choice"},
+}
+
+
+# Test a registry builds each kind once and only exposes the valid ones
+def test_registry() -> None:
+    source = {kind: dict(kind_data) for kind, kind_data in KINDS.items()}
+    registry = KindRegistry(source)
+    assert registry.names == frozenset({"site"})
+    assert "site" in registry
+    assert "broken" not in registry
+    assert list(registry) == ["site", "broken"]
+    assert len(registry) == len(KINDS)
+    assert registry.definitions()["site"] == {
+        "title": "Site",
+        "description": "Custom Kind: site",
+        "type": "string",
+        "pattern": "^(lon|nyc)$",
+    }
+    # Changing the source or a returned definition does not change the registry
+    source["site"]["regex"] = "^changed$"
+    registry.definitions()["site"]["pattern"] = "^changed$"
+    assert registry.definitions()["site"]["pattern"] == "^(lon|nyc)$"
+    with pytest.raises(AttributeError):
+        registry.kinds = {}  # type: ignore[misc]
+    merged = registry.merged({"site": {"type": "pattern", "regex": "^ams$"}})
+    assert merged.definitions()["site"]["pattern"] == "^ams$"
+    assert merged.fingerprint != registry.fingerprint
+    with pytest.raises(ValueError, match="Kinds must be a mapping"):
+        KindRegistry({"site": "^lon$"})  # type: ignore[dict-item]
+
+
+# Test a registry survives a pickle round trip, as when it is sent to a worker process
+def test_registry_pickle() -> None:
+    registry = KindRegistry(KINDS)
+    restored = pickle.loads(pickle.dumps(registry))  # noqa: S301
+    assert restored == registry
+    assert hash(restored) == hash(registry)
+    assert restored.names == registry.names
+    assert restored.definitions() == registry.definitions()
+
+
+# Test a registry can be loaded from a kinds file or a definition's js_kinds section
+def test_registry_from_file(tmp_path) -> None:
+    kinds_file = tmp_path / "kinds.json"
+    kinds_file.write_text(json.dumps(KINDS), encoding="utf-8")
+    definition_file = tmp_path / "definition.yml"
+    definition_file.write_text("js_kinds:\n  site:\n    type: pattern\n    regex: ^(lon|nyc)$\n    title: Site\n")
+    assert KindRegistry.from_file(kinds_file).definitions()["site"] == KindRegistry(KINDS).definitions()["site"]
+    assert KindRegistry.from_file(definition_file).names == frozenset({"site"})
+    (tmp_path / "bad.yml").write_text("site: [", encoding="utf-8")
+    with pytest.raises(ValueError, match="Invalid kinds file"):
+        KindRegistry.from_file(tmp_path / "bad.yml")
+
+
+# Test builders share a registry, with a definition's own js_kinds taking precedence
+def test_builder_kinds() -> None:
+    registry = KindRegistry(KINDS)
+    jsnac = SchemaBuilder(kinds=registry)
+    jsnac.add_yaml("schema:\n  a:\n    js_kind: {name: site}\n  b:\n    js_kind: {name: broken}\n")
+    schema = jsnac.build_schema_dict()
+    assert schema["$defs"]["site"]["pattern"] == "^(lon|nyc)$"
+    assert schema["properties"]["a"]["$ref"] == "#/$defs/site"
+    assert schema["properties"]["b"]["type"] == "null"
+    jsnac.add_yaml(
+        "js_kinds:\n  site:\n    type: pattern\n    regex: ^ams$\nschema:\n  a:\n    js_kind: {name: site}\n"
+    )
+    assert jsnac.build_schema_dict()["$defs"]["site"]["pattern"] == "^ams$"
+    # Kinds are not shared between builders that were not given them
+    other = SchemaBuilder()
+    other.add_yaml("schema:\n  a:\n    js_kind: {name: site}\n")
+    assert other.build_schema_dict()["properties"]["a"]["type"] == "null"
+
+
+# Test the registry is passed to worker processes and changes the build cache key
+def test_build_many_kinds(tmp_path) -> None:
+    jobs = []
+    for i in range(2):
+        definition = tmp_path / f"role{i}.yml"
+        definition.write_text("schema:\n  a:\n    js_kind: {name: site}\n", encoding="utf-8")
+        jobs.append((definition, tmp_path / f"role{i}.schema.json"))
+    options = BuildOptions(kinds=KindRegistry(KINDS))
+    results = build_many(jobs, workers=2, options=options)
+    assert all(r.ok for r in results)
+    schema = json.loads(jobs[0][1].read_text(encoding="utf-8"))
+    assert schema["properties"]["a"]["$ref"] == "#/$defs/site"
+    assert options.cache_options()["kinds"] == options.kinds.fingerprint
+    assert BuildOptions().cache_options()["kinds"] is None
+
+
+# Test custom choice kinds take their choices inline or from a file, and report a bad file
+def test_choice_kinds(tmp_path) -> None:
+    regions = tmp_path / "regions.txt"
+    regions.write_text("# Regions\neu-west\n\nus-east\n", encoding="utf-8")
+    registry = KindRegistry(
+        {
+            "colour": {"type": "choice", "choices": ["red", "green"]},
+            "region": {"type": "choice", "choices_file": str(regions)},
+            "missing": {"type": "choice", "choices_file": str(tmp_path / "missing.txt")},
+        },
+    )
+    assert registry.names == frozenset({"colour", "region"})
+    definitions = registry.definitions()
+    assert definitions["colour"]["enum"] == ["red", "green"]
+    assert definitions["region"]["enum"] == ["eu-west", "us-east"]
+    assert definitions["missing"]["type"] == "null"
+    assert "Invalid choices_file for js_kind (missing)" in definitions["missing"]["description"]
+
+
+# Test relative choices files of a kinds file are resolved from the directory of the kinds file
+def test_registry_from_file_choices(tmp_path, monkeypatch) -> None:
+    root = tmp_path / "kinds"
+    root.mkdir()
+    (root / "regions.txt").write_text("eu-west\nus-east\n", encoding="utf-8")
+    kinds_file = root / "kinds.json"
+    kinds_file.write_text(json.dumps({"region": {"type": "choice", "choices_file": "regions.txt"}}), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    assert KindRegistry.from_file(kinds_file).definitions()["region"]["enum"] == ["eu-west", "us-east"]
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import json
+from pathlib import Path
+
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.metrics import BuildMetrics
+from jsnac.core.trace import TraceEvent, combine_tracers
+
+
+def _build(tracer: object, **kwargs: object) -> SchemaBuilder:
+    jsnac = SchemaBuilder(tracer=tracer, **kwargs)  # type: ignore[arg-type]
+    jsnac.add_yaml(Path("data/example-jsnac.yml").read_text(encoding="utf-8"))
+    jsnac.build_schema()
+    return jsnac
+
+
+# Test the metrics collect a time for each phase and the size of the schema
+def test_metrics() -> None:
+    metrics = BuildMetrics()
+    _build(metrics, prune_defs=True)
+    assert list(metrics.phases) == ["parse", "definitions", "properties", "serialize"]
+    schema = _build(None, prune_defs=True).build_schema_dict()
+    assert metrics.refs == json.dumps(schema["properties"]).count('"$ref"')
+    assert metrics.defs == len(schema["$defs"])
+    assert metrics.definitions > metrics.defs
+    assert metrics.nodes > metrics.refs
+    report = metrics.as_dict()
+    assert report["total"] == sum(metrics.phases.values())
+    assert report["peak_memory"] is None
+    json.dumps(report)
+
+
+# Test phases outside the builder and memory use can be recorded
+def test_metrics_phase_and_memory() -> None:
+    metrics = BuildMetrics()
+    count = 10000
+    with metrics.track_memory(), metrics.phase("write"):
+        data = [str(i) for i in range(count)]
+    assert len(data) == count
+    assert metrics.phases["write"] > 0
+    assert metrics.peak_memory is not None
+    assert metrics.peak_memory > count
+
+
+# Test combined tracers each receive every event
+def test_combine_tracers() -> None:
+    first: list[TraceEvent] = []
+    second: list[TraceEvent] = []
+    assert combine_tracers(None, None) is None
+    assert combine_tracers(first.append, None) == first.append
+    _build(combine_tracers(first.append, second.append))
+    assert first == second
+    assert [e.phase for e in first] == ["parse", "definitions", "properties", "serialize"]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import gzip
+import http.client
+import json
+import os
+import shutil
+import threading
+from collections.abc import Generator
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+
+from jsnac.core.serve import SchemaServer, SchemaStore
+
+
+@pytest.fixture
+def server(tmp_path) -> Generator[SchemaServer, None, None]:
+    root = tmp_path / "defs"
+    (root / "roles").mkdir(parents=True)
+    shutil.copy("data/example-jsnac.yml", root / "a.yml")
+    shutil.copy("data/example-jsnac.yml", root / "roles" / "leaf.yml")
+    server = SchemaServer([str(root)], port=0, interval=3600, debounce=0)
+    server.build_all()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def _get(server: SchemaServer, path: str, headers: dict | None = None) -> tuple[http.client.HTTPResponse, bytes]:
+    connection = http.client.HTTPConnection(*server.address, timeout=5)
+    connection.request("GET", path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+# Test that schemas are served as compact JSON at the path of their definition, listed in the index
+def test_serve_schema(server) -> None:
+    response, body = _get(server, "/roles/leaf.schema.json?v=1")
+    assert response.status == HTTPStatus.OK
+    assert response.getheader("Content-Type") == "application/schema+json"
+    assert response.getheader("Cache-Control") == "no-cache"
+    assert b"\n" not in body
+    assert json.loads(body)["title"] == "Example Schema"
+    response, body = _get(server, "/")
+    assert json.loads(body)["schemas"] == {
+        "/a.schema.json": {"etag": server.store.get("/a.schema.json").etag},
+        "/roles/leaf.schema.json": {"etag": server.store.get("/roles/leaf.schema.json").etag},
+    }
+    response, _ = _get(server, "/missing.schema.json")
+    assert response.status == HTTPStatus.NOT_FOUND
+
+
+# Test that conditional requests with a matching ETag get an empty 304 response
+def test_serve_etag(server) -> None:
+    response, _ = _get(server, "/a.schema.json")
+    etag = response.getheader("ETag")
+    response, body = _get(server, "/a.schema.json", {"If-None-Match": etag})
+    assert response.status == HTTPStatus.NOT_MODIFIED
+    assert body == b""
+    assert response.getheader("ETag") == etag
+    response, _ = _get(server, "/a.schema.json", {"If-None-Match": f'"other", W/{etag}'})
+    assert response.status == HTTPStatus.NOT_MODIFIED
+    response, _ = _get(server, "/a.schema.json", {"If-None-Match": '"other"'})
+    assert response.status == HTTPStatus.OK
+
+
+# Test that gzip is only used when accepted, with its own ETag
+def test_serve_gzip(server) -> None:
+    _, plain = _get(server, "/a.schema.json")
+    response, body = _get(server, "/a.schema.json", {"Accept-Encoding": "br, gzip;q=0.5"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Vary") == "Accept-Encoding"
+    assert response.getheader("ETag").endswith('-gzip"')
+    assert gzip.decompress(body) == plain
+    response, body = _get(server, "/a.schema.json", {"Accept-Encoding": "gzip;q=0"})
+    assert response.getheader("Content-Encoding") is None
+    assert body == plain
+
+
+# Test that changed definitions are rebuilt, broken ones keep their last schema and removed ones are dropped
+def test_serve_rebuild(server, tmp_path) -> None:
+    root = tmp_path / "defs"
+    etag = server.store.get("/a.schema.json").etag
+    path = root / "a.yml"
+    stat = path.stat()
+    path.write_text("header:\n  title: changed\nschema: {}\n", encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    (root / "roles" / "leaf.yml").unlink()
+    results = server.watcher.poll()
+    assert [(r.ok, r.output_path) for r in results] == [(True, Path("/a.schema.json"))]
+    response, body = _get(server, "/a.schema.json", {"If-None-Match": etag})
+    assert response.status == HTTPStatus.OK
+    assert json.loads(body)["title"] == "changed"
+    assert server.store.paths() == ["/a.schema.json"]
+    path.write_text("header: [", encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    assert not server.watcher.poll()[0].ok
+    assert json.loads(_get(server, "/a.schema.json")[1])["title"] == "changed"
+
+
+# Test that a changed choices file rebuilds the schemas using it
+def test_serve_choices_file(server, tmp_path) -> None:
+    root = tmp_path / "defs"
+    choices = root / "sites.txt"
+    choices.write_text("lon\n", encoding="utf-8")
+    path = root / "a.yml"
+    stat = path.stat()
+    path.write_text('schema:\n  site:\n    js_kind: { name: choice, choices_file: "sites.txt" }\n', encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert [r.ok for r in server.watcher.poll()] == [True]
+    stat = choices.stat()
+    choices.write_text("lon\nnyc\n", encoding="utf-8")
+    os.utime(choices, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert [r.output_path for r in server.watcher.poll()] == [Path("/a.schema.json")]
+    body = _get(server, "/a.schema.json")[1]
+    assert json.loads(body)["properties"]["site"]["enum"] == ["lon", "nyc"]
+
+
+# Test that the index is only rebuilt when a schema actually changes
+def test_serve_store() -> None:
+    store = SchemaStore()
+    assert json.loads(store.get("/").body) == {"schemas": {}}
+    store.put("/a.schema.json", "{}")
+    index = store.get("/")
+    store.put("/a.schema.json", "{}")
+    assert store.get("/") is index
+    store.remove("/a.schema.json")
+    store.remove("/a.schema.json")
+    assert json.loads(store.get("/").body) == {"schemas": {}}
+
+
+# Test that only the first of two definitions sharing a URL path is served
+def test_serve_collision(tmp_path) -> None:
+    shutil.copy("data/example-jsnac.yml", tmp_path / "a.yml")
+    shutil.copy("data/example-jsnac.json", tmp_path / "a.json")
+    server = SchemaServer([str(tmp_path)], port=0)
+    try:
+        results = {r.input_path.name: r for r in server.build_all()}
+    finally:
+        server.server_close()
+    assert results["a.json"].ok
+    assert "already written to /a.schema.json" in results["a.yml"].error
+    assert server.store.paths() == ["/a.schema.json"]
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import json
+from pathlib import Path
+
+import pytest
+
+from jsnac.core.build import SchemaBuilder
+from jsnac.core.validate import Validator
+
+test_schema = Path("data/example.schema.json").read_text(encoding="utf-8")
+
+
+def _write_invalid(tmp_path) -> Path:
+    data = json.loads(Path("data/example.json").read_text(encoding="utf-8"))
+    data["interfaces"][0]["ipv4"] = "10.0.0.256/32"
+    del data["chassis"]["model"]
+    invalid = tmp_path / "invalid.json"
+    invalid.write_text(json.dumps(data), encoding="utf-8")
+    return invalid
+
+
+# Test our example data is valid against the example schema
+def test_validate_valid() -> None:
+    validator = Validator(test_schema)
+    assert validator.validate_file("data/example.yml").ok
+    assert validator.validate(json.loads(Path("data/example.json").read_text(encoding="utf-8"))) == []
+
+
+# Test invalid data reports every error with its location
+def test_validate_invalid(tmp_path) -> None:
+    result = Validator(test_schema).validate_file(_write_invalid(tmp_path))
+    assert not result.ok
+    assert "chassis: 'model' is a required property" in result.errors
+    assert "interfaces/0/ipv4: '10.0.0.256/32' does not match" in "\n".join(result.errors)
+
+
+# Test unreadable files are reported as errors rather than raised
+def test_validate_bad_file(tmp_path) -> None:
+    bad = tmp_path / "bad.yml"
+    bad.write_text("value: bad ^^^ yaml data --: \n +2", encoding="utf-8")
+    result = Validator(test_schema).validate_file(bad)
+    assert not result.ok
+    assert result.errors[0].startswith("<file>: ")
+
+
+# Test an invalid schema raises an exception
+def test_validate_invalid_schema() -> None:
+    with pytest.raises(ValueError, match="Invalid JSON schema"):
+        Validator({"type": "not-a-type"})
+
+
+# Test a Validator can be created directly from a SchemaBuilder
+def test_validate_from_builder() -> None:
+    jsnac = SchemaBuilder()
+    jsnac.add_yaml("schema:\n  vlan:\n    js_kind: {name: vlan}\n  mac:\n    js_kind: {name: mac}\n")
+    validator = Validator.from_builder(jsnac)
+    assert validator.validate({"vlan": 10, "mac": "00:11:22:33:44:55"}) == []
+    assert len(validator.validate({"vlan": 5000, "mac": "00:11:22:33:44"})) == 2  # noqa: PLR2004
+
+
+# Test many files are validated in order, in-process and across a process pool
+def test_validate_files(tmp_path) -> None:
+    paths = [Path("data/example.yml"), _write_invalid(tmp_path), Path("data/example.json")]
+    validator = Validator(test_schema)
+    for workers in (1, 2):
+        results = list(validator.validate_files(paths, workers=workers))
+        assert [r.path for r in results] == paths
+        assert [r.ok for r in results] == [True, False, True]
+
+
+# Test enums are checked with a set for strings, with the same results and messages as jsonschema
+def test_validate_enum() -> None:
+    schema = {"type": "object", "properties": {"x": {"enum": ["a", "b", 1, None]}}}
+    validator = Validator(schema)
+    assert validator.validate({"x": "b"}) == []
+    assert validator.validate({"x": 1}) == []
+    assert validator.validate({"x": None}) == []
+    assert validator.validate({"x": "c"}) == ["x: 'c' is not one of ['a', 'b', 1, None]"]
+    # Values that are not strings are still compared by jsonschema, where True is not 1
+    assert validator.validate({"x": True}) == ["x: True is not one of ['a', 'b', 1, None]"]
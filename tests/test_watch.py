@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from jsnac.core.watch import Watcher
+
+
+def _make_tree(tmp_path) -> Path:
+    root = tmp_path / "defs"
+    root.mkdir()
+    shutil.copy("data/example-jsnac.yml", root / "a.yml")
+    shutil.copy("data/example-jsnac.yml", root / "b.yml")
+    return root
+
+
+def _touch(path: Path, text: str) -> None:
+    # Bump the modification time explicitly, coarse filesystem timestamps may not change otherwise
+    stat = path.stat()
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+# Test that the initial build writes every schema and nothing is rebuilt without changes
+def test_watch_build_all(tmp_path) -> None:
+    root = _make_tree(tmp_path)
+    watcher = Watcher([str(root)], tmp_path / "out", debounce=0)
+    results = watcher.build_all()
+    assert all(r.ok for r in results)
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["a.schema.json", "b.schema.json"]
+    assert watcher.poll() == []
+
+
+# Test that only changed and added definitions are rebuilt
+def test_watch_poll(tmp_path) -> None:
+    root = _make_tree(tmp_path)
+    watcher = Watcher([str(root)], debounce=0)
+    watcher.build_all()
+    _touch(root / "a.yml", "header:\n  title: changed\nschema: {}\n")
+    shutil.copy("data/example-jsnac.yml", root / "c.yml")
+    (root / "b.yml").unlink()
+    results = watcher.poll()
+    assert sorted(r.input_path.name for r in results) == ["a.yml", "c.yml"]
+    assert json.loads((root / "a.schema.json").read_text(encoding="utf-8"))["title"] == "changed"
+    assert watcher.poll() == []
+
+
+# Test that broken definitions are reported and the watcher keeps running
+def test_watch_run(tmp_path) -> None:
+    root = _make_tree(tmp_path)
+    watcher = Watcher([str(root)], interval=0.01, debounce=0.01)
+    stop = threading.Event()
+    received = []
+
+    def callback(results: list) -> None:
+        received.extend(results)
+        stop.set()
+
+    thread = threading.Thread(target=watcher.run, args=(callback, stop))
+    thread.start()
+    _touch(root / "a.yml", "schema: [")
+    thread.join(timeout=10)
+    stop.set()
+    assert len(received) == 1
+    assert not received[0].ok
+
+
+# Test that a second definition mapping to the same schema fails until the first one is removed
+def test_watch_collision(tmp_path) -> None:
+    root = _make_tree(tmp_path)
+    shutil.copy("data/example-jsnac.json", root / "a.json")
+    watcher = Watcher([str(root)], debounce=0)
+    results = {r.input_path.name: r for r in watcher.build_all()}
+    assert results["a.json"].ok
+    assert "already written to" in results["a.yml"].error
+    (root / "a.json").unlink()
+    _touch(root / "a.yml", (root / "a.yml").read_text(encoding="utf-8"))
+    assert [r.ok for r in watcher.poll()] == [True]
+
+
+# Test that a changed choices file rebuilds only the definitions using it
+def test_watch_choices_file(tmp_path) -> None:
+    root = _make_tree(tmp_path)
+    (root / "sites.txt").write_text("lon\n", encoding="utf-8")
+    (root / "sites.yml").write_text(
+        'schema:\n  site:\n    js_kind: { name: choice, choices_file: "sites.txt" }\n',
+        encoding="utf-8",
+    )
+    watcher = Watcher([str(root)], debounce=0)
+    watcher.build_all()
+    assert watcher.poll() == []
+    _touch(root / "sites.txt", "lon\nnyc\n")
+    assert [r.input_path.name for r in watcher.poll()] == ["sites.yml"]
+    schema = json.loads((root / "sites.schema.json").read_text(encoding="utf-8"))
+    assert schema["properties"]["site"]["enum"] == ["lon", "nyc"]
+    assert watcher.poll() == []